@@ -3,28 +3,243 @@ Agent factory for creating pre-configured AI agents.
 Simplifica la creación de agentes con diferentes propósitos y configuraciones.
 """
 
-from typing import Optional, List
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional, List, Sequence
 from agents import Agent, OpenAIChatCompletionsModel, set_tracing_disabled
 from agents.mcp import MCPServer
-from utils import get_azure_openai_client, get_chat_deployment_name
+from agents.models.interface import Model, ModelProvider
+from ai_agents.instrumentation import AgentMetrics, InstrumentationHooks
+from ai_agents.tool_retrieval import ToolRetriever
+from servers.server_manager import ServerConfig, ServerManager
+from servers.server_pool import ServerPool
+from servers.tool_filter import ToolFilters, ToolSelection, apply_tool_filters
+from utils import get_azure_openai_client, get_chat_deployment_name, get_settings, on_clients_reset
+from utils.load_balancer import LoadBalancedProvider, get_load_balanced_provider
+from utils.response_cache import CachedModel, ResponseCache
+from utils.settings import Settings
 
 
 class AgentFactory:
     """Factory para crear diferentes tipos de agentes pre-configurados."""
     
+    _model_provider: Optional[ModelProvider] = None
+    _response_cache: Optional[ResponseCache] = None
+    _response_cache_enabled: Optional[bool] = None
+    _instrumentation: Optional[InstrumentationHooks] = None
+    # Plantillas (Agent sin servidores) por nombre e instrucciones; se descartan al
+    # cambiar el modelo, la caché, la instrumentación, los clientes o la configuración
+    _agent_templates: Dict[tuple, Agent] = {}
+    _templates_settings: Optional[Settings] = None
+    _tool_retriever: Optional[ToolRetriever] = None
+    
+    # Filtros opcionales (pásalos como tool_filters): quitan herramientas que las
+    # instrucciones del agente no usan. Ningún agente los aplica por defecto;
+    # run_demos.py los pasa con --filter-tools.
+    
+    # Playwright sin instalación del navegador, ratón por coordenadas ni PDF
+    WEB_AUTOMATION_TOOL_FILTERS: ToolFilters = {
+        "playwright*": ToolSelection(exclude=("browser_install", "browser_mouse_*", "browser_pdf_save")),
+    }
+    # Además sin diálogos, subida de ficheros, pestañas, consola/red, resize, drag ni
+    # generación de tests; filesystem sin move_file, read_media_file ni list_directory_with_sizes
+    COMBINED_TOOL_FILTERS: ToolFilters = {
+        "filesystem*": ToolSelection(exclude=("move_file", "read_media_file", "list_directory_with_sizes")),
+        "playwright*": ToolSelection(exclude=(
+            "browser_install", "browser_mouse_*", "browser_pdf_save", "browser_resize", "browser_drag",
+            "browser_file_upload", "browser_handle_dialog", "browser_tab*", "browser_console_messages",
+            "browser_network_requests", "browser_generate_playwright_test",
+        )),
+    }
+    
+    @staticmethod
+    def use_model_provider(provider: Optional[ModelProvider]):
+        """
+        Fija el proveedor de modelos de los agentes creados a partir de ahora.
+        
+        Sin proveedor explícito se usa el balanceador si AZURE_OPENAI_BACKENDS
+        está definido, y si no el deployment único de AZURE_OPENAI_*.
+        
+        Args:
+            provider: Proveedor a usar (p. ej. un LoadBalancedProvider), o None
+        """
+        AgentFactory._model_provider = provider
+        AgentFactory.clear_agent_templates()
+    
+    @staticmethod
+    def enable_response_cache(enabled: bool = True,
+                              path: Optional[str] = None,
+                              max_entries: int = 1000,
+                              ttl: float = 7 * 24 * 3600):
+        """
+        Activa o desactiva la caché en disco de respuestas del modelo.
+        
+        Con la caché activa, un turno idéntico (deployment, mensajes, herramientas
+        y parámetros de muestreo) se responde desde .cache/responses.sqlite sin
+        llamar a Azure. También se activa con AZURE_OPENAI_RESPONSE_CACHE=1.
+        
+        Args:
+            enabled: Si cachear las respuestas de los agentes creados a partir de ahora
+            path: Fichero SQLite de la caché
+            max_entries: Entradas máximas (se desalojan las menos usadas)
+            ttl: Segundos de validez de cada entrada
+        """
+        AgentFactory._response_cache_enabled = enabled
+        if enabled and (AgentFactory._response_cache is None or path is not None):
+            AgentFactory._response_cache = ResponseCache(
+                path=path, max_entries=max_entries, ttl=ttl
+            )
+        AgentFactory.clear_agent_templates()
+    
+    @staticmethod
+    def get_response_cache() -> Optional[ResponseCache]:
+        """
+        Retorna la caché de respuestas activa.
+        
+        Returns:
+            ResponseCache | None: La caché, o None si está desactivada
+        """
+        enabled = AgentFactory._response_cache_enabled
+        if enabled is None:
+            enabled = get_settings().response_cache
+        if not enabled:
+            return None
+        if AgentFactory._response_cache is None:
+            AgentFactory._response_cache = ResponseCache()
+        return AgentFactory._response_cache
+    
+    @staticmethod
+    def enable_instrumentation(enabled: bool = True, jsonl_path: Optional[str] = None):
+        """
+        Activa o desactiva la instrumentación de los agentes creados a partir de ahora.
+        
+        Está desactivada por defecto. Por cada ejecución registra la latencia de
+        cada turno del modelo, los tokens de prompt, completion y caché, las
+        llamadas y el tiempo por servidor MCP y el tiempo total.
+        
+        Args:
+            enabled: Si registrar las métricas
+            jsonl_path: Fichero al que añadir una línea JSON por ejecución (opcional)
+        """
+        if not enabled:
+            AgentFactory._instrumentation = None
+        elif AgentFactory._instrumentation is None or jsonl_path is not None:
+            AgentFactory._instrumentation = InstrumentationHooks(AgentMetrics(jsonl_path=jsonl_path))
+        AgentFactory.clear_agent_templates()
+    
+    @staticmethod
+    def get_metrics() -> Optional[AgentMetrics]:
+        """
+        Retorna las métricas agregadas de los agentes instrumentados.
+        
+        Returns:
+            AgentMetrics | None: Las métricas, o None si la instrumentación está desactivada
+        """
+        hooks = AgentFactory._instrumentation
+        return hooks.metrics if hooks is not None else None
+    
+    @staticmethod
+    def enable_tool_retrieval(enabled: bool = True, top_k: int = 8, pinned: Sequence[str] = ()):
+        """
+        Activa o desactiva la selección de herramientas por petición.
+        
+        Con la selección activa, select_tools() ordena el catálogo de herramientas
+        del agente frente a la entrada (BM25 sobre nombres y descripciones) y solo
+        deja visibles las top_k más las fijadas.
+        
+        Args:
+            enabled: Si seleccionar herramientas
+            top_k: Herramientas recuperadas por petición
+            pinned: Patrones fnmatch de herramientas que se envían siempre
+        """
+        AgentFactory._tool_retriever = ToolRetriever(top_k=top_k, pinned=pinned) if enabled else None
+    
+    @staticmethod
+    def get_tool_retriever() -> Optional[ToolRetriever]:
+        """
+        Retorna el selector de herramientas activo.
+        
+        Returns:
+            ToolRetriever | None: El selector, o None si está desactivado
+        """
+        return AgentFactory._tool_retriever
+    
+    @staticmethod
+    async def select_tools(agent: Agent, input: Any) -> Agent:
+        """
+        Adapta las herramientas visibles del agente a una entrada concreta.
+        
+        Args:
+            agent: Agente creado por el factory
+            input: Entrada que se pasará a Runner.run
+            
+        Returns:
+            Agent: Un clon con solo las herramientas relevantes, o el mismo agente
+                si la selección está desactivada
+        """
+        retriever = AgentFactory._tool_retriever
+        if retriever is None:
+            return agent
+        return await retriever.select(agent, input)
+    
+    @staticmethod
+    def _create_model() -> Model:
+        """Crea el modelo de los agentes según el proveedor configurado."""
+        provider = AgentFactory._model_provider or get_load_balanced_provider()
+        if provider is not None:
+            model = provider.get_model(None)
+        else:
+            model = OpenAIChatCompletionsModel(
+                model=get_chat_deployment_name(),
+                openai_client=get_azure_openai_client()
+            )
+        
+        cache = AgentFactory.get_response_cache()
+        if cache is not None:
+            return CachedModel(model, cache, model_name=AgentFactory._cache_model_name(provider, model))
+        return model
+    
+    @staticmethod
+    def _cache_model_name(provider: Optional[ModelProvider], model: Model) -> Optional[str]:
+        """
+        Deployment que identifica las respuestas del modelo en la caché.
+        
+        Con balanceo, cualquiera de los deployments del grupo puede responder,
+        así que la clave usa el conjunto ordenado de todos ellos.
+        """
+        if isinstance(provider, LoadBalancedProvider):
+            deployments = sorted({backend.config.deployment for backend in provider.balancer.backends})
+            return "balanced:" + ",".join(deployments)
+        return getattr(model, "model", None)
+    
+    @staticmethod
+    def clear_agent_templates():
+        """
+        Descarta las plantillas de agentes; los siguientes agentes se construyen de cero.
+        
+        Se llama sola al cambiar el proveedor, la caché de respuestas o la
+        instrumentación, y cuando los clientes compartidos se reconfiguran o se cierran.
+        """
+        AgentFactory._agent_templates.clear()
+    
     @staticmethod
     def create_base_agent(name: str, 
                          instructions: str, 
                          mcp_servers: Optional[List[MCPServer]] = None,
-                         enable_tracing: bool = False) -> Agent:
+                         enable_tracing: bool = False,
+                         tool_filters: Optional[ToolFilters] = None) -> Agent:
         """
         Crea un agente base con configuración estándar.
         
+        La primera vez se construye una plantilla por tipo de agente; las
+        siguientes llamadas solo la clonan y le asignan los servidores MCP, de
+        modo que crear un agente por petición es barato.
+        
         Args:
             name: Nombre del agente
             instructions: Instrucciones del agente
             mcp_servers: Lista de servidores MCP (opcional)
             enable_tracing: Si habilitar el tracing
+            tool_filters: Herramientas visibles por servidor (patrón del nombre -> ToolSelection)
             
         Returns:
             Agent: Agente configurado
@@ -32,27 +247,35 @@ class AgentFactory:
         if not enable_tracing:
             set_tracing_disabled(disabled=True)
         
-        client = get_azure_openai_client()
-        deployment_name = get_chat_deployment_name()
+        settings = get_settings()
+        if settings is not AgentFactory._templates_settings:
+            # Configuración recargada: el deployment o las credenciales pueden haber cambiado
+            AgentFactory._agent_templates.clear()
+            AgentFactory._templates_settings = settings
         
-        return Agent(
-            name=name,
-            instructions=instructions,
-            model=OpenAIChatCompletionsModel(
-                model=deployment_name,
-                openai_client=client
-            ),
-            mcp_servers=mcp_servers or [],
-        )
+        key = (name, instructions)
+        template = AgentFactory._agent_templates.get(key)
+        if template is None:
+            template = Agent(
+                name=name,
+                instructions=instructions,
+                model=AgentFactory._create_model(),
+                hooks=AgentFactory._instrumentation,
+            )
+            AgentFactory._agent_templates[key] = template
+        
+        return template.clone(mcp_servers=apply_tool_filters(mcp_servers or [], tool_filters))
     
     @staticmethod
-    def create_filesystem_agent(mcp_servers: List[MCPServer], enable_tracing: bool = False) -> Agent:
+    def create_filesystem_agent(mcp_servers: List[MCPServer], enable_tracing: bool = False,
+                                tool_filters: Optional[ToolFilters] = None) -> Agent:
         """
         Crea un agente especializado en operaciones de archivos.
         
         Args:
             mcp_servers: Lista de servidores MCP (debe incluir filesystem)
             enable_tracing: Si habilitar el tracing
+            tool_filters: Herramientas visibles por servidor (por defecto todas)
             
         Returns:
             Agent: Agente especializado en archivos
@@ -71,17 +294,22 @@ class AgentFactory:
             name="Filesystem Assistant",
             instructions=instructions,
             mcp_servers=mcp_servers,
-            enable_tracing=enable_tracing
+            enable_tracing=enable_tracing,
+            tool_filters=tool_filters
         )
     
     @staticmethod
-    def create_web_automation_agent(mcp_servers: List[MCPServer], enable_tracing: bool = False) -> Agent:
+    def create_web_automation_agent(mcp_servers: List[MCPServer], enable_tracing: bool = False,
+                                    tool_filters: Optional[ToolFilters] = None) -> Agent:
         """
         Crea un agente especializado en automatización web.
         
         Args:
             mcp_servers: Lista de servidores MCP (debe incluir Playwright)
             enable_tracing: Si habilitar el tracing
+            tool_filters: Herramientas visibles por servidor (por defecto todas). Con
+                AgentFactory.WEB_AUTOMATION_TOOL_FILTERS se ocultan browser_install,
+                browser_mouse_* y browser_pdf_save
             
         Returns:
             Agent: Agente especializado en automatización web
@@ -101,17 +329,20 @@ class AgentFactory:
             name="Web Automation Agent",
             instructions=instructions,
             mcp_servers=mcp_servers,
-            enable_tracing=enable_tracing
+            enable_tracing=enable_tracing,
+            tool_filters=tool_filters
         )
     
     @staticmethod
-    def create_tool_inspector_agent(mcp_servers: List[MCPServer], enable_tracing: bool = False) -> Agent:
+    def create_tool_inspector_agent(mcp_servers: List[MCPServer], enable_tracing: bool = False,
+                                    tool_filters: Optional[ToolFilters] = None) -> Agent:
         """
         Crea un agente especializado en inspeccionar herramientas disponibles.
         
         Args:
             mcp_servers: Lista de servidores MCP
             enable_tracing: Si habilitar el tracing
+            tool_filters: Herramientas visibles por servidor (por defecto todas)
             
         Returns:
             Agent: Agente inspector de herramientas
@@ -130,17 +361,20 @@ class AgentFactory:
             name="Tool Inspector",
             instructions=instructions,
             mcp_servers=mcp_servers,
-            enable_tracing=enable_tracing
+            enable_tracing=enable_tracing,
+            tool_filters=tool_filters
         )
     
     @staticmethod
-    def create_github_agent(mcp_servers: List[MCPServer], enable_tracing: bool = False) -> Agent:
+    def create_github_agent(mcp_servers: List[MCPServer], enable_tracing: bool = False,
+                            tool_filters: Optional[ToolFilters] = None) -> Agent:
         """
         Crea un agente especializado en operaciones GitHub.
         
         Args:
             mcp_servers: Lista de servidores MCP (debe incluir GitHub server)
             enable_tracing: Si habilitar el tracing
+            tool_filters: Herramientas visibles por servidor (por defecto todas)
             
         Returns:
             Agent: Agente especializado en GitHub
@@ -177,17 +411,20 @@ class AgentFactory:
             name="GitHub Assistant",
             instructions=instructions,
             mcp_servers=mcp_servers,
-            enable_tracing=enable_tracing
+            enable_tracing=enable_tracing,
+            tool_filters=tool_filters
         )
     
     @staticmethod
-    def create_sequential_thinking_agent(mcp_servers: List[MCPServer], enable_tracing: bool = False) -> Agent:
+    def create_sequential_thinking_agent(mcp_servers: List[MCPServer], enable_tracing: bool = False,
+                                         tool_filters: Optional[ToolFilters] = None) -> Agent:
         """
         Crea un agente especializado en pensamiento secuencial estructurado.
         
         Args:
             mcp_servers: Lista de servidores MCP (debe incluir Sequential Thinking server)
             enable_tracing: Si habilitar el tracing
+            tool_filters: Herramientas visibles por servidor (por defecto todas)
             
         Returns:
             Agent: Agente especializado en pensamiento secuencial
@@ -227,17 +464,20 @@ class AgentFactory:
             name="Sequential Thinking Assistant",
             instructions=instructions,
             mcp_servers=mcp_servers,
-            enable_tracing=enable_tracing
+            enable_tracing=enable_tracing,
+            tool_filters=tool_filters
         )
     
     @staticmethod
-    def create_fetch_agent(mcp_servers: List[MCPServer], enable_tracing: bool = False) -> Agent:
+    def create_fetch_agent(mcp_servers: List[MCPServer], enable_tracing: bool = False,
+                           tool_filters: Optional[ToolFilters] = None) -> Agent:
         """
         Crea un agente especializado en operaciones HTTP/REST API.
         
         Args:
             mcp_servers: Lista de servidores MCP (debe incluir Fetch server)
             enable_tracing: Si habilitar el tracing
+            tool_filters: Herramientas visibles por servidor (por defecto todas)
             
         Returns:
             Agent: Agente especializado en HTTP/REST API
@@ -275,17 +515,24 @@ class AgentFactory:
             name="HTTP/API Assistant",
             instructions=instructions,
             mcp_servers=mcp_servers,
-            enable_tracing=enable_tracing
+            enable_tracing=enable_tracing,
+            tool_filters=tool_filters
         )
     
     @staticmethod
-    def create_combined_agent(mcp_servers: List[MCPServer], enable_tracing: bool = False) -> Agent:
+    def create_combined_agent(mcp_servers: List[MCPServer], enable_tracing: bool = False,
+                              tool_filters: Optional[ToolFilters] = None) -> Agent:
         """
         Crea un agente con capacidades combinadas (filesystem + web).
         
         Args:
             mcp_servers: Lista de servidores MCP (filesystem + Playwright)
             enable_tracing: Si habilitar el tracing
+            tool_filters: Herramientas visibles por servidor (por defecto todas). Con
+                AgentFactory.COMBINED_TOOL_FILTERS se ocultan además diálogos
+                (browser_handle_dialog), subida de ficheros, pestañas (browser_tab*),
+                consola, red, resize, drag y generación de tests de Playwright, y
+                move_file, read_media_file y list_directory_with_sizes del filesystem
             
         Returns:
             Agent: Agente con capacidades combinadas
@@ -314,5 +561,33 @@ class AgentFactory:
             name="Combined Assistant",
             instructions=instructions,
             mcp_servers=mcp_servers,
-            enable_tracing=enable_tracing
-        )
\ No newline at end of file
+            enable_tracing=enable_tracing,
+            tool_filters=tool_filters
+        )
+    
+    @staticmethod
+    @asynccontextmanager
+    async def borrow_agent(create_agent: Callable[[List[MCPServer]], Agent],
+                           *configs: ServerConfig,
+                           pool: Optional[ServerPool] = None):
+        """
+        Crea un agente cuyos servidores MCP se toman prestados del pool.
+        
+        Los servidores vuelven al pool al salir del bloque, de modo que
+        sesiones consecutivas de Runner.run no vuelven a lanzar procesos.
+        
+        Args:
+            create_agent: Método factory que recibe la lista de servidores
+                (por ejemplo AgentFactory.create_filesystem_agent)
+            *configs: Configuraciones de los servidores a prestar
+            pool: Pool a usar (por defecto el compartido de ServerManager)
+            
+        Yields:
+            Agent: Agente con los servidores prestados
+        """
+        async with ServerManager.lease_servers(*configs, pool=pool) as servers:
+            yield create_agent(servers)
+
+
+# Las plantillas guardan el modelo con su cliente: se descartan si los clientes cambian
+on_clients_reset(AgentFactory.clear_agent_templates)
@@ -0,0 +1,240 @@
+"""
+Ejecución por lotes de muchas peticiones independientes contra un mismo agente.
+Reparte los prompts entre un número fijo de workers que comparten los servidores
+MCP, escribe cada resultado en JSONL en cuanto termina, reintenta los fallos
+transitorios y resume throughput y percentiles de latencia al final.
+"""
+
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, TextIO, Union
+
+import anyio
+import httpx
+import openai
+from agents import Agent, Runner
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+from utils.stats import summarize
+
+# Errores de transporte con los servidores MCP (proceso caído, stream cerrado, red)
+_MCP_TRANSPORT_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream,
+                         ConnectionError, httpx.TransportError)
+
+
+class BatchItem(NamedTuple):
+    """Una petición del lote."""
+    id: str
+    prompt: str
+
+
+class BatchOptions(NamedTuple):
+    """Parámetros de ejecución de un lote."""
+    concurrency: int = 8
+    retries: int = 2
+    retry_backoff: float = 1.0
+    retry_backoff_max: float = 30.0
+    timeout: Optional[float] = None
+    max_turns: int = 10
+
+
+def load_prompts(path: Union[str, Path]) -> List[BatchItem]:
+    """
+    Lee un fichero JSONL de prompts.
+
+    Cada línea es un objeto con ``prompt`` (y opcionalmente ``id``) o una cadena
+    JSON; las líneas vacías se ignoran. Sin ``id`` se usa el número de línea.
+
+    Args:
+        path: Ruta del fichero
+
+    Returns:
+        list[BatchItem]: Peticiones en el orden del fichero
+    """
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            data = json.loads(line)
+            if isinstance(data, str):
+                items.append(BatchItem(str(number), data))
+            elif isinstance(data, dict) and isinstance(data.get("prompt"), str):
+                items.append(BatchItem(str(data.get("id", number)), data["prompt"]))
+            else:
+                raise ValueError(f"❌ ERROR: línea {number} de {path}: se esperaba un objeto con 'prompt'")
+    return items
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """
+    Fallos transitorios (red, 429, 5xx, timeouts, transporte MCP) que merece la pena repetir.
+
+    Cualquier otro error (respuesta inválida del modelo, herramienta no permitida,
+    errores de programación) falla a la primera. El Agents SDK envuelve los fallos
+    de las herramientas MCP en AgentsException, así que se revisa también la causa.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError, asyncio.TimeoutError)):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code in (408, 409, 429) or error.status_code >= 500
+        if isinstance(error, _MCP_TRANSPORT_ERRORS):
+            return True
+        if isinstance(error, McpError):
+            return error.error.code in (CONNECTION_CLOSED, httpx.codes.REQUEST_TIMEOUT)
+        error = error.__cause__
+    return False
+
+
+class BatchReport:
+    """Resultado agregado de un lote."""
+
+    def __init__(self):
+        self.total = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.retries = 0
+        self.elapsed = 0.0
+        self.latencies: List[float] = []
+        self.tokens: Dict[str, int] = {"input": 0, "output": 0}
+
+    @property
+    def throughput(self) -> float:
+        """Peticiones completadas por segundo."""
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def describe(self) -> Dict[str, Any]:
+        """Contadores, throughput, latencias (s) de las peticiones correctas y tokens."""
+        return {
+            "total": self.total,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retries": self.retries,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "throughput": round(self.throughput, 3),
+            "latency": summarize(self.latencies),
+            "tokens": dict(self.tokens),
+        }
+
+    def __str__(self) -> str:
+        latency = summarize(self.latencies)
+        return (f"{self.succeeded}/{self.total} correctas, {self.failed} fallidas, {self.retries} reintentos "
+                f"en {self.elapsed:.1f}s ({self.throughput:.2f} peticiones/s) · "
+                f"p50 {latency['p50']:.2f}s · p95 {latency['p95']:.2f}s · p99 {latency['p99']:.2f}s · "
+                f"tokens {self.tokens['input']} entrada / {self.tokens['output']} salida")
+
+
+AgentSource = Union[Agent, Callable[[int], Agent]]
+
+
+async def run_batch(agent: AgentSource,
+                    items: Iterable[BatchItem],
+                    output: Union[str, Path, TextIO, None] = None,
+                    options: BatchOptions = BatchOptions(),
+                    prepare_agent: Optional[Callable[[Agent, str], Awaitable[Agent]]] = None,
+                    verbose: bool = True) -> BatchReport:
+    """
+    Ejecuta un lote de peticiones con concurrencia acotada.
+
+    ``options.concurrency`` workers toman peticiones de una cola común, así que
+    nunca hay más ejecuciones en vuelo que workers aunque el lote tenga miles de
+    prompts. Cada resultado se escribe como una línea JSON (id, prompt, ok,
+    output o error, intentos, latencia y tokens) en cuanto termina, en orden de
+    finalización.
+
+    Args:
+        agent: Agente compartido, o función que recibe el índice del worker y
+            retorna su agente (p. ej. con su vista de un servidor multiplexado)
+        items: Peticiones del lote
+        output: Fichero JSONL de resultados, flujo abierto, "-" para stdout o None
+        options: Concurrencia, reintentos, timeout y turnos máximos
+        prepare_agent: Ajuste por petición (p. ej. AgentFactory.select_tools)
+        verbose: Si imprimir una línea de progreso por petición
+
+    Returns:
+        BatchReport: Totales, throughput y percentiles de latencia
+    """
+    items = list(items)
+    report = BatchReport()
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+
+    if isinstance(output, (str, Path)) and str(output) != "-":
+        stream, owns_stream = open(output, "w", encoding="utf-8"), True
+    else:
+        stream, owns_stream = (sys.stdout if output == "-" else output), False
+    # Con los resultados en stdout, el progreso va a stderr para no mezclarlos
+    progress = sys.stderr if stream is sys.stdout else sys.stdout
+
+    def emit(record: Dict[str, Any]):
+        report.total += 1
+        if stream is not None:
+            stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+            stream.flush()
+        if verbose:
+            status = "✅" if record["ok"] else "❌"
+            detail = f"{record['latency']:.2f}s" if record["ok"] else record["error"]
+            print(f"{status} [{report.total}/{len(items)}] {record['id']} ({detail})", file=progress)
+
+    async def run_one(worker_agent: Agent, item: BatchItem) -> Dict[str, Any]:
+        attempts = 0
+        # La latencia de la petición incluye los reintentos
+        started = time.perf_counter()
+        while True:
+            attempts += 1
+            try:
+                run_agent = await prepare_agent(worker_agent, item.prompt) if prepare_agent else worker_agent
+                result = await asyncio.wait_for(
+                    Runner.run(starting_agent=run_agent, input=item.prompt, max_turns=options.max_turns),
+                    timeout=options.timeout,
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempts > options.retries or not _is_retryable(e):
+                    report.failed += 1
+                    return {"id": item.id, "prompt": item.prompt, "ok": False,
+                            "error": f"{type(e).__name__}: {e}", "attempts": attempts}
+                report.retries += 1
+                # Backoff exponencial con jitter para no sincronizar los reintentos de todos los workers
+                delay = min(options.retry_backoff_max, options.retry_backoff * 2 ** (attempts - 1))
+                await asyncio.sleep(random.uniform(delay / 2, delay))
+                continue
+
+            latency = time.perf_counter() - started
+            usage = result.context_wrapper.usage
+            report.succeeded += 1
+            report.latencies.append(latency)
+            report.tokens["input"] += usage.input_tokens
+            report.tokens["output"] += usage.output_tokens
+            return {"id": item.id, "prompt": item.prompt, "ok": True, "output": str(result.final_output),
+                    "attempts": attempts, "latency": round(latency, 3),
+                    "input_tokens": usage.input_tokens, "output_tokens": usage.output_tokens}
+
+    async def worker(index: int):
+        worker_agent = agent(index) if callable(agent) else agent
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            emit(await run_one(worker_agent, item))
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker(i) for i in range(max(1, min(options.concurrency, len(items))))))
+    finally:
+        report.elapsed = time.perf_counter() - started
+        if owns_stream:
+            stream.close()
+    return report
@@ -0,0 +1,253 @@
+"""
+Instrumentación de los agentes: tokens, latencias y llamadas a herramientas.
+Los hooks se registran al crear el agente y, por cada ejecución, miden la latencia
+de cada turno del modelo, los tokens consumidos, las llamadas por servidor MCP y el
+tiempo total. Los datos se exportan en JSONL y como snapshot de texto Prometheus.
+"""
+
+import json
+import time
+from collections import defaultdict, deque
+from functools import partial
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import weakref
+
+from agents.lifecycle import AgentHooksBase
+from agents.mcp import MCPServer
+
+try:
+    from agents.tool import get_function_tool_origin
+except ImportError:  # openai-agents anterior a ToolOrigin
+    get_function_tool_origin = None
+from utils.stats import percentile
+
+
+def tool_server_name(tool: Any) -> str:
+    """
+    Servidor MCP que atiende la herramienta ("local" para function tools propias).
+
+    Usa el ToolOrigin del SDK; en versiones que no lo tienen, el servidor se
+    obtiene del ``functools.partial`` con el que el SDK envuelve la herramienta.
+    tests/test_instrumentation.py comprueba la atribución con la versión instalada.
+    """
+    if get_function_tool_origin is not None and hasattr(tool, "on_invoke_tool"):
+        origin = get_function_tool_origin(tool)
+        if origin is not None and origin.mcp_server_name:
+            return origin.mcp_server_name
+    invoke = getattr(tool, "on_invoke_tool", None)
+    if isinstance(invoke, partial):
+        server = next((arg for arg in invoke.args if isinstance(arg, MCPServer)), None)
+        if server is not None:
+            return server.name
+    return "local"
+
+
+class RunMetrics:
+    """Métricas de una ejecución de Runner.run (incluidos los handoffs)."""
+
+    def __init__(self, agent: str):
+        self.agent = agent
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self._llm_started: Optional[float] = None
+        self._tool_started: Dict[str, float] = {}
+        self.wall_time: Optional[float] = None
+        self.turns: List[Dict[str, Any]] = []
+        self.tools: Dict[str, Dict[str, float]] = {}
+
+    def totals(self) -> Dict[str, int]:
+        """Tokens sumados de todos los turnos."""
+        return {
+            kind: sum(turn[kind] for turn in self.turns)
+            for kind in ("prompt_tokens", "completion_tokens", "cached_tokens")
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "agent": self.agent,
+            "started_at": self.started_at,
+            "wall_time": self.wall_time,
+            "model_time": sum(turn["latency"] for turn in self.turns),
+            "turns": self.turns,
+            **self.totals(),
+            "tools": self.tools,
+        }
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class AgentMetrics:
+    """
+    Agregados de todas las ejecuciones y exportación a JSONL / Prometheus.
+
+    Solo guarda contadores y una ventana de las últimas muestras de latencia,
+    de modo que el coste es constante aunque se deje activo en producción.
+    """
+
+    def __init__(self, jsonl_path: Optional[str] = None, max_samples: int = 1000):
+        """
+        Args:
+            jsonl_path: Fichero al que se añade una línea JSON por ejecución (opcional)
+            max_samples: Muestras de latencia recientes por agente para los cuantiles
+        """
+        self.jsonl_path = Path(jsonl_path) if jsonl_path else None
+        self.max_samples = max_samples
+        self.runs: Dict[str, int] = defaultdict(int)
+        self.wall_seconds: Dict[str, float] = defaultdict(float)
+        self.model_turns: Dict[str, int] = defaultdict(int)
+        self.model_seconds: Dict[str, float] = defaultdict(float)
+        self.tokens: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.tool_calls: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.tool_seconds: Dict[Tuple[str, str], float] = defaultdict(float)
+        self.latency_samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.max_samples))
+        if self.jsonl_path is not None:
+            self.jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def record(self, run: RunMetrics):
+        """Suma una ejecución terminada a los agregados y la añade al JSONL."""
+        agent = run.agent
+        self.runs[agent] += 1
+        self.wall_seconds[agent] += run.wall_time or 0.0
+        for turn in run.turns:
+            self.model_turns[agent] += 1
+            self.model_seconds[agent] += turn["latency"]
+            self.latency_samples[agent].append(turn["latency"])
+        for kind, value in run.totals().items():
+            self.tokens[(agent, kind.replace("_tokens", ""))] += value
+        for server, tool in run.tools.items():
+            self.tool_calls[(agent, server)] += int(tool["calls"])
+            self.tool_seconds[(agent, server)] += tool["duration"]
+        if self.jsonl_path is not None:
+            with self.jsonl_path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(run.to_dict(), ensure_ascii=False) + "\n")
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Resumen por agente: ejecuciones, turnos, tokens y tiempo en modelo y herramientas."""
+        result = {}
+        for agent, runs in self.runs.items():
+            samples = list(self.latency_samples[agent])
+            result[agent] = {
+                "runs": runs,
+                "model_turns": self.model_turns[agent],
+                "model_p50_ms": round(percentile(samples, 50) * 1000, 1),
+                "model_p95_ms": round(percentile(samples, 95) * 1000, 1),
+                "prompt_tokens": self.tokens[(agent, "prompt")],
+                "completion_tokens": self.tokens[(agent, "completion")],
+                "cached_tokens": self.tokens[(agent, "cached")],
+                "tool_calls": {server: calls for (name, server), calls in self.tool_calls.items() if name == agent},
+                "wall_seconds": round(self.wall_seconds[agent], 3),
+            }
+        return result
+
+    def prometheus(self) -> str:
+        """Snapshot en formato de texto de Prometheus."""
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                rendered = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+                lines.append(f"{name}{suffix}{{{rendered}}} {value}")
+
+        metric("agent_runs_total", "counter", "Ejecuciones completadas",
+               [("", {"agent": a}, v) for a, v in self.runs.items()])
+        metric("agent_run_wall_seconds_total", "counter", "Tiempo total de las ejecuciones",
+               [("", {"agent": a}, round(v, 6)) for a, v in self.wall_seconds.items()])
+        latency = []
+        for agent, samples in self.latency_samples.items():
+            values = list(samples)
+            for quantile in (0.5, 0.95, 0.99):
+                latency.append(("", {"agent": agent, "quantile": quantile},
+                                round(percentile(values, quantile * 100), 6)))
+            latency.append(("_sum", {"agent": agent}, round(self.model_seconds[agent], 6)))
+            latency.append(("_count", {"agent": agent}, self.model_turns[agent]))
+        metric("agent_model_latency_seconds", "summary", "Latencia de cada turno del modelo", latency)
+        metric("agent_tokens_total", "counter", "Tokens por tipo (prompt, completion, cached)",
+               [("", {"agent": a, "type": kind}, v) for (a, kind), v in self.tokens.items()])
+        metric("agent_tool_calls_total", "counter", "Llamadas a herramientas por servidor MCP",
+               [("", {"agent": a, "server": s}, v) for (a, s), v in self.tool_calls.items()])
+        metric("agent_tool_seconds_total", "counter", "Tiempo en herramientas por servidor MCP",
+               [("", {"agent": a, "server": s}, round(v, 6)) for (a, s), v in self.tool_seconds.items()])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str, extra: str = ""):
+        """
+        Escribe el snapshot Prometheus (p. ej. para el textfile collector de node_exporter).
+
+        Args:
+            path: Fichero de destino (se reemplaza de forma atómica)
+            extra: Métricas adicionales ya formateadas (p. ej. las del limitador de concurrencia)
+        """
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(target.suffix + ".tmp")
+        tmp.write_text(self.prometheus() + extra, encoding="utf-8")
+        tmp.replace(target)
+
+
+class InstrumentationHooks(AgentHooksBase):
+    """
+    Hooks de agente que alimentan un AgentMetrics.
+
+    Una misma instancia se comparte entre agentes: las métricas de una ejecución
+    con handoffs se acumulan en el contexto de la ejecución, no en el agente.
+    """
+
+    def __init__(self, metrics: Optional[AgentMetrics] = None):
+        self.metrics = metrics or AgentMetrics()
+        # Por id del objeto Usage de la ejecución: lo comparten el RunContextWrapper
+        # y los ToolContext de cada llamada. Una ejecución que falla antes de on_end
+        # se descarta cuando se libera
+        self._runs: Dict[int, RunMetrics] = {}
+
+    def _run(self, context, agent) -> RunMetrics:
+        key = id(context.usage)
+        run = self._runs.get(key)
+        if run is None:
+            run = self._runs[key] = RunMetrics(agent.name)
+            weakref.finalize(context.usage, self._runs.pop, key, None)
+        return run
+
+    async def on_start(self, context, agent):
+        self._run(context, agent)
+
+    async def on_llm_start(self, context, agent, system_prompt, input_items):
+        self._run(context, agent)._llm_started = time.perf_counter()
+
+    async def on_llm_end(self, context, agent, response):
+        run = self._run(context, agent)
+        started = run._llm_started
+        usage = response.usage
+        run.turns.append({
+            "agent": agent.name,
+            "latency": time.perf_counter() - started if started is not None else 0.0,
+            "prompt_tokens": usage.input_tokens,
+            "completion_tokens": usage.output_tokens,
+            "cached_tokens": usage.input_tokens_details.cached_tokens or 0,
+        })
+        run._llm_started = None
+
+    async def on_tool_start(self, context, agent, tool):
+        call_id = getattr(context, "tool_call_id", None) or tool.name
+        self._run(context, agent)._tool_started[call_id] = time.perf_counter()
+
+    async def on_tool_end(self, context, agent, tool, result):
+        run = self._run(context, agent)
+        started = run._tool_started.pop(getattr(context, "tool_call_id", None) or tool.name, None)
+        duration = time.perf_counter() - started if started is not None else 0.0
+        stats = run.tools.setdefault(
+            tool_server_name(tool), {"calls": 0, "duration": 0.0}
+        )
+        stats["calls"] += 1
+        stats["duration"] += duration
+
+    async def on_end(self, context, agent, output):
+        run = self._runs.pop(id(context.usage), None)
+        if run is None:
+            return
+        run.wall_time = time.perf_counter() - run._started
+        self.metrics.record(run)
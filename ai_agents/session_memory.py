@@ -0,0 +1,314 @@
+"""
+Memoria de conversación acotada para el modo interactivo.
+Guarda las sesiones en SQLite, mantiene literales los últimos turnos y resume
+de forma incremental los anteriores, de modo que el coste por turno de una
+conversación larga no crece sin límite.
+"""
+
+import asyncio
+import contextlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from agents import Runner
+from agents.memory import SessionABC
+
+DEFAULT_SESSIONS_PATH = Path(__file__).parent.parent / ".cache" / "sessions.sqlite"
+
+SUMMARY_INSTRUCTIONS = """You maintain the running summary of a conversation between a user and an AI assistant.
+You receive the current summary (possibly empty) and the turns that are leaving the context window.
+Return an updated summary that merges both: keep facts, decisions, names, file paths, URLs,
+open questions and results of tool calls the user may refer to later. Drop greetings and chit-chat.
+Write in the language of the conversation, as plain text, in at most {words} words."""
+
+# Resumidor: (resumen anterior, texto de los turnos que salen de la ventana, máximo de tokens) -> resumen nuevo
+Summarizer = Callable[[str, str, int], Awaitable[str]]
+
+
+def estimate_item_tokens(item: Dict[str, Any]) -> int:
+    """Aproxima los tokens de un item de la conversación (~4 caracteres/token)."""
+    return max(1, len(json.dumps(item, ensure_ascii=False)) // 4)
+
+
+def _is_user_message(item: Dict[str, Any]) -> bool:
+    return item.get("role") == "user" and item.get("type", "message") == "message"
+
+
+def _text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    return " ".join(part.get("text", "") for part in content or [] if isinstance(part, dict))
+
+
+def render_transcript(items: List[Dict[str, Any]], max_output_chars: int = 500) -> str:
+    """Convierte items de la conversación en texto plano para el resumidor."""
+    lines = []
+    for item in items:
+        kind = item.get("type", "message")
+        if kind == "message":
+            speaker = {"user": "User", "assistant": "Assistant"}.get(item.get("role"), item.get("role"))
+            lines.append(f"{speaker}: {_text(item.get('content'))}")
+        elif kind == "function_call":
+            lines.append(f"Tool call {item.get('name')}({item.get('arguments', '')})")
+        elif kind == "function_call_output":
+            output = str(item.get("output", ""))
+            lines.append(f"Tool result: {output[:max_output_chars]}")
+    return "\n".join(lines)
+
+
+async def model_summarizer(summary: str, transcript: str, max_tokens: int) -> str:
+    """Resume con el modelo de AgentFactory (un agente sin herramientas)."""
+    # Import diferido: AgentFactory importa los módulos de ai_agents
+    from ai_agents.agent_factory import AgentFactory
+
+    agent = AgentFactory.create_base_agent(
+        "Conversation Summarizer", SUMMARY_INSTRUCTIONS.format(words=max(50, int(max_tokens * 0.75)))
+    )
+    prompt = f"Current summary:\n{summary or '(empty)'}\n\nTurns to fold into the summary:\n{transcript}"
+    result = await Runner.run(starting_agent=agent, input=prompt)
+    return str(result.final_output).strip()
+
+
+class SummarizingSession(SessionABC):
+    """
+    Sesión del Agents SDK con ventana de turnos y resumen incremental.
+
+    - Los últimos ``keep_turns`` turnos (pregunta del usuario, llamadas a
+      herramientas y respuesta) se envían literales.
+    - Los anteriores se pliegan en un resumen: solo se resumen los turnos que
+      salen de la ventana junto con el resumen previo, nunca toda la historia.
+    - El historial enviado (resumen + turnos) no supera ``max_context_tokens``:
+      se pliegan más turnos si hace falta, y mientras tanto se omiten los más
+      antiguos. El turno en curso se envía siempre.
+
+    El plegado se lanza en segundo plano al guardar los items, así que normalmente
+    ocurre mientras el usuario escribe la siguiente pregunta.
+    """
+
+    def __init__(self, session_id: str, path: Optional[Path] = None,
+                 keep_turns: int = 6, max_context_tokens: int = 4000,
+                 summary_tokens: int = 400, summarizer: Optional[Summarizer] = None):
+        """
+        Args:
+            session_id: Identificador de la sesión (reanudar con el mismo id recupera la conversación)
+            path: Fichero SQLite (por defecto .cache/sessions.sqlite)
+            keep_turns: Turnos recientes que se envían literales
+            max_context_tokens: Tokens máximos (aprox.) de historial por petición
+            summary_tokens: Tokens máximos del resumen
+            summarizer: Función de resumen (por defecto model_summarizer)
+        """
+        if keep_turns < 1:
+            raise ValueError("❌ ERROR: keep_turns debe ser al menos 1")
+        self.session_id = session_id
+        self.path = Path(path) if path else DEFAULT_SESSIONS_PATH
+        self.keep_turns = keep_turns
+        self.max_context_tokens = max_context_tokens
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer or model_summarizer
+        self.stats: Dict[str, int] = {"folds": 0, "folded_turns": 0, "fold_errors": 0, "trimmed_turns": 0}
+        self._compaction: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY, summary TEXT NOT NULL DEFAULT '',"
+            " summarized_turns INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS session_items ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, turn INTEGER NOT NULL,"
+            " item TEXT NOT NULL, tokens INTEGER NOT NULL, summarized INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS session_items_session ON session_items (session_id, summarized, id)"
+        )
+        self._db.commit()
+
+    # --- Almacenamiento -------------------------------------------------------
+
+    def _summary(self) -> Tuple[str, int]:
+        row = self._db.execute(
+            "SELECT summary, summarized_turns FROM sessions WHERE session_id = ?", (self.session_id,)
+        ).fetchone()
+        return (row[0], row[1]) if row else ("", 0)
+
+    def _turns(self) -> List[Tuple[int, List[Dict[str, Any]], int]]:
+        """Turnos sin resumir, en orden: (número, items, tokens)."""
+        rows = self._db.execute(
+            "SELECT turn, item, tokens FROM session_items"
+            " WHERE session_id = ? AND summarized = 0 ORDER BY id", (self.session_id,)
+        ).fetchall()
+        turns: List[Tuple[int, List[Dict[str, Any]], int]] = []
+        for turn, item, tokens in rows:
+            if not turns or turns[-1][0] != turn:
+                turns.append((turn, [], 0))
+            number, items, total = turns[-1]
+            items.append(json.loads(item))
+            turns[-1] = (number, items, total + tokens)
+        return turns
+
+    def _summary_item(self, summary: str) -> Dict[str, Any]:
+        return {"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"}
+
+    def _context(self) -> Tuple[str, List[Tuple[int, List[Dict[str, Any]], int]], int]:
+        """Resumen, turnos que caben en el presupuesto (siempre al menos el último) y turnos omitidos."""
+        summary, _ = self._summary()
+        turns = self._turns()
+        budget = self.max_context_tokens - (estimate_item_tokens(self._summary_item(summary)) if summary else 0)
+        kept: List[Tuple[int, List[Dict[str, Any]], int]] = []
+        used = 0
+        for turn in reversed(turns):
+            if kept and used + turn[2] > budget:
+                break
+            kept.append(turn)
+            used += turn[2]
+        return summary, list(reversed(kept)), len(turns) - len(kept)
+
+    # --- SessionABC ------------------------------------------------------------
+
+    async def get_items(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Historial para la siguiente petición: resumen (si hay) y turnos recientes."""
+        if self._compaction is not None and not self._compaction.done():
+            # asyncio.wait no propaga la cancelación del plegado ni lo cancela si se cancela esta espera
+            await asyncio.wait({self._compaction})
+        with self._lock:
+            summary, turns, omitted = self._context()
+        if omitted:
+            self.stats["trimmed_turns"] += omitted
+        items = [self._summary_item(summary)] if summary else []
+        items += [item for _, turn_items, _ in turns for item in turn_items]
+        return items[-limit:] if limit is not None else items
+
+    async def add_items(self, items: List[Dict[str, Any]]) -> None:
+        """Guarda los items del turno y, si la ventana se llenó, pliega los más antiguos en segundo plano."""
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT MAX(turn) FROM session_items WHERE session_id = ?", (self.session_id,)
+            ).fetchone()
+            turn = row[0] if row and row[0] is not None else 0
+            rows = []
+            for item in items:
+                if _is_user_message(item) or turn == 0:
+                    turn += 1
+                rows.append((self.session_id, turn, json.dumps(item, ensure_ascii=False),
+                             estimate_item_tokens(item)))
+            self._db.executemany(
+                "INSERT INTO session_items (session_id, turn, item, tokens) VALUES (?, ?, ?, ?)", rows
+            )
+            self._db.execute(
+                "INSERT INTO sessions (session_id, updated_at) VALUES (?, ?)"
+                " ON CONFLICT(session_id) DO UPDATE SET updated_at = excluded.updated_at",
+                (self.session_id, now),
+            )
+            self._db.commit()
+        if self._needs_compaction() and (self._compaction is None or self._compaction.done()):
+            self._compaction = asyncio.get_running_loop().create_task(self._compact())
+
+    async def pop_item(self) -> Optional[Dict[str, Any]]:
+        """Elimina y retorna el item más reciente que no se haya resumido."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, item FROM session_items WHERE session_id = ? AND summarized = 0"
+                " ORDER BY id DESC LIMIT 1", (self.session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("DELETE FROM session_items WHERE id = ?", (row[0],))
+            self._db.commit()
+        return json.loads(row[1])
+
+    async def clear_session(self) -> None:
+        """Borra los items y el resumen de la sesión."""
+        await self._cancel_compaction()
+        with self._lock:
+            self._db.execute("DELETE FROM session_items WHERE session_id = ?", (self.session_id,))
+            self._db.execute("DELETE FROM sessions WHERE session_id = ?", (self.session_id,))
+            self._db.commit()
+
+    # --- Plegado -----------------------------------------------------------------
+
+    def _to_fold(self) -> List[Tuple[int, List[Dict[str, Any]], int]]:
+        """Turnos más antiguos que hay que resumir para respetar la ventana y el presupuesto."""
+        with self._lock:
+            summary, _ = self._summary()
+            turns = self._turns()
+        # Reservar sitio para el resumen en cuanto vaya a existir
+        budget = self.max_context_tokens - (self.summary_tokens if summary or len(turns) > self.keep_turns else 0)
+        fold = max(0, len(turns) - self.keep_turns)
+        while fold < len(turns) - 1 and sum(turn[2] for turn in turns[fold:]) > budget:
+            fold += 1
+        return turns[:fold]
+
+    def _needs_compaction(self) -> bool:
+        return bool(self._to_fold())
+
+    async def _cancel_compaction(self):
+        """Cancela el plegado en curso y espera a que termine, para no dejar una tarea cancelada pendiente."""
+        task, self._compaction = self._compaction, None
+        if task is not None and not task.done():
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    async def _compact(self):
+        try:
+            while True:
+                fold = self._to_fold()
+                if not fold:
+                    return
+                with self._lock:
+                    summary, summarized_turns = self._summary()
+                transcript = render_transcript([item for _, items, _ in fold for item in items])
+                new_summary = await self.summarizer(summary, transcript, self.summary_tokens)
+                # Tope duro por si el resumidor se pasa de largo
+                new_summary = new_summary[: self.summary_tokens * 4]
+                with self._lock:
+                    self._db.execute(
+                        "UPDATE session_items SET summarized = 1 WHERE session_id = ? AND turn <= ?",
+                        (self.session_id, fold[-1][0]),
+                    )
+                    self._db.execute(
+                        "UPDATE sessions SET summary = ?, summarized_turns = ?, updated_at = ?"
+                        " WHERE session_id = ?",
+                        (new_summary, summarized_turns + len(fold), time.time(), self.session_id),
+                    )
+                    self._db.commit()
+                self.stats["folds"] += 1
+                self.stats["folded_turns"] += len(fold)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Sin resumen la conversación sigue: get_items omite los turnos que no caben
+            self.stats["fold_errors"] += 1
+            print(f"⚠️  No se pudo resumir la conversación: {e}")
+
+    def describe(self) -> Dict[str, Any]:
+        """Turnos literales y resumidos, tokens de historial por petición y contadores."""
+        with self._lock:
+            summary, summarized_turns = self._summary()
+            turns = self._turns()
+            _, kept, _ = self._context()
+        context_tokens = sum(turn[2] for turn in kept)
+        if summary:
+            context_tokens += estimate_item_tokens(self._summary_item(summary))
+        return {
+            "session_id": self.session_id,
+            "turns": len(turns),
+            "summarized_turns": summarized_turns,
+            "summary_tokens": estimate_item_tokens({"content": summary}) if summary else 0,
+            "context_tokens": context_tokens,
+            **self.stats,
+        }
+
+    async def close(self):
+        """Cancela el plegado en curso y cierra la conexión con SQLite."""
+        await self._cancel_compaction()
+        self._db.close()
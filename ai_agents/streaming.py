@@ -0,0 +1,124 @@
+"""
+Ejecución de agentes en streaming.
+Imprime los tokens y las llamadas a herramientas a medida que llegan en lugar de
+esperar al final del bucle de herramientas, y mide la latencia percibida.
+"""
+
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agents import Agent, Runner
+from agents.result import RunResultStreaming
+
+
+class StreamTimings:
+    """Tiempos de una ejecución en streaming (segundos desde el inicio)."""
+
+    def __init__(self):
+        self.time_to_first_token: Optional[float] = None
+        self.time_to_first_tool_call: Optional[float] = None
+        self.total: Optional[float] = None
+        self.text_deltas = 0
+        self.tool_calls: List[str] = []
+
+    def describe(self) -> Dict[str, Any]:
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "time_to_first_token_ms": ms(self.time_to_first_token),
+            "time_to_first_tool_call_ms": ms(self.time_to_first_tool_call),
+            "total_ms": ms(self.total),
+            "text_deltas": self.text_deltas,
+            "tool_calls": len(self.tool_calls),
+        }
+
+    def __str__(self) -> str:
+        def fmt(value: Optional[float]) -> str:
+            return f"{value * 1000:.0f} ms" if value is not None else "—"
+
+        return (f"primer token {fmt(self.time_to_first_token)} · "
+                f"primera herramienta {fmt(self.time_to_first_tool_call)} · "
+                f"total {fmt(self.total)} · {len(self.tool_calls)} llamadas")
+
+
+def _write(text: str):
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def _tool_name(raw_item: Any) -> str:
+    if isinstance(raw_item, dict):
+        return raw_item.get("name") or raw_item.get("type", "tool")
+    return getattr(raw_item, "name", None) or getattr(raw_item, "type", "tool")
+
+
+async def run_streamed(agent: Agent, input: Any,
+                       on_text: Optional[Callable[[str], None]] = _write,
+                       show_tools: bool = True,
+                       **run_kwargs) -> Tuple[RunResultStreaming, StreamTimings]:
+    """
+    Ejecuta el agente con Runner.run_streamed e imprime la salida según llega.
+
+    Args:
+        agent: Agente a ejecutar
+        input: Pregunta o lista de items de entrada
+        on_text: Callback para cada fragmento de texto (None para no imprimir)
+        show_tools: Si imprimir las llamadas a herramientas y sus resultados
+        **run_kwargs: Argumentos adicionales para Runner.run_streamed (max_turns, session...)
+
+    Returns:
+        tuple: El resultado (ya completado, con final_output) y sus StreamTimings
+    """
+    timings = StreamTimings()
+    started = time.perf_counter()
+    pending: Dict[str, str] = {}
+    at_line_start = True
+
+    def emit(text: str):
+        nonlocal at_line_start
+        if on_text is not None and text:
+            on_text(text)
+            at_line_start = text.endswith("\n")
+
+    def tool_started(name: str):
+        if timings.time_to_first_tool_call is None:
+            timings.time_to_first_tool_call = time.perf_counter() - started
+        timings.tool_calls.append(name)
+        if show_tools:
+            emit(("" if at_line_start else "\n") + f"🔧 {name}…\n")
+
+    result = Runner.run_streamed(starting_agent=agent, input=input, **run_kwargs)
+    async for event in result.stream_events():
+        if event.type == "raw_response_event":
+            data = event.data
+            if data.type == "response.output_text.delta" and data.delta:
+                if timings.time_to_first_token is None:
+                    timings.time_to_first_token = time.perf_counter() - started
+                timings.text_deltas += 1
+                emit(data.delta)
+            elif data.type == "response.output_item.added":
+                # La llamada empieza a generarse antes de que el turno termine
+                call_id = getattr(data.item, "call_id", None)
+                if getattr(data.item, "type", None) == "function_call" and call_id not in pending:
+                    pending[call_id] = data.item.name
+                    tool_started(data.item.name)
+        elif event.type == "run_item_stream_event":
+            if event.name == "tool_called":
+                raw = event.item.raw_item
+                call_id = raw.get("call_id") if isinstance(raw, dict) else getattr(raw, "call_id", None)
+                if call_id is None or call_id not in pending:
+                    pending[call_id] = _tool_name(raw)
+                    tool_started(pending[call_id])
+            elif event.name == "tool_output" and show_tools:
+                raw = event.item.raw_item
+                call_id = raw.get("call_id") if isinstance(raw, dict) else getattr(raw, "call_id", None)
+                emit(f"   ✅ {pending.get(call_id, 'herramienta')} respondió\n")
+        elif event.type == "agent_updated_stream_event" and show_tools and event.new_agent is not agent:
+            emit(("" if at_line_start else "\n") + f"🤝 Handoff a {event.new_agent.name}\n")
+
+    timings.total = time.perf_counter() - started
+    if not at_line_start:
+        emit("\n")
+    return result, timings
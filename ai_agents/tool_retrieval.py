@@ -0,0 +1,251 @@
+"""
+Selección de herramientas MCP por petición.
+Ordena el catálogo de herramientas de los servidores de un agente frente a la
+entrada del usuario con BM25 (nombres y descripciones) y solo expone al modelo
+las top-k más las fijadas, de modo que el catálogo no domine el prompt.
+"""
+
+import math
+import re
+import unicodedata
+from collections import Counter
+from fnmatch import fnmatchcase
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from agents import Agent
+from agents.mcp import MCPServer
+from mcp.types import Tool as MCPTool
+
+from servers.tool_filter import FilteredServer, ToolSelection
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_CAMEL_RE = re.compile(r"([a-z0-9])([A-Z])")
+
+_STOPWORDS = frozenset("""
+a an and are as at be by can do for from how i if in into is it me my of on or please show that the
+then this to use using what when which with you your
+al como con de del el en es la las lo los mi mis para por que se su sus un una y
+""".split())
+
+# Vocabulario de las peticiones en español -> vocabulario (en inglés) de las herramientas
+_SYNONYMS: Dict[str, Tuple[str, ...]] = {
+    "archivo": ("file",), "fichero": ("file",), "carpeta": ("directory", "folder"),
+    "directorio": ("directory",), "leer": ("read",), "lee": ("read",), "contenido": ("content",),
+    "escribir": ("write",), "escribe": ("write", "type"), "guardar": ("write", "save"),
+    "guarda": ("write", "save"), "crear": ("create",), "crea": ("create",), "editar": ("edit",),
+    "edita": ("edit",), "modifica": ("edit",), "buscar": ("search", "find"), "busca": ("search", "find"),
+    "mover": ("move",), "mueve": ("move",), "renombra": ("move", "rename"), "listar": ("list",),
+    "lista": ("list",), "muestra": ("list", "show"), "navegar": ("navigate",), "navega": ("navigate",),
+    "abre": ("navigate", "open"), "visita": ("navigate",), "pagina": ("page",), "captura": ("screenshot",),
+    "pantalla": ("screenshot",), "pulsa": ("click", "press"), "clic": ("click",), "tecla": ("key", "press"),
+    "formulario": ("form", "fill"), "espera": ("wait",), "pestana": ("tab",), "cierra": ("close",),
+    "repositorio": ("repository",), "perfil": ("profile", "user"),
+    "incidencia": ("issue",), "abierta": ("open",), "rama": ("branch",), "commit": ("commit",),
+    "revisa": ("review", "list"), "fusiona": ("merge",), "codigo": ("code",), "descarga": ("fetch", "download"),
+    "obtener": ("fetch", "get"), "obten": ("fetch", "get"), "consulta": ("fetch", "get"), "url": ("url",),
+    "analiza": ("analyze", "thinking"), "paso": ("step", "thinking"), "piensa": ("thinking",),
+}
+
+
+# Preguntas por el inventario de herramientas ("what tools do you have?"): necesitan el catálogo completo
+_CATALOG_TERMS = frozenset({"tool", "capability", "capabilitie", "herramienta", "capacidad", "capacidade"})
+_CATALOG_VERBS = frozenset({"list", "what", "which", "available", "describe", "lista", "listar", "cuale",
+                            "que", "disponible", "muestra"})
+
+
+def _stem(token: str) -> str:
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Divide un texto en términos para BM25.
+
+    Separa snake_case y camelCase, quita tildes y palabras vacías, reduce plurales
+    simples y traduce el vocabulario habitual en español al de las herramientas.
+    """
+    text = _CAMEL_RE.sub(r"\1 \2", text)
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    terms = []
+    for word in _WORD_RE.findall(text.replace("_", " ")):
+        if word in _STOPWORDS:
+            continue
+        word = _stem(word)
+        terms.extend(_stem(synonym) for synonym in _SYNONYMS.get(word, (word,)))
+    return terms
+
+
+def asks_for_catalog(text: str) -> bool:
+    """Indica si la petición pregunta por las herramientas disponibles en lugar de pedir una tarea."""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    words = {_stem(word) for word in _WORD_RE.findall(text)}
+    return bool(words & _CATALOG_TERMS) and bool(words & _CATALOG_VERBS)
+
+
+class BM25Index:
+    """Índice BM25 (Okapi) en memoria sobre una lista de documentos cortos."""
+
+    def __init__(self, documents: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            documents: Textos a indexar (uno por herramienta)
+            k1: Saturación de la frecuencia de término
+            b: Normalización por longitud del documento
+        """
+        self.k1 = k1
+        self.b = b
+        self._docs = [Counter(tokenize(doc)) for doc in documents]
+        self._lengths = [sum(doc.values()) for doc in self._docs]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        frequencies = Counter(term for doc in self._docs for term in doc)
+        n = len(self._docs)
+        self._idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in frequencies.items()}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def scores(self, query: str) -> List[float]:
+        """Puntuación de cada documento frente a la consulta."""
+        terms = [term for term in set(tokenize(query)) if term in self._idf]
+        result = []
+        for doc, length in zip(self._docs, self._lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / (self._avg_length or 1.0))
+            score = 0.0
+            for term in terms:
+                tf = doc.get(term)
+                if tf:
+                    score += self._idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            result.append(score)
+        return result
+
+    def top(self, query: str, k: int) -> List[int]:
+        """Índices de los k documentos con mayor puntuación (solo los que puntúan > 0)."""
+        scores = self.scores(query)
+        ranked = sorted((i for i, score in enumerate(scores) if score > 0), key=lambda i: -scores[i])
+        return ranked[:k]
+
+
+def tool_document(tool: MCPTool) -> str:
+    """Texto indexado de una herramienta: el nombre (dos veces, pesa más) y la descripción."""
+    return f"{tool.name} {tool.name} {tool.description or ''}"
+
+
+def input_text(input: Any) -> str:
+    """Texto de la última petición del usuario (acepta str o una lista de items de entrada)."""
+    if isinstance(input, str):
+        return input
+    for item in reversed(list(input or [])):
+        if isinstance(item, dict) and item.get("role") == "user":
+            content = item.get("content")
+            if isinstance(content, str):
+                return content
+            return " ".join(part.get("text", "") for part in content or [] if isinstance(part, dict))
+    return ""
+
+
+class ToolRetriever:
+    """
+    Reduce los servidores MCP de un agente a las herramientas relevantes para una entrada.
+
+    El índice BM25 se construye una vez por catálogo (nombres y descripciones de
+    todas las herramientas de los servidores) y se reutiliza mientras el catálogo
+    no cambie. Si ninguna herramienta puntúa, o la petición pregunta qué
+    herramientas hay, el agente conserva todo el catálogo.
+    """
+
+    def __init__(self, top_k: int = 8, pinned: Sequence[str] = ()):
+        """
+        Args:
+            top_k: Herramientas recuperadas por petición
+            pinned: Patrones fnmatch de herramientas que se envían siempre
+        """
+        self.top_k = top_k
+        self.pinned = tuple(pinned)
+        self._indexes: Dict[Tuple, BM25Index] = {}
+        self.stats: Dict[str, Any] = {"selections": 0, "fallbacks": 0, "index_builds": 0,
+                                      "tools_before": 0, "tools_after": 0}
+
+    def index_for(self, tools: Sequence[MCPTool]) -> BM25Index:
+        """Índice del catálogo (en caché por nombre y descripción de cada herramienta)."""
+        key = tuple((tool.name, tool.description) for tool in tools)
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = BM25Index([tool_document(tool) for tool in tools])
+            self.stats["index_builds"] += 1
+        return index
+
+    def rank(self, tools: Sequence[MCPTool], query: str) -> Optional[List[str]]:
+        """
+        Nombres de las herramientas a enviar para una consulta.
+
+        Returns:
+            list[str] | None: Top-k más fijadas, o None si hay que enviar el catálogo
+                completo (ninguna herramienta puntúa o se pregunta por el inventario)
+        """
+        if asks_for_catalog(query):
+            return None
+        ranked = self.index_for(tools).top(query, self.top_k)
+        if not ranked:
+            return None
+        names = [tools[i].name for i in ranked]
+        names += [tool.name for tool in tools
+                  if tool.name not in names and any(fnmatchcase(tool.name, p) for p in self.pinned)]
+        return names
+
+    async def select(self, agent: Agent, input: Any) -> Agent:
+        """
+        Retorna un clon del agente cuyos servidores solo exponen las herramientas recuperadas.
+
+        Args:
+            agent: Agente con sus servidores MCP
+            input: Entrada de Runner.run (texto o lista de items)
+
+        Returns:
+            Agent: El clon filtrado, o el propio agente si el catálogo ya es pequeño
+                o la consulta no coincide con ninguna herramienta
+        """
+        catalog: List[Tuple[MCPServer, MCPTool]] = []
+        for server in agent.mcp_servers:
+            # El sondeo no cuenta como listado en el resumen de filtros; el Runner listará después
+            if isinstance(server, FilteredServer):
+                tools = await server.allowed_tools(None, agent)
+            else:
+                tools = await server.list_tools(None, agent)
+            catalog += [(server, tool) for tool in tools]
+        if len(catalog) <= self.top_k + len(self.pinned):
+            return agent
+
+        selected = self.rank([tool for _, tool in catalog], input_text(input))
+        self.stats["selections"] += 1
+        self.stats["tools_before"] += len(catalog)
+        if selected is None:
+            self.stats["fallbacks"] += 1
+            self.stats["tools_after"] += len(catalog)
+            return agent
+
+        servers = []
+        for server in agent.mcp_servers:
+            names = tuple(tool.name for owner, tool in catalog if owner is server and tool.name in selected)
+            # Un include vacío dejaría pasar todo: los servidores sin herramientas elegidas se omiten
+            if not names:
+                continue
+            # Sobre un servidor ya filtrado se restringe su selección en lugar de envolverlo otra vez
+            if isinstance(server, FilteredServer):
+                servers.append(server.restricted_to(names))
+            else:
+                servers.append(FilteredServer(server, ToolSelection(include=names)))
+        self.stats["tools_after"] += sum(1 for _, tool in catalog if tool.name in selected)
+        return agent.clone(mcp_servers=servers)
+
+    def describe(self) -> Dict[str, Any]:
+        """Selecciones, veces que se envió el catálogo completo y herramientas medias antes/después."""
+        selections = self.stats["selections"] or 1
+        return {
+            **self.stats,
+            "avg_tools_before": round(self.stats["tools_before"] / selections, 1),
+            "avg_tools_after": round(self.stats["tools_after"] / selections, 1),
+        }
@@ -0,0 +1 @@
+"""Benchmarks package for measuring MCP server and agent performance."""
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""
+Servidor MCP falso por stdio para benchmarks.
+Expone N herramientas con latencia y tamaño de respuesta configurables, sin
+red ni Node.js.
+
+Uso directo:
+    python benchmarks/fake_mcp_server.py --tools 20 --latency-ms 5 --payload-bytes 1024
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
+
+from mcp import types
+from mcp.server.lowlevel import Server
+from mcp.server.stdio import stdio_server
+
+if TYPE_CHECKING:
+    from servers.server_manager import ServerConfig
+
+
+SCRIPT_PATH = Path(__file__).resolve()
+
+
+def build_server(tools: int, latency_ms: float, jitter_ms: float, payload_bytes: int) -> Server:
+    """
+    Crea el servidor MCP falso.
+
+    Args:
+        tools: Número de herramientas (tool_0 ... tool_{n-1})
+        latency_ms: Latencia simulada de cada llamada
+        jitter_ms: Variación aleatoria (+/-) de la latencia
+        payload_bytes: Tamaño del texto devuelto por cada llamada
+    """
+    server = Server("fake-benchmark-server")
+    tool_list = [
+        types.Tool(
+            name=f"tool_{i}",
+            description=f"Fake benchmark tool number {i}. Returns a payload of configurable size.",
+            inputSchema={
+                "type": "object",
+                "properties": {"text": {"type": "string", "description": "Text to echo back"}},
+            },
+        )
+        for i in range(tools)
+    ]
+    payload = "x" * payload_bytes
+
+    @server.list_tools()
+    async def list_tools() -> List[types.Tool]:
+        return tool_list
+
+    @server.call_tool(validate_input=False)
+    async def call_tool(name: str, arguments: dict) -> List[types.TextContent]:
+        delay = max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+        return [types.TextContent(type="text", text=f"{arguments.get('text', '')}{payload}")]
+
+    return server
+
+
+def fake_server_config(tools: int = 10, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                       payload_bytes: int = 256, startup_ms: float = 0.0,
+                       name: str = "Fake Benchmark Server",
+                       pid_file: Optional[Path] = None) -> "ServerConfig":
+    """
+    Configuración para lanzar el servidor falso con ServerManager.
+
+    Args:
+        pid_file: Fichero donde el proceso escribe su PID (para simular caídas en tests)
+
+    Returns:
+        ServerConfig: Lanza este mismo script con el intérprete actual
+    """
+    # Import diferido: el proceso del servidor no debe cargar el SDK de agentes
+    from servers.server_manager import ServerConfig
+
+    args = [str(SCRIPT_PATH),
+            "--tools", str(tools),
+            "--latency-ms", str(latency_ms),
+            "--jitter-ms", str(jitter_ms),
+            "--payload-bytes", str(payload_bytes),
+            "--startup-ms", str(startup_ms)]
+    if pid_file is not None:
+        args += ["--pid-file", str(pid_file)]
+    return ServerConfig(name=name, command=sys.executable, args=args)
+
+
+async def serve(args: Optional[List[str]] = None):
+    """Arranca el servidor falso sobre stdin/stdout."""
+    parser = argparse.ArgumentParser(description="Servidor MCP falso para benchmarks")
+    parser.add_argument("--tools", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--payload-bytes", type=int, default=256)
+    parser.add_argument("--startup-ms", type=float, default=0.0,
+                        help="Retardo simulado antes de aceptar el handshake")
+    parser.add_argument("--pid-file", help="Fichero donde escribir el PID del proceso")
+    options = parser.parse_args(args)
+
+    if options.pid_file:
+        Path(options.pid_file).write_text(str(os.getpid()), encoding="utf-8")
+
+    if options.startup_ms:
+        time.sleep(options.startup_ms / 1000)
+    server = build_server(options.tools, options.latency_ms, options.jitter_ms, options.payload_bytes)
+    async with stdio_server() as (read, write):
+        await server.run(read, write, server.create_initialization_options())
+
+
+if __name__ == "__main__":
+    asyncio.run(serve())
@@ -0,0 +1,393 @@
+"""
+Servidor falso compatible con chat completions de Azure OpenAI / OpenAI.
+Permite probar y medir los agentes de AgentFactory de extremo a extremo sin red
+ni deployment real: respuestas guionizadas o grabadas, llamadas a herramientas,
+streaming, latencia configurable y errores 429 inyectados.
+
+Uso directo:
+    python benchmarks/fake_openai_server.py --port 8990 --latency-ms 300 --call-tools
+    AZURE_OPENAI_FAKE_SERVER=http://127.0.0.1:8990 uv run python run_demos.py filesystem
+
+Formato del guion (--script, lista JSON o JSONL): cada regla se aplica al último
+mensaje del usuario que contenga ``match`` (expresión regular; sin match = cualquiera):
+
+    {"match": "archivos", "tool_calls": [{"name": "list_directory", "arguments": {"path": "."}}],
+     "content": "Hay 3 archivos."}
+
+``tool_calls`` es un paso de llamadas; ``steps`` (lista de pasos) encadena varios.
+Tras el último paso se responde ``content``. ``throttle`` (entero) responde 429 a
+las N primeras peticiones de cada mensaje que case con la regla, para provocar
+reintentos deterministas.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import sys
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Deque, Dict, List, NamedTuple, Optional
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+
+DEFAULT_PORT = 8990
+
+
+class FakeModelOptions(NamedTuple):
+    """Comportamiento del servidor falso."""
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    chunk_ms: float = 0.0
+    words: int = 12
+    call_tools: bool = False
+    error_rate: float = 0.0
+    retry_after_ms: float = 1000.0
+    requests_per_minute: Optional[int] = None
+    script: Optional[str] = None
+    recordings: Optional[str] = None
+    record_upstream: Optional[str] = None
+    upstream_api_key: Optional[str] = None
+    seed: Optional[int] = None
+
+
+def _load_json_lines(path: Optional[str]) -> List[Dict[str, Any]]:
+    if not path or not Path(path).exists():
+        return []
+    text = Path(path).read_text(encoding="utf-8").strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def conversation_key(body: Dict[str, Any]) -> str:
+    """
+    Clave de una petición para las grabaciones.
+
+    Usa roles, contenido, llamadas a herramientas (sin sus ids aleatorios) y los
+    nombres de las herramientas disponibles.
+    """
+    messages = []
+    for message in body.get("messages", []):
+        calls = [(call.get("function", {}).get("name"), call.get("function", {}).get("arguments"))
+                 for call in message.get("tool_calls") or []]
+        messages.append((message.get("role"), message.get("content"), calls))
+    tools = sorted(tool.get("function", {}).get("name", "") for tool in body.get("tools") or [])
+    encoded = json.dumps([messages, tools], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _content_text(content: Any) -> str:
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+def _last_user_index(messages: List[Dict[str, Any]]) -> int:
+    return max((i for i, m in enumerate(messages) if m.get("role") == "user"), default=-1)
+
+
+def _last_user_text(body: Dict[str, Any]) -> str:
+    messages = body.get("messages", [])
+    user_index = _last_user_index(messages)
+    return _content_text(messages[user_index].get("content")) if user_index >= 0 else ""
+
+
+def _estimate_tokens(value: Any) -> int:
+    return max(1, len(json.dumps(value, ensure_ascii=False)) // 4)
+
+
+class FakeModel:
+    """Decide la respuesta de cada petición y lleva las estadísticas."""
+
+    def __init__(self, options: FakeModelOptions):
+        self.options = options
+        self.rules = _load_json_lines(options.script)
+        self.recordings = {entry["key"]: entry["message"] for entry in _load_json_lines(options.recordings)}
+        self.random = random.Random(options.seed)
+        self._recent: Deque[float] = deque()
+        self._throttled_rules: Dict[tuple, int] = {}
+        self.stats: Dict[str, int] = {"requests": 0, "throttled": 0, "streamed": 0,
+                                      "tool_call_replies": 0, "recorded": 0, "replayed": 0}
+
+    def throttle_delay(self) -> Optional[float]:
+        """Segundos de retry-after si la petición debe rechazarse con 429, o None."""
+        rpm = self.options.requests_per_minute
+        now = time.monotonic()
+        if rpm:
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            if len(self._recent) >= rpm:
+                return 60 - (now - self._recent[0])
+        if self.options.error_rate and self.random.random() < self.options.error_rate:
+            return self.options.retry_after_ms / 1000
+        self._recent.append(now)
+        return None
+
+    def scripted_throttle(self, body: Dict[str, Any]) -> Optional[float]:
+        """Segundos de retry-after si una regla con ``throttle`` rechaza esta petición, o None."""
+        user_text = _last_user_text(body)
+        rule = self._rule_for(user_text)
+        if rule is None or not rule.get("throttle"):
+            return None
+        key = (self.rules.index(rule), user_text)
+        count = self._throttled_rules.get(key, 0)
+        if count >= int(rule["throttle"]):
+            return None
+        self._throttled_rules[key] = count + 1
+        return self.options.retry_after_ms / 1000
+
+    def remaining_requests(self) -> Optional[int]:
+        rpm = self.options.requests_per_minute
+        return rpm - len(self._recent) if rpm else None
+
+    def _rule_for(self, user_text: str) -> Optional[Dict[str, Any]]:
+        for rule in self.rules:
+            if re.search(rule.get("match", ""), user_text, re.IGNORECASE):
+                return rule
+        return None
+
+    def scripted_reply(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Mensaje del asistente según el guion (o el comportamiento por defecto)."""
+        messages = body.get("messages", [])
+        user_index = _last_user_index(messages)
+        user_text = _last_user_text(body)
+        # Pasos de herramientas ya completados desde la última pregunta del usuario
+        step = sum(1 for m in messages[user_index + 1:] if m.get("role") == "assistant" and m.get("tool_calls"))
+
+        rule = self._rule_for(user_text)
+        if rule is not None:
+            steps = rule.get("steps") or ([rule["tool_calls"]] if rule.get("tool_calls") else [])
+            content = rule.get("content", "Hecho.")
+        else:
+            tools = body.get("tools") or []
+            steps = ([[{"name": tools[0]["function"]["name"], "arguments": {}}]]
+                     if self.options.call_tools and tools else [])
+            content = " ".join(["respuesta simulada"] * max(1, self.options.words // 2))
+
+        if step < len(steps):
+            return {"role": "assistant", "content": None, "tool_calls": [
+                {"id": f"call_{uuid.uuid4().hex[:12]}", "type": "function",
+                 "function": {"name": call["name"], "arguments": json.dumps(call.get("arguments", {}))}}
+                for call in steps[step]
+            ]}
+        return {"role": "assistant", "content": content}
+
+    async def reply(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Mensaje del asistente: grabación, upstream (modo grabación) o guion."""
+        key = conversation_key(body)
+        if key in self.recordings:
+            self.stats["replayed"] += 1
+            return self.recordings[key]
+        if self.options.record_upstream:
+            message = await self._record(key, body)
+            self.stats["recorded"] += 1
+            return message
+        return self.scripted_reply(body)
+
+    async def _record(self, key: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        # El upstream siempre se consulta sin streaming; el stream se sintetiza después
+        upstream = {k: v for k, v in body.items() if k not in ("stream", "stream_options")}
+        async with httpx.AsyncClient(timeout=120) as client:
+            response = await client.post(self.options.record_upstream, json=upstream,
+                                         headers={"api-key": self.options.upstream_api_key or ""})
+        response.raise_for_status()
+        message = response.json()["choices"][0]["message"]
+        message = {k: v for k, v in message.items() if k in ("role", "content", "tool_calls")}
+        self.recordings[key] = message
+        with Path(self.options.recordings).open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"key": key, "message": message}, ensure_ascii=False) + "\n")
+        return message
+
+
+def _completion(body: Dict[str, Any], message: Dict[str, Any], model: str) -> Dict[str, Any]:
+    prompt_tokens = _estimate_tokens(body.get("messages", []))
+    completion_tokens = _estimate_tokens(message.get("content") or message.get("tool_calls"))
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+            "message": message,
+        }],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+async def _stream(completion: Dict[str, Any], chunk_ms: float, include_usage: bool) -> AsyncIterator[str]:
+    base = {"id": completion["id"], "object": "chat.completion.chunk",
+            "created": completion["created"], "model": completion["model"]}
+    choice = completion["choices"][0]
+    message = choice["message"]
+
+    def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+        data = {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+        return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    yield chunk({"role": "assistant", "content": ""})
+    if message.get("content"):
+        words = re.findall(r"\S+\s*", message["content"])
+        for word in words:
+            if chunk_ms:
+                await asyncio.sleep(chunk_ms / 1000)
+            yield chunk({"content": word})
+    for index, call in enumerate(message.get("tool_calls") or []):
+        yield chunk({"tool_calls": [{"index": index, "id": call["id"], "type": "function",
+                                     "function": {"name": call["function"]["name"], "arguments": ""}}]})
+        yield chunk({"tool_calls": [{"index": index,
+                                     "function": {"arguments": call["function"]["arguments"]}}]})
+    yield chunk({}, choice["finish_reason"])
+    if include_usage:
+        yield f"data: {json.dumps({**base, 'choices': [], 'usage': completion['usage']})}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+def build_app(options: FakeModelOptions = FakeModelOptions()) -> Starlette:
+    """
+    Crea la aplicación ASGI.
+
+    Rutas: /openai/deployments/{deployment}/chat/completions (Azure),
+    /v1/chat/completions (OpenAI) y /stats (contadores).
+    """
+    model = FakeModel(options)
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model.stats["requests"] += 1
+        delay = model.scripted_throttle(body)
+        if delay is None:
+            delay = model.throttle_delay()
+        if delay is not None:
+            model.stats["throttled"] += 1
+            return JSONResponse(
+                {"error": {"code": "429", "message": "Rate limit is exceeded (fake server)."}},
+                status_code=429,
+                headers={"retry-after-ms": str(int(delay * 1000)),
+                         "retry-after": str(max(1, round(delay)))},
+            )
+
+        latency = max(0.0, options.latency_ms + model.random.uniform(-options.jitter_ms, options.jitter_ms))
+        if latency:
+            await asyncio.sleep(latency / 1000)
+        message = await model.reply(body)
+        if message.get("tool_calls"):
+            model.stats["tool_call_replies"] += 1
+        completion = _completion(body, message, request.path_params.get("deployment") or body.get("model", "fake"))
+
+        headers = {}
+        remaining = model.remaining_requests()
+        if remaining is not None:
+            headers["x-ratelimit-remaining-requests"] = str(remaining)
+        if body.get("stream"):
+            model.stats["streamed"] += 1
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            return StreamingResponse(_stream(completion, options.chunk_ms, include_usage),
+                                     media_type="text/event-stream", headers=headers)
+        return JSONResponse(completion, headers=headers)
+
+    async def stats(request: Request):
+        return JSONResponse(model.stats)
+
+    app = Starlette(routes=[
+        Route("/openai/deployments/{deployment}/chat/completions", chat_completions, methods=["POST"]),
+        Route("/v1/chat/completions", chat_completions, methods=["POST"]),
+        Route("/stats", stats, methods=["GET"]),
+    ])
+    app.state.model = model
+    return app
+
+
+@asynccontextmanager
+async def run_fake_openai_server(options: FakeModelOptions = FakeModelOptions(),
+                                 host: str = "127.0.0.1", port: int = 0):
+    """
+    Arranca el servidor falso en el event loop actual (para tests y benchmarks).
+
+    Args:
+        options: Comportamiento del servidor
+        host: Interfaz de escucha
+        port: Puerto (0 para uno libre)
+
+    Yields:
+        str: URL base, para usar como azure_endpoint o AZURE_OPENAI_FAKE_SERVER
+    """
+    app = build_app(options)
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    try:
+        while not server.started:
+            if task.done():
+                task.result()
+            await asyncio.sleep(0.02)
+        bound_port = server.servers[0].sockets[0].getsockname()[1]
+        yield f"http://{host}:{bound_port}"
+    finally:
+        server.should_exit = True
+        await task
+
+
+def main(args: Optional[List[str]] = None):
+    """Arranca el servidor falso desde la línea de comandos."""
+    parser = argparse.ArgumentParser(description="Servidor falso de chat completions para tests y benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia hasta la respuesta")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--chunk-ms", type=float, default=0.0, help="Pausa entre fragmentos en streaming")
+    parser.add_argument("--words", type=int, default=12, help="Palabras de la respuesta por defecto")
+    parser.add_argument("--call-tools", action="store_true",
+                        help="Sin guion, llamar a la primera herramienta antes de responder")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de peticiones con 429")
+    parser.add_argument("--retry-after-ms", type=float, default=1000.0)
+    parser.add_argument("--rpm", type=int, default=None, help="Cupo de peticiones por minuto (429 al superarlo)")
+    parser.add_argument("--script", help="Guion de respuestas (JSON o JSONL)")
+    parser.add_argument("--recordings", help="Fichero JSONL de respuestas grabadas a reproducir")
+    parser.add_argument("--record", action="store_true",
+                        help="Grabar en --recordings las respuestas del deployment real de .env")
+    parser.add_argument("--seed", type=int, default=None)
+    options = parser.parse_args(args)
+
+    record_upstream = upstream_key = None
+    if options.record:
+        if not options.recordings:
+            parser.error("--record necesita --recordings")
+        # Import diferido: solo el modo grabación necesita la configuración real
+        sys.path.append(str(Path(__file__).resolve().parent.parent))
+        from utils.settings import get_settings
+
+        settings = get_settings()
+        record_upstream = (f"{settings.azure_endpoint.rstrip('/')}/openai/deployments/"
+                           f"{settings.chat_deployment_name}/chat/completions"
+                           f"?api-version={settings.api_version}")
+        upstream_key = settings.api_key
+
+    app = build_app(FakeModelOptions(
+        latency_ms=options.latency_ms, jitter_ms=options.jitter_ms, chunk_ms=options.chunk_ms,
+        words=options.words, call_tools=options.call_tools, error_rate=options.error_rate,
+        retry_after_ms=options.retry_after_ms, requests_per_minute=options.rpm,
+        script=options.script, recordings=options.recordings,
+        record_upstream=record_upstream, upstream_api_key=upstream_key, seed=options.seed,
+    ))
+    print(f"🤖 Servidor falso de chat completions en http://{options.host}:{options.port}")
+    print(f"💡 AZURE_OPENAI_FAKE_SERVER=http://{options.host}:{options.port}")
+    uvicorn.run(app, host=options.host, port=options.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
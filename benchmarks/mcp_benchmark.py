@@ -0,0 +1,185 @@
+"""
+Benchmark de latencia de servidores MCP con un servidor falso local.
+
+Mide el tiempo hasta el handshake, list_tools, la latencia de las llamadas a
+herramientas (p50/p95/p99) y el throughput con distintos niveles de
+concurrencia. No necesita red ni Node.js.
+
+Uso:
+    uv run python benchmarks/mcp_benchmark.py --output results.json
+    uv run python benchmarks/mcp_benchmark.py --latency-ms 5 --compare results.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Añadir el directorio padre al path para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.fake_mcp_server import fake_server_config
+from servers.server_manager import ServerConfig, ServerManager
+from servers.server_pool import ServerHandle
+from utils.stats import summarize
+
+
+async def measure_spawn(config: ServerConfig, runs: int) -> List[float]:
+    """Tiempo desde el lanzamiento del proceso hasta completar el handshake MCP."""
+    timings = []
+    for _ in range(runs):
+        handle = ServerHandle(config)
+        try:
+            await handle.start()
+            timings.append(handle.startup_seconds)
+        finally:
+            await handle.stop()
+    return timings
+
+
+async def measure_list_tools(server, runs: int) -> List[float]:
+    """Latencia de tools/list contra el servidor (sin caché)."""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await server.list_tools()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def measure_calls(server, calls: int, concurrency: int) -> Dict[str, Any]:
+    """
+    Lanza `calls` llamadas a herramientas con `concurrency` en vuelo a la vez.
+
+    Returns:
+        dict: throughput (llamadas/s), duración total y resumen de latencias
+    """
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            await server.call_tool("tool_0", {"text": str(i)})
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(calls)))
+    elapsed = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "calls": calls,
+        "elapsed_seconds": elapsed,
+        "throughput": calls / elapsed if elapsed else 0.0,
+        "latency": summarize(latencies),
+    }
+
+
+async def run_benchmark(tools: int = 10, latency_ms: float = 0.0, payload_bytes: int = 256,
+                        spawn_runs: int = 5, list_runs: int = 20, calls: int = 200,
+                        concurrency: List[int] = (1, 4, 16)) -> Dict[str, Any]:
+    """
+    Ejecuta el benchmark completo contra el servidor falso.
+
+    Returns:
+        dict: Resultados serializables a JSON
+    """
+    # Medir el servidor, no la caché de herramientas
+    ServerManager.enable_tool_cache(False)
+    config = fake_server_config(tools=tools, latency_ms=latency_ms, payload_bytes=payload_bytes)
+
+    print(f"🚀 Arranque ({spawn_runs} ejecuciones)...")
+    spawn = summarize(await measure_spawn(config, spawn_runs))
+
+    handle = ServerHandle(config)
+    await handle.start()
+    try:
+        print(f"📋 list_tools ({list_runs} ejecuciones)...")
+        list_tools = summarize(await measure_list_tools(handle.server, list_runs))
+
+        levels = []
+        for level in concurrency:
+            print(f"⚡ {calls} llamadas con concurrencia {level}...")
+            levels.append(await measure_calls(handle.server, calls, level))
+    finally:
+        await handle.stop()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "tools": tools,
+            "latency_ms": latency_ms,
+            "payload_bytes": payload_bytes,
+        },
+        "spawn": spawn,
+        "list_tools": list_tools,
+        "tool_call": levels[0]["latency"] if levels else summarize([]),
+        "concurrency": levels,
+    }
+
+
+def _delta(current: float, baseline: float) -> str:
+    if not baseline:
+        return "   n/a"
+    return f"{(current - baseline) / baseline * 100:+6.1f}%"
+
+
+def print_results(results: Dict[str, Any], baseline: Dict[str, Any] = None):
+    """Muestra los resultados y, si hay baseline, la variación respecto a ella."""
+    print("\n📊 Resultados (milisegundos):")
+    for metric in ("spawn", "list_tools", "tool_call"):
+        stats = results[metric]
+        line = (f"   {metric:<11} p50={stats['p50'] * 1000:8.2f}  p95={stats['p95'] * 1000:8.2f}"
+                f"  p99={stats['p99'] * 1000:8.2f}")
+        if baseline:
+            line += (f"   Δp50 {_delta(stats['p50'], baseline[metric]['p50'])}"
+                     f"  Δp95 {_delta(stats['p95'], baseline[metric]['p95'])}")
+        print(line)
+
+    base_levels = {level["concurrency"]: level for level in (baseline or {}).get("concurrency", [])}
+    print("\n📈 Throughput:")
+    for level in results["concurrency"]:
+        line = (f"   c={level['concurrency']:<3} {level['throughput']:8.1f} llamadas/s"
+                f"  p95={level['latency']['p95'] * 1000:8.2f}ms")
+        base = base_levels.get(level["concurrency"])
+        if base:
+            line += f"   Δ {_delta(level['throughput'], base['throughput'])}"
+        print(line)
+
+
+async def main():
+    """Función principal del benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark de latencia MCP con servidor falso")
+    parser.add_argument("--tools", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--payload-bytes", type=int, default=256)
+    parser.add_argument("--spawn-runs", type=int, default=5)
+    parser.add_argument("--list-runs", type=int, default=20)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--output", help="Fichero JSON donde guardar los resultados")
+    parser.add_argument("--compare", help="Resultados JSON anteriores con los que comparar")
+    args = parser.parse_args()
+
+    results = await run_benchmark(
+        tools=args.tools, latency_ms=args.latency_ms, payload_bytes=args.payload_bytes,
+        spawn_runs=args.spawn_runs, list_runs=args.list_runs, calls=args.calls,
+        concurrency=args.concurrency,
+    )
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_results(results, baseline)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"💾 Resultados guardados en {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+"""
+Benchmark de arranque: `npx -y` en frío frente al binario fijado con prepare_servers().
+
+Uso:
+    uv run python benchmarks/startup_benchmark.py --server filesystem --runs 3
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+# Añadir el directorio padre al path para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from servers.server_manager import ServerConfig, ServerManager
+from servers.server_pool import ServerHandle
+from utils.stats import summarize
+
+
+CONFIG_GETTERS = {
+    "filesystem": ServerManager.get_filesystem_server_config,
+    "playwright": ServerManager.get_playwright_server_config,
+    "thinking": ServerManager.get_sequential_thinking_server_config,
+    "fetch": ServerManager.get_fetch_server_config,
+}
+
+
+async def measure_startup(config: ServerConfig, runs: int) -> List[float]:
+    """Lanza el servidor `runs` veces y retorna el tiempo hasta el handshake completo."""
+    timings = []
+    for _ in range(runs):
+        handle = ServerHandle(config)
+        try:
+            await handle.start()
+            timings.append(handle.startup_seconds)
+        finally:
+            await handle.stop()
+    return timings
+
+
+def cold_config(config: ServerConfig, cache_dir: str) -> ServerConfig:
+    """Misma configuración pero con una caché de npm/uv vacía (arranque en frío real)."""
+    env = dict(config.env or {})
+    env.update({"npm_config_cache": cache_dir, "UV_CACHE_DIR": cache_dir})
+    # La descarga del paquete cuenta dentro del handshake: ampliar el timeout
+    return ServerConfig(config.name, config.command, config.args, env=env, timeout=300)
+
+
+async def run_benchmark(server: str, runs: int) -> Dict[str, Dict[str, float]]:
+    """Compara el arranque en frío con npx/uvx frente al binario instalado localmente."""
+    ServerManager.enable_tool_cache(False)
+
+    ServerManager.use_installed_servers(False)
+    unpinned = CONFIG_GETTERS[server]()
+    ServerManager.use_installed_servers(True)
+    pinned = CONFIG_GETTERS[server]()
+
+    if pinned.command == unpinned.command:
+        print("⚠️  No hay binario local: ejecuta primero `uv run python run_demos.py prepare`")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        print(f"🧊 {server}: {unpinned.command} {' '.join(unpinned.args)} (caché vacía)")
+        results["cold_npx"] = summarize(await measure_startup(cold_config(unpinned, cache_dir), runs))
+
+    print(f"📌 {server}: {pinned.command} {' '.join(pinned.args)}")
+    results["pinned"] = summarize(await measure_startup(pinned, runs))
+    return results
+
+
+async def main():
+    """Función principal del benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark de arranque de servidores MCP")
+    parser.add_argument("--server", choices=sorted(CONFIG_GETTERS), default="filesystem")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", help="Fichero JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    results = await run_benchmark(args.server, args.runs)
+
+    print("\n📊 Resultados (segundos hasta el handshake MCP):")
+    for variant, stats in results.items():
+        print(f"   {variant:<10} p50={stats['p50']:.2f}s  p95={stats['p95']:.2f}s  max={stats['max']:.2f}s")
+    speedup = results["cold_npx"]["p50"] / results["pinned"]["p50"] if results["pinned"]["p50"] else 0
+    print(f"   🚀 Mejora en p50: x{speedup:.1f}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"server": args.server, **results}, indent=2))
+        print(f"💾 Resultados guardados en {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,174 @@
+"""
+Catálogo de herramientas de los servidores MCP de los demos, sin lanzarlos.
+Instantánea resumida de tools/list de filesystem, Playwright, GitHub, fetch y
+sequential thinking (nombres reales, descripciones y esquemas abreviados) para
+benchmarks sin red ni Node.js.
+"""
+
+from typing import Dict, List
+
+from mcp.types import Tool as MCPTool
+
+
+def _tool(name: str, description: str, required: tuple = (), /, **properties: str) -> MCPTool:
+    """Crea una herramienta con parámetros de tipo simple (nombre=tipo JSON Schema)."""
+    return MCPTool(
+        name=name,
+        description=description,
+        inputSchema={
+            "type": "object",
+            "properties": {key: {"type": kind} for key, kind in properties.items()},
+            "required": list(required),
+        },
+    )
+
+
+FILESYSTEM_TOOLS = [
+    _tool("read_text_file", "Read the complete contents of a file from the file system as text. "
+          "Use head or tail to read only the first or last lines. Only works within allowed directories.",
+          ("path",), path="string", head="number", tail="number"),
+    _tool("read_media_file", "Read an image or audio file. Returns the base64 encoded data and MIME type.",
+          ("path",), path="string"),
+    _tool("read_multiple_files", "Read the contents of multiple files simultaneously. More efficient "
+          "than reading files one by one when you need to analyze or compare multiple files.",
+          ("paths",), paths="array"),
+    _tool("write_file", "Create a new file or completely overwrite an existing file with new content. "
+          "Use with caution as it will overwrite existing files without warning.",
+          ("path", "content"), path="string", content="string"),
+    _tool("edit_file", "Make line-based edits to a text file. Each edit replaces exact line sequences "
+          "with new content. Returns a git-style diff showing the changes made.",
+          ("path", "edits"), path="string", edits="array", dryRun="boolean"),
+    _tool("create_directory", "Create a new directory or ensure a directory exists. Can create multiple "
+          "nested directories in one operation.", ("path",), path="string"),
+    _tool("list_directory", "Get a detailed listing of all files and directories in a specified path. "
+          "Results distinguish between files and directories with [FILE] and [DIR] prefixes.",
+          ("path",), path="string"),
+    _tool("list_directory_with_sizes", "Get a detailed listing of all files and directories in a "
+          "specified path, including sizes.", ("path",), path="string", sortBy="string"),
+    _tool("directory_tree", "Get a recursive tree view of files and directories as a JSON structure.",
+          ("path",), path="string"),
+    _tool("move_file", "Move or rename files and directories. Can move files between directories and "
+          "rename them in a single operation.", ("source", "destination"),
+          source="string", destination="string"),
+    _tool("search_files", "Recursively search for files and directories matching a pattern. Searches "
+          "through all subdirectories from the starting path.", ("path", "pattern"),
+          path="string", pattern="string", excludePatterns="array"),
+    _tool("get_file_info", "Retrieve detailed metadata about a file or directory: size, creation time, "
+          "last modified time, permissions and type.", ("path",), path="string"),
+    _tool("list_allowed_directories", "Returns the list of directories that this server is allowed "
+          "to access."),
+]
+
+PLAYWRIGHT_TOOLS = [
+    _tool("browser_close", "Close the page"),
+    _tool("browser_resize", "Resize the browser window", ("width", "height"), width="number", height="number"),
+    _tool("browser_console_messages", "Returns all console messages"),
+    _tool("browser_handle_dialog", "Handle a dialog", ("accept",), accept="boolean", promptText="string"),
+    _tool("browser_evaluate", "Evaluate JavaScript expression on page or element", ("function",),
+          function="string", element="string", ref="string"),
+    _tool("browser_file_upload", "Upload one or multiple files", ("paths",), paths="array"),
+    _tool("browser_fill_form", "Fill multiple form fields", ("fields",), fields="array"),
+    _tool("browser_install", "Install the browser specified in the config. Call this if you get an "
+          "error about the browser not being installed."),
+    _tool("browser_press_key", "Press a key on the keyboard", ("key",), key="string"),
+    _tool("browser_type", "Type text into editable element", ("element", "ref", "text"),
+          element="string", ref="string", text="string", submit="boolean", slowly="boolean"),
+    _tool("browser_navigate", "Navigate to a URL", ("url",), url="string"),
+    _tool("browser_navigate_back", "Go back to the previous page"),
+    _tool("browser_network_requests", "Returns all network requests since loading the page"),
+    _tool("browser_take_screenshot", "Take a screenshot of the current page. You can't perform actions "
+          "based on the screenshot, use browser_snapshot for actions.",
+          type="string", filename="string", element="string", ref="string", fullPage="boolean"),
+    _tool("browser_snapshot", "Capture accessibility snapshot of the current page, this is better than "
+          "screenshot"),
+    _tool("browser_click", "Perform click on a web page", ("element", "ref"),
+          element="string", ref="string", doubleClick="boolean", button="string"),
+    _tool("browser_drag", "Perform drag and drop between two elements",
+          ("startElement", "startRef", "endElement", "endRef"),
+          startElement="string", startRef="string", endElement="string", endRef="string"),
+    _tool("browser_hover", "Hover over element on page", ("element", "ref"), element="string", ref="string"),
+    _tool("browser_select_option", "Select an option in a dropdown", ("element", "ref", "values"),
+          element="string", ref="string", values="array"),
+    _tool("browser_tabs", "List, create, close, or select a browser tab.", ("action",),
+          action="string", index="number"),
+    _tool("browser_wait_for", "Wait for text to appear or disappear or a specified time to pass",
+          time="number", text="string", textGone="string"),
+]
+
+GITHUB_TOOLS = [
+    _tool("get_me", "Get details of the authenticated GitHub user. Use this when a request includes "
+          "\"me\", \"my\". The output will not change unless the user changes their profile."),
+    _tool("search_repositories", "Search for GitHub repositories", ("query",),
+          query="string", page="number", perPage="number"),
+    _tool("create_repository", "Create a new GitHub repository in your account", ("name",),
+          name="string", description="string", private="boolean", autoInit="boolean"),
+    _tool("get_file_contents", "Get the contents of a file or directory from a GitHub repository",
+          ("owner", "repo", "path"), owner="string", repo="string", path="string", branch="string"),
+    _tool("create_or_update_file", "Create or update a single file in a GitHub repository",
+          ("owner", "repo", "path", "content", "message", "branch"), owner="string", repo="string",
+          path="string", content="string", message="string", branch="string", sha="string"),
+    _tool("push_files", "Push multiple files to a GitHub repository in a single commit",
+          ("owner", "repo", "branch", "files", "message"), owner="string", repo="string",
+          branch="string", files="array", message="string"),
+    _tool("create_branch", "Create a new branch in a GitHub repository", ("owner", "repo", "branch"),
+          owner="string", repo="string", branch="string", from_branch="string"),
+    _tool("list_branches", "List branches in a GitHub repository", ("owner", "repo"),
+          owner="string", repo="string", page="number", perPage="number"),
+    _tool("list_commits", "Get list of commits of a branch in a GitHub repository", ("owner", "repo"),
+          owner="string", repo="string", sha="string", page="number", perPage="number"),
+    _tool("get_commit", "Get details for a commit from a GitHub repository", ("owner", "repo", "sha"),
+          owner="string", repo="string", sha="string"),
+    _tool("list_issues", "List issues in a GitHub repository. Filter by state (open, closed), labels "
+          "and sort order.", ("owner", "repo"), owner="string", repo="string", state="string",
+          labels="array", sort="string", page="number", perPage="number"),
+    _tool("get_issue", "Get details of a specific issue in a GitHub repository.",
+          ("owner", "repo", "issue_number"), owner="string", repo="string", issue_number="number"),
+    _tool("create_issue", "Create a new issue in a GitHub repository.", ("owner", "repo", "title"),
+          owner="string", repo="string", title="string", body="string", labels="array"),
+    _tool("update_issue", "Update an existing issue in a GitHub repository.",
+          ("owner", "repo", "issue_number"), owner="string", repo="string", issue_number="number",
+          title="string", body="string", state="string"),
+    _tool("add_issue_comment", "Add a comment to a specific issue in a GitHub repository.",
+          ("owner", "repo", "issue_number", "body"), owner="string", repo="string",
+          issue_number="number", body="string"),
+    _tool("search_issues", "Search for issues in GitHub repositories.", ("query",),
+          query="string", sort="string", order="string"),
+    _tool("list_pull_requests", "List pull requests in a GitHub repository.", ("owner", "repo"),
+          owner="string", repo="string", state="string", base="string"),
+    _tool("get_pull_request", "Get details of a specific pull request in a GitHub repository.",
+          ("owner", "repo", "pullNumber"), owner="string", repo="string", pullNumber="number"),
+    _tool("create_pull_request", "Create a new pull request in a GitHub repository.",
+          ("owner", "repo", "title", "head", "base"), owner="string", repo="string", title="string",
+          body="string", head="string", base="string", draft="boolean"),
+    _tool("merge_pull_request", "Merge a pull request in a GitHub repository.",
+          ("owner", "repo", "pullNumber"), owner="string", repo="string", pullNumber="number",
+          merge_method="string"),
+    _tool("create_pull_request_review", "Create a review on a pull request.",
+          ("owner", "repo", "pullNumber", "event"), owner="string", repo="string",
+          pullNumber="number", body="string", event="string"),
+    _tool("search_code", "Search for code across GitHub repositories", ("q",), q="string", sort="string"),
+    _tool("search_users", "Search for GitHub users", ("q",), q="string", sort="string"),
+]
+
+FETCH_TOOLS = [
+    _tool("fetch", "Fetches a URL from the internet and optionally extracts its contents as markdown. "
+          "Grants you access to up-to-date information from the web.", ("url",),
+          url="string", max_length="integer", start_index="integer", raw="boolean"),
+]
+
+SEQUENTIAL_THINKING_TOOLS = [
+    _tool("sequentialthinking", "A detailed tool for dynamic and reflective problem-solving through "
+          "thoughts. Helps analyze problems through a flexible thinking process that can adapt and "
+          "evolve. Each thought can build on, question, or revise previous insights.",
+          ("thought", "nextThoughtNeeded", "thoughtNumber", "totalThoughts"), thought="string",
+          nextThoughtNeeded="boolean", thoughtNumber="integer", totalThoughts="integer",
+          isRevision="boolean", revisesThought="integer", branchFromThought="integer", branchId="string"),
+]
+
+CATALOG: Dict[str, List[MCPTool]] = {
+    "Filesystem Server": FILESYSTEM_TOOLS,
+    "Playwright Server": PLAYWRIGHT_TOOLS,
+    "GitHub Server": GITHUB_TOOLS,
+    "Fetch Server": FETCH_TOOLS,
+    "Sequential Thinking Server": SEQUENTIAL_THINKING_TOOLS,
+}
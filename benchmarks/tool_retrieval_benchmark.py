@@ -0,0 +1,229 @@
+"""
+Benchmark de la selección de herramientas por petición (BM25).
+
+Usa los prompts de run_demos.py contra el catálogo combinado de todos los
+servidores (filesystem, Playwright, GitHub, fetch y sequential thinking) y mide,
+para cada top-k, los tokens de esquema enviados frente al catálogo completo y
+el éxito de la selección: que las herramientas que necesita cada tarea sigan
+disponibles. Sin red por defecto (catálogo de benchmarks/tool_catalog.py).
+
+Con --live lanza los servidores reales y ejecuta cada prompt con y sin
+selección contra Azure OpenAI, comparando tokens de prompt y herramientas usadas.
+
+Uso:
+    uv run python benchmarks/tool_retrieval_benchmark.py --top-k 4 6 8 12
+    uv run python benchmarks/tool_retrieval_benchmark.py --top-k 8 --live --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Añadir el directorio padre al path para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from mcp.types import Tool as MCPTool
+
+from ai_agents.tool_retrieval import ToolRetriever
+from benchmarks.tool_catalog import CATALOG
+from servers.tool_filter import estimate_schema_tokens
+from utils.stats import summarize
+
+# (demo, prompt de run_demos.py, grupos de herramientas necesarias: al menos una de cada grupo).
+# None: la tarea pide el catálogo completo (inventario de herramientas).
+CASES: List[Tuple[str, str, Optional[List[List[str]]]]] = [
+    ("filesystem", "Read the files in `sample_files` folder, and list them.",
+     [["list_directory", "directory_tree", "list_directory_with_sizes"]]),
+    ("filesystem", "Create a simple Python program called 'demo_hello.py' in the sample_files folder. "
+     "The program should greet the user and ask for their name.", [["write_file"]]),
+    ("filesystem", "What is my #1 favorite book?",
+     [["read_text_file", "read_multiple_files"], ["list_directory", "search_files", "directory_tree"]]),
+    ("github", "Analiza mi perfil de GitHub. Muestra mis repositorios más recientes (últimos 5) y "
+     "estadísticas generales de actividad.", [["get_me"], ["search_repositories"]]),
+    ("github", "Revisa las issues abiertas en mis repositorios principales y proporciona un resumen "
+     "del estado actual.", [["list_issues", "search_issues"]]),
+    ("thinking", "Necesito diseñar una arquitectura de software para un sistema de e-commerce que maneje "
+     "alta concurrencia, tenga múltiples métodos de pago, y soporte internacionalización. Analiza esto "
+     "paso a paso considerando todos los aspectos técnicos y de negocio.", [["sequentialthinking"]]),
+    ("thinking", "Tengo un sistema Python con problemas de rendimiento. Los usuarios se quejan de lentitud "
+     "en las consultas de base de datos y la interfaz web. Analiza sistemáticamente las posibles causas "
+     "y soluciones, considerando tanto el backend como el frontend.", [["sequentialthinking"]]),
+    ("fetch", "Use your fetch tool to get data from https://httpbin.org/json and show me the response "
+     "structure.", [["fetch"]]),
+    ("fetch", "List your HTTP/API tools and capabilities briefly.", None),
+    ("playwright", "What web automation tools do you have? List them briefly with examples of what each "
+     "can do.", None),
+    ("combined", "What are all your capabilities? List both file system and web automation tools you "
+     "have available.", None),
+    ("tools", "What tools do you have available? Please list all your capabilities and what each tool "
+     "can do.", None),
+]
+
+
+def catalog_tools() -> List[MCPTool]:
+    """Catálogo combinado de todos los servidores de los demos."""
+    return [tool for tools in CATALOG.values() for tool in tools]
+
+
+def is_success(expected: Optional[List[List[str]]], available: Sequence[str], full_catalog: bool) -> bool:
+    """La tarea es resoluble si de cada grupo queda al menos una herramienta (o el catálogo, si lo pide)."""
+    if expected is None:
+        return full_catalog
+    return all(any(name in available for name in group) for group in expected)
+
+
+def evaluate(tools: List[MCPTool], top_k: int, pinned: Sequence[str] = ()) -> Dict[str, Any]:
+    """
+    Evalúa la selección offline para un top-k.
+
+    Returns:
+        dict: Tokens de esquema medios, reducción, tasa de éxito, latencia de consulta y detalle por caso
+    """
+    retriever = ToolRetriever(top_k=top_k, pinned=pinned)
+    tokens = {tool.name: estimate_schema_tokens(tool) for tool in tools}
+    full_tokens = sum(tokens.values())
+
+    started = time.perf_counter()
+    retriever.index_for(tools)
+    build_seconds = time.perf_counter() - started
+
+    cases, query_times = [], []
+    for demo, prompt, expected in CASES:
+        started = time.perf_counter()
+        selected = retriever.rank(tools, prompt)
+        query_times.append(time.perf_counter() - started)
+        full_catalog = selected is None
+        available = [tool.name for tool in tools] if full_catalog else selected
+        cases.append({
+            "demo": demo,
+            "prompt": prompt,
+            "tools": len(available),
+            "schema_tokens": sum(tokens[name] for name in available),
+            "full_catalog": full_catalog,
+            "success": is_success(expected, available, full_catalog),
+            "selected": available if not full_catalog else [],
+        })
+
+    sent = [case["schema_tokens"] for case in cases]
+    return {
+        "top_k": top_k,
+        "catalog_tools": len(tools),
+        "catalog_tokens": full_tokens,
+        "avg_schema_tokens": sum(sent) / len(sent),
+        "reduction": 1 - sum(sent) / (full_tokens * len(sent)),
+        "success_rate": sum(case["success"] for case in cases) / len(cases),
+        "fallbacks": sum(case["full_catalog"] for case in cases),
+        "index_build_ms": build_seconds * 1000,
+        "query": summarize(query_times),
+        "cases": cases,
+    }
+
+
+async def run_live(top_k: int) -> List[Dict[str, Any]]:
+    """
+    Ejecuta cada prompt contra el modelo con el catálogo completo y con selección.
+
+    Necesita Azure OpenAI configurado y Node.js/uvx para lanzar los servidores;
+    GitHub solo se incluye si GITHUB_TOKEN está definido.
+
+    Returns:
+        list[dict]: Tokens de prompt, herramientas llamadas y éxito por caso y modo
+    """
+    from agents import Runner
+
+    from ai_agents.agent_factory import AgentFactory
+    from servers.server_manager import ServerManager
+
+    configs = [
+        ServerManager.get_filesystem_server_config(),
+        ServerManager.get_playwright_server_config(),
+        ServerManager.get_fetch_server_config(),
+        ServerManager.get_sequential_thinking_server_config(),
+    ]
+    if os.getenv("GITHUB_TOKEN"):
+        configs.append(ServerManager.get_github_server_config())
+
+    results = []
+    async with ServerManager.create_servers(*configs) as servers:
+        agent = AgentFactory.create_base_agent(
+            "Benchmark Agent", "You are a helpful assistant. Use your tools when they help.", list(servers)
+        )
+        for demo, prompt, expected in CASES:
+            if demo == "github" and not os.getenv("GITHUB_TOKEN"):
+                continue
+            for mode in ("catálogo", "selección"):
+                AgentFactory.enable_tool_retrieval(mode == "selección", top_k=top_k)
+                run_agent = await AgentFactory.select_tools(agent, prompt)
+                try:
+                    result = await Runner.run(starting_agent=run_agent, input=prompt, max_turns=8)
+                except Exception as e:
+                    print(f"⚠️  {demo} ({mode}): {e}")
+                    results.append({"demo": demo, "mode": mode, "error": str(e), "success": False})
+                    continue
+                called = [item.raw_item.name for item in result.new_items if item.type == "tool_call_item"]
+                usage = result.context_wrapper.usage
+                results.append({
+                    "demo": demo,
+                    "mode": mode,
+                    "prompt_tokens": usage.input_tokens,
+                    "tools_called": called,
+                    # Las tareas de inventario no tienen herramientas esperadas
+                    "success": is_success(expected, called, True) if expected is not None else None,
+                })
+    AgentFactory.enable_tool_retrieval(False)
+    return results
+
+
+def print_results(results: List[Dict[str, Any]], live: Optional[List[Dict[str, Any]]] = None):
+    """Muestra la tabla por top-k, los casos fallidos y, si hay, la comparación en vivo."""
+    first = results[0]
+    print(f"\n📚 Catálogo combinado: {first['catalog_tools']} herramientas, "
+          f"~{first['catalog_tokens']} tokens de esquema por petición")
+    print("\n📊 Selección offline:")
+    for result in results:
+        print(f"   k={result['top_k']:<3} {result['avg_schema_tokens']:7.0f} tokens/petición "
+              f"({result['reduction'] * 100:5.1f}% menos)  éxito {result['success_rate'] * 100:5.1f}%  "
+              f"catálogo completo {result['fallbacks']}/{len(result['cases'])}  "
+              f"consulta p50 {result['query']['p50'] * 1e6:6.0f} µs  índice {result['index_build_ms']:.2f} ms")
+        for case in result["cases"]:
+            if not case["success"]:
+                print(f"      ❌ {case['demo']}: {case['prompt'][:60]}…")
+
+    if live:
+        print("\n🤖 Ejecución real (tokens de prompt de toda la ejecución):")
+        for entry in live:
+            if "error" in entry:
+                continue
+            status = {True: "✅", False: "❌", None: "  "}[entry["success"]]
+            print(f"   {status} {entry['demo']:<11} {entry['mode']:<10} {entry['prompt_tokens']:7d} tokens  "
+                  f"{', '.join(entry['tools_called']) or '-'}")
+
+
+async def main():
+    """Función principal del benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark de selección de herramientas con BM25")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[4, 6, 8, 12])
+    parser.add_argument("--pinned", nargs="*", default=[], help="Patrones de herramientas fijadas")
+    parser.add_argument("--live", action="store_true",
+                        help="Ejecutar también contra el modelo y los servidores reales (usa el primer top-k)")
+    parser.add_argument("--output", help="Fichero JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    tools = catalog_tools()
+    results = [evaluate(tools, top_k, args.pinned) for top_k in args.top_k]
+    live = await run_live(args.top_k[0]) if args.live else None
+    print_results(results, live)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"offline": results, "live": live}, indent=2,
+                                                ensure_ascii=False))
+        print(f"💾 Resultados guardados en {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -6,11 +6,53 @@ Punto de entrada central para todas las funcionalidades del proyecto.
 import asyncio
 import argparse
 import sys
+import time
+from contextlib import asynccontextmanager
 from typing import Optional
 
 from agents import Runner
 from ai_agents.agent_factory import AgentFactory
+from ai_agents.batch_runner import BatchOptions, load_prompts, run_batch
+from ai_agents.session_memory import SummarizingSession
+from ai_agents.streaming import run_streamed
 from servers.server_manager import ServerManager
+from servers.tool_filter import get_tool_filter_report
+from utils import close_azure_openai_clients, get_concurrency_limiters
+from utils.concurrency import limiters_prometheus
+
+
+# Activado con --stream: imprime tokens y herramientas según llegan
+STREAM_OUTPUT = False
+# Memoria del modo interactivo: id de sesión (None = nueva), turnos literales y tokens de historial
+SESSION_ID: Optional[str] = None
+MEMORY_TURNS = 6
+MEMORY_TOKENS = 4000
+# Activado con --lazy-playwright: en el modo combinado Playwright solo se lanza al usar el navegador
+LAZY_PLAYWRIGHT = False
+# Activado con --filter-tools: los agentes web y combinado usan los filtros predefinidos de AgentFactory
+FILTER_TOOLS = False
+
+
+def web_tool_filters():
+    """Filtros del agente web según --filter-tools (None = todas las herramientas)."""
+    return AgentFactory.WEB_AUTOMATION_TOOL_FILTERS if FILTER_TOOLS else None
+
+
+def combined_tool_filters():
+    """Filtros del agente combinado según --filter-tools (None = todas las herramientas)."""
+    return AgentFactory.COMBINED_TOOL_FILTERS if FILTER_TOOLS else None
+
+
+async def run_agent(agent, prompt: str, **run_kwargs):
+    """Ejecuta el agente e imprime la respuesta (en streaming si está activado)."""
+    agent = await AgentFactory.select_tools(agent, prompt)
+    if not STREAM_OUTPUT:
+        result = await Runner.run(starting_agent=agent, input=prompt, **run_kwargs)
+        print(result.final_output)
+        return result
+    result, timings = await run_streamed(agent, prompt, **run_kwargs)
+    print(f"⏱️  {timings}")
+    return result
 
 
 async def run_filesystem_demo():
@@ -22,27 +64,15 @@ async def run_filesystem_demo():
         
         # Listar archivos
         print("\n📋 Listando archivos en sample_files...")
-        result = await Runner.run(
-            starting_agent=agent, 
-            input="Read the files in `sample_files` folder, and list them."
-        )
-        print(result.final_output)
+        await run_agent(agent, "Read the files in `sample_files` folder, and list them.")
         
         # Crear un programa simple
         print("\n🔨 Creando un programa simple...")
-        result = await Runner.run(
-            starting_agent=agent,
-            input="Create a simple Python program called 'demo_hello.py' in the sample_files folder. The program should greet the user and ask for their name."
-        )
-        print(result.final_output)
+        await run_agent(agent, "Create a simple Python program called 'demo_hello.py' in the sample_files folder. The program should greet the user and ask for their name.")
         
         # Preguntar sobre libros favoritos
         print("\n📚 Preguntando sobre libros favoritos...")
-        result = await Runner.run(
-            starting_agent=agent,
-            input="What is my #1 favorite book?"
-        )
-        print(result.final_output)
+        await run_agent(agent, "What is my #1 favorite book?")
 
 
 async def run_github_demo():
@@ -58,19 +88,11 @@ async def run_github_demo():
             
             # Analizar perfil y repositorios
             print("\n👤 Analizando perfil de GitHub...")
-            result = await Runner.run(
-                starting_agent=agent,
-                input="Analiza mi perfil de GitHub. Muestra mis repositorios más recientes (últimos 5) y estadísticas generales de actividad."
-            )
-            print(result.final_output)
+            await run_agent(agent, "Analiza mi perfil de GitHub. Muestra mis repositorios más recientes (últimos 5) y estadísticas generales de actividad.")
             
             # Consultar issues abiertas
             print("\n🐛 Consultando issues abiertas...")
-            result = await Runner.run(
-                starting_agent=agent,
-                input="Revisa las issues abiertas en mis repositorios principales y proporciona un resumen del estado actual."
-            )
-            print(result.final_output)
+            await run_agent(agent, "Revisa las issues abiertas en mis repositorios principales y proporciona un resumen del estado actual.")
             
     except Exception as e:
         print(f"❌ Error en demo GitHub: {e}")
@@ -89,19 +111,11 @@ async def run_sequential_thinking_demo():
         
         # Problema complejo de análisis
         print("\n🧠 Analizando problema complejo paso a paso...")
-        result = await Runner.run(
-            starting_agent=agent,
-            input="Necesito diseñar una arquitectura de software para un sistema de e-commerce que maneje alta concurrencia, tenga múltiples métodos de pago, y soporte internacionalización. Analiza esto paso a paso considerando todos los aspectos técnicos y de negocio."
-        )
-        print(result.final_output)
+        await run_agent(agent, "Necesito diseñar una arquitectura de software para un sistema de e-commerce que maneje alta concurrencia, tenga múltiples métodos de pago, y soporte internacionalización. Analiza esto paso a paso considerando todos los aspectos técnicos y de negocio.")
         
         # Análisis de código estructurado
         print("\n🔍 Análisis estructurado de mejoras de código...")
-        result = await Runner.run(
-            starting_agent=agent,
-            input="Tengo un sistema Python con problemas de rendimiento. Los usuarios se quejan de lentitud en las consultas de base de datos y la interfaz web. Analiza sistemáticamente las posibles causas y soluciones, considerando tanto el backend como el frontend."
-        )
-        print(result.final_output)
+        await run_agent(agent, "Tengo un sistema Python con problemas de rendimiento. Los usuarios se quejan de lentitud en las consultas de base de datos y la interfaz web. Analiza sistemáticamente las posibles causas y soluciones, considerando tanto el backend como el frontend.")
 
 
 async def run_fetch_demo():
@@ -116,19 +130,11 @@ async def run_fetch_demo():
         
         # Test básico de herramientas
         print("\n🛠️ Verificando herramientas HTTP disponibles...")
-        result = await Runner.run(
-            starting_agent=agent,
-            input="List your HTTP/API tools and capabilities briefly."
-        )
-        print(result.final_output)
+        await run_agent(agent, "List your HTTP/API tools and capabilities briefly.")
         
         # Test de llamada HTTP simple
         print("\n🌐 Realizando llamada HTTP de prueba...")
-        result = await Runner.run(
-            starting_agent=agent,
-            input="Use your fetch tool to get data from https://httpbin.org/json and show me the response structure."
-        )
-        print(result.final_output)
+        await run_agent(agent, "Use your fetch tool to get data from https://httpbin.org/json and show me the response structure.")
 
 
 async def run_playwright_demo():
@@ -136,29 +142,44 @@ async def run_playwright_demo():
     print("🔧 Iniciando demo de Playwright...")
     
     async with ServerManager.create_playwright_server() as server:
-        agent = AgentFactory.create_web_automation_agent([server])
+        agent = AgentFactory.create_web_automation_agent([server], tool_filters=web_tool_filters())
         
         print("\n🤖 Preguntando al agente sobre sus herramientas web...")
-        result = await Runner.run(
-            starting_agent=agent,
-            input="What web automation tools do you have? List them briefly with examples of what each can do."
-        )
-        print(result.final_output)
+        await run_agent(agent, "What web automation tools do you have? List them briefly with examples of what each can do.")
+
+
+@asynccontextmanager
+async def combined_servers(supervised: bool = False):
+    """
+    Servidores filesystem y Playwright del modo combinado.
+    
+    Por defecto ambos arrancan en paralelo. Con --lazy-playwright, Playwright se
+    lanza solo cuando el agente usa el navegador y su listado se anuncia desde la
+    caché de herramientas (que se activa). La primera ejecución aún lo arranca
+    para obtener el listado y fija su versión en mcp_servers.lock.json; a partir
+    de la segunda el listado sale de disco.
+    """
+    fs_config = ServerManager.get_filesystem_server_config()
+    pw_config = ServerManager.get_playwright_server_config()
+    if not LAZY_PLAYWRIGHT:
+        async with ServerManager.create_servers(fs_config, pw_config, supervised=supervised) as servers:
+            yield servers
+        return
+    async with ServerManager.create_servers(fs_config, supervised=supervised) as (fs_server,), \
+            ServerManager.create_lazy_server(pw_config) as pw_server:
+        yield fs_server, pw_server
 
 
 async def run_combined_demo():
     """Ejecuta el demo combinado (filesystem + Playwright)."""
     print("🔧 Iniciando demo combinado...")
     
-    async with ServerManager.create_combined_servers() as (fs_server, pw_server):
-        agent = AgentFactory.create_combined_agent([fs_server, pw_server])
+    async with combined_servers() as (fs_server, pw_server):
+        agent = AgentFactory.create_combined_agent([fs_server, pw_server],
+                                                   tool_filters=combined_tool_filters())
         
         print("\n🤖 Preguntando sobre capacidades combinadas...")
-        result = await Runner.run(
-            starting_agent=agent,
-            input="What are all your capabilities? List both file system and web automation tools you have available."
-        )
-        print(result.final_output)
+        await run_agent(agent, "What are all your capabilities? List both file system and web automation tools you have available.")
 
 
 async def run_tool_inspection():
@@ -169,11 +190,7 @@ async def run_tool_inspection():
         agent = AgentFactory.create_tool_inspector_agent([server])
         
         print("\n🔍 Inspeccionando herramientas disponibles...")
-        result = await Runner.run(
-            starting_agent=agent,
-            input="What tools do you have available? Please list all your capabilities and what each tool can do."
-        )
-        print(result.final_output)
+        await run_agent(agent, "What tools do you have available? Please list all your capabilities and what each tool can do.")
 
 
 async def run_interactive_mode():
@@ -189,66 +206,137 @@ async def run_interactive_mode():
     
     choice = input("Selección (1-6): ").strip()
     
+    # Servidores supervisados: una caída del proceso no termina la sesión
     if choice == "1":
-        async with ServerManager.create_filesystem_server() as server:
+        async with ServerManager.create_servers(
+            ServerManager.get_filesystem_server_config(), supervised=True
+        ) as (server,):
             agent = AgentFactory.create_filesystem_agent([server])
             await interactive_chat(agent)
     elif choice == "2":
         async with ServerManager.create_playwright_server() as server:
-            agent = AgentFactory.create_web_automation_agent([server])
+            agent = AgentFactory.create_web_automation_agent([server], tool_filters=web_tool_filters())
             await interactive_chat(agent)
     elif choice == "3":
         try:
-            async with ServerManager.create_github_server() as server:
+            ServerManager.require_github_token()
+            async with ServerManager.create_servers(
+                ServerManager.get_github_server_config(), supervised=True
+            ) as (server,):
                 agent = AgentFactory.create_github_agent([server])
                 await interactive_chat(agent)
         except Exception as e:
             print(f"❌ Error configurando GitHub: {e}")
             print("💡 Asegúrate de tener configurado GITHUB_TOKEN en tu .env")
     elif choice == "4":
-        async with ServerManager.create_sequential_thinking_server() as server:
+        async with ServerManager.create_servers(
+            ServerManager.get_sequential_thinking_server_config(), supervised=True
+        ) as (server,):
             agent = AgentFactory.create_sequential_thinking_agent([server])
             await interactive_chat(agent)
     elif choice == "5":
-        async with ServerManager.create_fetch_server() as server:
+        async with ServerManager.create_servers(
+            ServerManager.get_fetch_server_config(), supervised=True
+        ) as (server,):
             agent = AgentFactory.create_fetch_agent([server])
             await interactive_chat(agent)
     elif choice == "6":
-        async with ServerManager.create_combined_servers() as (fs_server, pw_server):
-            agent = AgentFactory.create_combined_agent([fs_server, pw_server])
+        async with combined_servers(supervised=True) as (fs_server, pw_server):
+            agent = AgentFactory.create_combined_agent([fs_server, pw_server],
+                                                       tool_filters=combined_tool_filters())
             await interactive_chat(agent)
     else:
         print("❌ Selección inválida")
 
 
 async def interactive_chat(agent):
-    """Chat interactivo con el agente."""
+    """Chat interactivo con el agente, con memoria acotada de la conversación."""
+    session = SummarizingSession(
+        SESSION_ID or f"interactive-{time.strftime('%Y%m%d-%H%M%S')}",
+        keep_turns=MEMORY_TURNS,
+        max_context_tokens=MEMORY_TOKENS,
+    )
     print("\n💬 Modo interactivo iniciado. Escribe 'quit' para salir.")
+    print(f"🧠 Sesión '{session.session_id}' ('/memoria' para ver su estado, '/reset' para olvidarla)")
+    memory = session.describe()
+    if memory["turns"] or memory["summarized_turns"]:
+        print(f"   Reanudada: {memory['turns']} turnos recientes y {memory['summarized_turns']} resumidos")
     print("=" * 60)
     
-    while True:
-        try:
-            user_input = input("\n👤 Tu pregunta: ").strip()
-            if user_input.lower() in ['quit', 'exit', 'salir']:
-                break
-            
-            if not user_input:
-                continue
+    try:
+        while True:
+            try:
+                user_input = input("\n👤 Tu pregunta: ").strip()
+                if user_input.lower() in ['quit', 'exit', 'salir']:
+                    break
                 
-            print("\n🤖 Respuesta:")
-            print("-" * 40)
-            result = await Runner.run(starting_agent=agent, input=user_input)
-            print(result.final_output)
-            print("-" * 40)
-            
-        except KeyboardInterrupt:
-            break
-        except Exception as e:
-            print(f"❌ Error: {e}")
+                if not user_input:
+                    continue
+                
+                if user_input == "/memoria":
+                    print(f"🧠 {session.describe()}")
+                    continue
+                
+                if user_input == "/reset":
+                    await session.clear_session()
+                    print("🧹 Conversación olvidada")
+                    continue
+                    
+                print("\n🤖 Respuesta:")
+                print("-" * 40)
+                await run_agent(agent, user_input, session=session)
+                print("-" * 40)
+                
+            except KeyboardInterrupt:
+                break
+            except Exception as e:
+                print(f"❌ Error: {e}")
+    finally:
+        await session.close()
     
     print("\n👋 ¡Hasta luego!")
 
 
+# Agentes disponibles en modo lote: configuración del servidor y método del factory.
+# Playwright queda fuera: una única sesión de navegador no admite varias peticiones a la vez.
+BATCH_AGENTS = {
+    "filesystem": (ServerManager.get_filesystem_server_config, AgentFactory.create_filesystem_agent),
+    "fetch": (ServerManager.get_fetch_server_config, AgentFactory.create_fetch_agent),
+    "thinking": (ServerManager.get_sequential_thinking_server_config, AgentFactory.create_sequential_thinking_agent),
+    "github": (ServerManager.get_github_server_config, AgentFactory.create_github_agent),
+}
+
+
+async def run_batch_mode(args):
+    """
+    Ejecuta todos los prompts de un fichero JSONL contra un agente.
+    El servidor MCP se lanza una vez y se multiplexa entre los workers.
+    """
+    if not args.input:
+        raise ValueError("❌ ERROR: el modo batch necesita --input prompts.jsonl")
+    items = load_prompts(args.input)
+    output = args.output or f"{args.input.rsplit('.', 1)[0]}.results.jsonl"
+    get_config, create_agent = BATCH_AGENTS[args.agent]
+    options = BatchOptions(concurrency=args.concurrency, retries=args.retries, timeout=args.timeout)
+    print(f"📦 {len(items)} prompts contra el agente {args.agent} "
+          f"(concurrencia {options.concurrency}, {options.retries} reintentos)")
+    
+    async with ServerManager.create_multiplexed_server(get_config(), max_in_flight=options.concurrency) as mux:
+        report = await run_batch(
+            lambda worker: create_agent([mux.client(f"worker-{worker}")]),
+            items,
+            output=output,
+            options=options,
+            prepare_agent=AgentFactory.select_tools,
+        )
+    
+    print(f"\n📊 Lote: {report}")
+    if output != "-":
+        print(f"💾 Resultados en {output}")
+    if report.failed:
+        print(f"⚠️  {report.failed} prompts fallaron (ver 'error' en los resultados)")
+
+
 def print_help():
     """Imprime ayuda sobre los comandos disponibles."""
     print("""
@@ -294,8 +382,43 @@ COMANDOS:
                   • Selección de tipo de servidor
                   • Modo conversacional
                   
+  batch         - Ejecuta en paralelo los prompts de un fichero JSONL
+                  • --input prompts.jsonl (una línea {"id": ..., "prompt": ...})
+                  • Resultados en JSONL según terminan, con reintentos
+                  • Throughput y percentiles de latencia al final
+                  
+  prepare       - Instala localmente los servidores MCP y fija sus versiones
+                  • Evita `npx -y`/`uvx` y la consulta al registro en cada arranque
+                  • Genera mcp_servers.lock.json
+                  
   help          - Muestra esta ayuda
 
+OPCIONES:
+  --stream      - Imprime los tokens y las llamadas a herramientas según llegan
+                  y muestra el tiempo hasta el primer token y la primera herramienta
+  --metrics RUTA - Añade a RUTA (JSONL) tokens, latencia por turno y llamadas por
+                  servidor MCP de cada ejecución, y escribe RUTA.prom (Prometheus)
+  --cache       - Responde desde .cache/responses.sqlite los turnos ya vistos
+                  (sin llamar a Azure) y muestra la tasa de aciertos al final
+  --tool-top-k N - Envía al modelo solo las N herramientas más relevantes para
+                  cada petición (BM25 sobre nombres y descripciones)
+  --lazy-playwright - (combined, interactive 6) Lanza Playwright solo al usar el
+                  navegador en lugar de arrancarlo junto al filesystem
+  --filter-tools - (playwright, combined, interactive 2 y 6) Oculta al modelo las
+                  herramientas que el agente no usa (instalación del navegador,
+                  ratón por coordenadas, PDF...) y muestra al final cuáles se quitaron
+  --session ID  - (interactive) Reanuda o crea la sesión ID (.cache/sessions.sqlite)
+  --memory-turns N - (interactive) Turnos recientes enviados literales (6 por defecto);
+                  los anteriores se resumen
+  --memory-tokens N - (interactive) Tokens máximos de historial por pregunta (4000)
+  --input RUTA  - (batch) Fichero JSONL de prompts
+  --output RUTA - (batch) Fichero JSONL de resultados ("-" para stdout;
+                  por defecto RUTA_DE_ENTRADA.results.jsonl)
+  --agent TIPO  - (batch) filesystem, fetch, thinking o github (filesystem por defecto)
+  --concurrency N - (batch) Prompts en vuelo a la vez (8 por defecto)
+  --retries N   - (batch) Reintentos por prompt ante fallos transitorios (2 por defecto)
+  --timeout S   - (batch) Segundos máximos por intento
+
 EJEMPLOS:
   uv run python run_demos.py filesystem     # Demo seguro de archivos
   uv run python run_demos.py playwright     # Demo de automatización web
@@ -304,6 +427,13 @@ EJEMPLOS:
   uv run python run_demos.py fetch          # Demo de operaciones HTTP/API
   uv run python run_demos.py combined       # Demo combinado
   uv run python run_demos.py interactive    # Modo conversacional
+  uv run python run_demos.py prepare        # Instalar servidores MCP localmente
+  uv run python run_demos.py tools --cache  # Repetir la inspección sin coste de modelo
+  uv run python run_demos.py interactive --stream  # Chat con respuestas en streaming
+  uv run python run_demos.py interactive --session proyecto  # Retoma una conversación
+  uv run python run_demos.py combined --tool-top-k 6  # Menos esquemas por petición
+  uv run python run_demos.py combined --filter-tools  # Sin las herramientas que no usa
+  uv run python run_demos.py batch --input prompts.jsonl --concurrency 16  # Lote en paralelo
 
 REQUISITOS:
   - Node.js y npm instalados (para npx)
@@ -322,9 +452,90 @@ async def main():
     parser.add_argument(
         "demo",
         nargs="?",
-        choices=["filesystem", "playwright", "github", "thinking", "fetch", "combined", "tools", "interactive", "help"],
+        choices=["filesystem", "playwright", "github", "thinking", "fetch", "combined", "tools", "interactive", "batch", "prepare", "help"],
         help="Demo a ejecutar"
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Mostrar tokens y llamadas a herramientas según llegan"
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="RUTA",
+        help="Guardar métricas por ejecución en RUTA (JSONL) y un snapshot Prometheus en RUTA.prom"
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Cachear en disco las respuestas del modelo para turnos idénticos"
+    )
+    parser.add_argument(
+        "--session",
+        metavar="ID",
+        help="(interactive) Sesión a reanudar o crear"
+    )
+    parser.add_argument(
+        "--memory-turns",
+        type=int,
+        default=6,
+        help="(interactive) Turnos recientes que se envían literales"
+    )
+    parser.add_argument(
+        "--memory-tokens",
+        type=int,
+        default=4000,
+        help="(interactive) Tokens máximos de historial por pregunta"
+    )
+    parser.add_argument(
+        "--input",
+        metavar="RUTA",
+        help="(batch) Fichero JSONL de prompts"
+    )
+    parser.add_argument(
+        "--output",
+        metavar="RUTA",
+        help="(batch) Fichero JSONL de resultados"
+    )
+    parser.add_argument(
+        "--agent",
+        choices=sorted(BATCH_AGENTS),
+        default="filesystem",
+        help="(batch) Agente que atiende los prompts"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="(batch) Prompts en vuelo a la vez"
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=2,
+        help="(batch) Reintentos por prompt ante fallos transitorios"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="(batch) Segundos máximos por intento"
+    )
+    parser.add_argument(
+        "--tool-top-k",
+        type=int,
+        metavar="N",
+        help="Enviar solo las N herramientas MCP más relevantes para cada petición"
+    )
+    parser.add_argument(
+        "--lazy-playwright",
+        action="store_true",
+        help="(combined, interactive) Lanzar Playwright solo cuando el agente use el navegador"
+    )
+    parser.add_argument(
+        "--filter-tools",
+        action="store_true",
+        help="(playwright, combined, interactive) Ocultar las herramientas que el agente no usa"
+    )
     
     args = parser.parse_args()
     
@@ -332,6 +543,21 @@ async def main():
         print_help()
         return
     
+    if args.cache:
+        AgentFactory.enable_response_cache()
+    
+    if args.metrics:
+        AgentFactory.enable_instrumentation(jsonl_path=args.metrics)
+    
+    if args.tool_top_k:
+        AgentFactory.enable_tool_retrieval(top_k=args.tool_top_k)
+    
+    global STREAM_OUTPUT, SESSION_ID, MEMORY_TURNS, MEMORY_TOKENS, LAZY_PLAYWRIGHT, FILTER_TOOLS
+    STREAM_OUTPUT = args.stream
+    LAZY_PLAYWRIGHT = args.lazy_playwright
+    FILTER_TOOLS = args.filter_tools
+    SESSION_ID, MEMORY_TURNS, MEMORY_TOKENS = args.session, args.memory_turns, args.memory_tokens
+    
     try:
         print("🚀 AI Foundry Agents Samples")
         print("=" * 50)
@@ -352,6 +578,10 @@ async def main():
             await run_tool_inspection()
         elif args.demo == "interactive":
             await run_interactive_mode()
+        elif args.demo == "batch":
+            await run_batch_mode(args)
+        elif args.demo == "prepare":
+            ServerManager.prepare_servers()
             
         print("\n✅ Demo completado exitosamente")
         
@@ -361,6 +591,30 @@ async def main():
         print(f"\n❌ Error durante la ejecución: {e}")
         print(f"Tipo de error: {type(e).__name__}")
         sys.exit(1)
+    finally:
+        cache = AgentFactory.get_response_cache()
+        if cache is not None:
+            print(f"🗄️  Caché de respuestas: {cache.describe()}")
+        limiters = get_concurrency_limiters()
+        for key, limiter in limiters.items():
+            print(f"🎚️  Concurrencia adaptativa ({key}): {limiter.describe()}")
+        retriever = AgentFactory.get_tool_retriever()
+        if retriever is not None:
+            print(f"🔎 Selección de herramientas: {retriever.describe()}")
+        for report in get_tool_filter_report():
+            print(f"✂️  {report['agent']} / {report['server']}: {report['kept']}/{report['tools']} herramientas, "
+                  f"{report['kept_tokens']}/{report['schema_tokens']} tokens de esquema por petición "
+                  f"({report['saved_tokens']} ahorrados en {report['listings']} peticiones)")
+            if report["removed"]:
+                print(f"   sin: {', '.join(report['removed'])}")
+        metrics = AgentFactory.get_metrics()
+        if args.metrics and metrics is not None:
+            metrics.write_prometheus(f"{args.metrics}.prom",
+                                     extra=limiters_prometheus(limiters))
+            for agent, summary in metrics.summary().items():
+                print(f"📊 {agent}: {summary}")
+            print(f"📈 Métricas guardadas en {args.metrics} y {args.metrics}.prom")
+        await close_azure_openai_clients()
 
 
 if __name__ == "__main__":
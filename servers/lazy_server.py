@@ -0,0 +1,119 @@
+"""
+Servidor MCP de arranque diferido.
+Anuncia las herramientas desde la caché y solo lanza el proceso real cuando
+el agente llama a una de ellas.
+"""
+
+import asyncio
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from .server_pool import ServerHandle
+from .server_proxy import MCPServerProxy
+
+if TYPE_CHECKING:
+    from .server_manager import ServerConfig
+    from .tool_cache import ToolListCache
+
+
+class LazyMCPServer(MCPServerProxy):
+    """
+    Proxy que pospone el lanzamiento del servidor hasta su primer uso real.
+
+    - ``connect()`` no lanza nada.
+    - ``list_tools()`` responde desde la caché de herramientas; solo si no hay
+      entrada se lanza el servidor para obtener el listado.
+    - ``call_tool()`` y el resto de operaciones lanzan el servidor la primera vez.
+
+    Si la configuración no tiene versión (``@latest``), su listado solo se guarda
+    en memoria. Con ``pin_version``, tras el primer arranque se fija la versión
+    lanzada y el listado se guarda también bajo la configuración fijada, que es
+    la que usará el siguiente proceso.
+    """
+
+    def __init__(self, config: "ServerConfig", cache: Optional["ToolListCache"] = None,
+                 pin_version: Optional[Callable[["ServerConfig"], Optional["ServerConfig"]]] = None):
+        """
+        Args:
+            config: Configuración del servidor a lanzar bajo demanda
+            cache: Caché de herramientas desde la que anunciar el listado
+            pin_version: Función que fija la versión lanzada de una configuración
+                sin versión y retorna la configuración resultante (o None)
+        """
+        super().__init__(None)
+        self.config = config
+        self.cache = cache
+        self.pin_version = pin_version
+        self._pin_checked = False
+        self._handle: Optional[ServerHandle] = None
+        self._spawn_lock = asyncio.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.config.name
+
+    @property
+    def spawned(self) -> bool:
+        """Indica si el proceso real ya se lanzó."""
+        return self._handle is not None
+
+    async def _ensure_spawned(self):
+        if self._handle is not None:
+            return
+        async with self._spawn_lock:
+            if self._handle is not None:
+                return
+            print(f"🚀 Lanzando {self.name} bajo demanda...")
+            handle = ServerHandle(self.config)
+            await handle.start()
+            self.inner = handle.server
+            self._handle = handle
+            print(f"✅ {self.name} conectado ({handle.startup_seconds:.2f}s)")
+
+    async def connect(self):
+        """No lanza el proceso: eso ocurre en el primer uso."""
+
+    async def cleanup(self):
+        if self._handle is not None:
+            await self._handle.stop()
+            self._handle = None
+            self.inner = None
+
+    async def list_tools(self, run_context=None, agent=None):
+        if self._handle is None and self.cache is not None:
+            tools = self.cache.get(self.config)
+            if tools is not None:
+                return tools
+        # Sin entrada en caché hay que lanzar el servidor; si la caché está activa,
+        # create_server() ya lo envuelve en CachedToolsServer y el listado se guarda
+        await self._ensure_spawned()
+        tools = await self.inner.list_tools(run_context, agent)
+        self._persist_pinned(tools)
+        return tools
+
+    def _persist_pinned(self, tools):
+        """Guarda el listado bajo la configuración con la versión lanzada fijada (una vez)."""
+        if self._pin_checked or self.cache is None or self.pin_version is None:
+            return
+        self._pin_checked = True
+        if self.cache.is_persistent(self.config):
+            return
+        pinned = self.pin_version(self.config)
+        if pinned is not None and self.cache.is_persistent(pinned):
+            result = self.server_initialize_result
+            server_version = getattr(result.serverInfo, "version", None) if result is not None else None
+            self.cache.put(pinned, tools, server_version)
+            print(f"📌 {self.name} {pinned.package_version} fijado en el lockfile: "
+                  f"el próximo arranque anunciará sus herramientas desde disco")
+
+    async def call_tool(self, tool_name: str, arguments: Optional[dict[str, Any]],
+                        meta: Optional[dict[str, Any]] = None):
+        await self._ensure_spawned()
+        return await self.inner.call_tool(tool_name, arguments, meta)
+
+    async def list_prompts(self):
+        await self._ensure_spawned()
+        return await self.inner.list_prompts()
+
+    async def get_prompt(self, name: str, arguments: Optional[dict[str, Any]] = None):
+        await self._ensure_spawned()
+        return await self.inner.get_prompt(name, arguments)
@@ -0,0 +1,185 @@
+"""
+Multiplexado de un servidor MCP entre ejecuciones concurrentes.
+Varias llamadas a Runner.run comparten una única sesión MCP con un límite de
+peticiones en vuelo y una cola justa (round-robin) entre llamantes.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from agents.mcp import MCPServer
+
+from utils.stats import summarize
+
+from .server_proxy import MCPServerProxy
+
+T = TypeVar("T")
+
+
+class ServerMultiplexer:
+    """
+    Reparte una sesión MCP entre muchos llamantes.
+
+    Cada llamante (usuario, petición, ejecución...) obtiene su propia vista con
+    ``client(caller_id)``, que se pasa al agente como un servidor MCP normal.
+    Como mucho ``max_in_flight`` peticiones llegan al servidor a la vez; el resto
+    esperan en una cola por llamante y se despachan por turnos, de modo que un
+    llamante con muchas peticiones no bloquea a los demás.
+    """
+
+    def __init__(self, server: MCPServer, max_in_flight: int = 8, max_samples: int = 1000):
+        """
+        Args:
+            server: Servidor MCP ya conectado que se comparte
+            max_in_flight: Peticiones simultáneas máximas contra el servidor
+            max_samples: Muestras de espera que se guardan por llamante
+        """
+        if max_in_flight < 1:
+            raise ValueError("❌ ERROR: max_in_flight debe ser al menos 1")
+        self.server = server
+        self.max_in_flight = max_in_flight
+        self.max_samples = max_samples
+        self._in_flight = 0
+        self._queues: Dict[str, Deque[asyncio.Future]] = {}
+        self._turns: Deque[str] = deque()
+        self._waits: Dict[str, Deque[float]] = {}
+        self._requests: Dict[str, int] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Peticiones que se están ejecutando ahora mismo."""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Peticiones esperando turno."""
+        return sum(1 for queue in self._queues.values() for fut in queue if not fut.done())
+
+    def client(self, caller_id: str) -> "MultiplexedServer":
+        """
+        Retorna la vista del servidor para un llamante.
+
+        Args:
+            caller_id: Identificador del llamante (se usa para la cola justa y las métricas)
+
+        Returns:
+            MultiplexedServer: Servidor MCP que se puede pasar a un agente
+        """
+        return MultiplexedServer(self, caller_id)
+
+    async def _acquire(self, caller_id: str):
+        if self._in_flight < self.max_in_flight and not self._turns:
+            self._in_flight += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        queue = self._queues.setdefault(caller_id, deque())
+        if not queue:
+            self._turns.append(caller_id)
+        queue.append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            # Si el turno ya se había concedido, hay que liberarlo
+            if fut.done() and not fut.cancelled():
+                self._release()
+            raise
+
+    def _release(self):
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """Concede huecos libres a los llamantes por turnos."""
+        while self._in_flight < self.max_in_flight and self._turns:
+            caller_id = self._turns.popleft()
+            queue = self._queues[caller_id]
+            fut = queue.popleft()
+            if queue:
+                self._turns.append(caller_id)
+            else:
+                del self._queues[caller_id]
+            if fut.done():
+                continue
+            self._in_flight += 1
+            fut.set_result(None)
+
+    async def submit(self, caller_id: str, operation: Callable[[], Awaitable[T]]) -> T:
+        """
+        Ejecuta una operación sobre el servidor respetando el límite y la cola.
+
+        Args:
+            caller_id: Llamante que hace la petición
+            operation: Función sin argumentos que retorna la corrutina a ejecutar
+
+        Returns:
+            El resultado de la operación
+        """
+        queued_at = time.perf_counter()
+        await self._acquire(caller_id)
+        waits = self._waits.setdefault(caller_id, deque(maxlen=self.max_samples))
+        waits.append(time.perf_counter() - queued_at)
+        self._requests[caller_id] = self._requests.get(caller_id, 0) + 1
+        try:
+            return await operation()
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna el estado del multiplexor y la espera en cola de cada llamante.
+
+        Returns:
+            dict: in_flight, queued, max_in_flight y, por llamante, peticiones y
+            resumen (p50/p95/p99...) del tiempo de espera en segundos
+        """
+        return {
+            "in_flight": self._in_flight,
+            "queued": self.queue_depth,
+            "max_in_flight": self.max_in_flight,
+            "callers": {
+                caller_id: {"requests": self._requests.get(caller_id, 0),
+                            "queue_wait": summarize(list(waits))}
+                for caller_id, waits in self._waits.items()
+            },
+        }
+
+
+class MultiplexedServer(MCPServerProxy):
+    """
+    Vista de un llamante sobre un ServerMultiplexer.
+
+    connect y cleanup no hacen nada: el ciclo de vida del proceso lo gestiona
+    quien creó el multiplexor.
+    """
+
+    def __init__(self, multiplexer: ServerMultiplexer, caller_id: str):
+        super().__init__(multiplexer.server)
+        self.multiplexer = multiplexer
+        self.caller_id = caller_id
+
+    async def connect(self):
+        pass
+
+    async def cleanup(self):
+        pass
+
+    async def list_tools(self, run_context=None, agent=None):
+        return await self.multiplexer.submit(
+            self.caller_id, lambda: self.inner.list_tools(run_context, agent)
+        )
+
+    async def call_tool(self, tool_name: str, arguments: Optional[dict[str, Any]],
+                        meta: Optional[dict[str, Any]] = None):
+        return await self.multiplexer.submit(
+            self.caller_id, lambda: self.inner.call_tool(tool_name, arguments, meta)
+        )
+
+    async def list_prompts(self):
+        return await self.multiplexer.submit(self.caller_id, self.inner.list_prompts)
+
+    async def get_prompt(self, name: str, arguments: Optional[dict[str, Any]] = None):
+        return await self.multiplexer.submit(
+            self.caller_id, lambda: self.inner.get_prompt(name, arguments)
+        )
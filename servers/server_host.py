@@ -0,0 +1,172 @@
+"""
+Host de servidores MCP por red.
+Lanza una sola vez un servidor configurado (por stdio) y lo expone en un puerto
+local por streamable HTTP o SSE, para que varios procesos de agentes compartan
+la misma instancia caliente.
+
+Uso:
+    uv run python -m servers.server_host playwright --port 8931
+    MCP_PLAYWRIGHT_URL=http://127.0.0.1:8931/mcp uv run python run_demos.py playwright
+"""
+
+import argparse
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+import uvicorn
+from mcp import types
+from mcp.server.lowlevel import Server
+from mcp.server.sse import SseServerTransport
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+
+from .server_manager import ServerConfig, ServerManager
+from .server_pool import ServerHandle
+
+
+SERVER_CONFIGS = {
+    "filesystem": ServerManager.get_filesystem_server_config,
+    "playwright": ServerManager.get_playwright_server_config,
+    "github": ServerManager.get_github_server_config,
+    "thinking": ServerManager.get_sequential_thinking_server_config,
+    "fetch": ServerManager.get_fetch_server_config,
+}
+
+DEFAULT_PORTS = {
+    "filesystem": 8930,
+    "playwright": 8931,
+    "github": 8932,
+    "thinking": 8933,
+    "fetch": 8934,
+}
+
+
+def build_bridge(upstream: Any, name: str) -> Server:
+    """
+    Crea un servidor MCP que reenvía herramientas y prompts a otro servidor ya conectado.
+
+    Todas las sesiones de red comparten la misma sesión con el proceso real.
+
+    Args:
+        upstream: Servidor MCP conectado (p. ej. ServerHandle.server)
+        name: Nombre anunciado en el handshake
+
+    Returns:
+        Server: Servidor MCP de bajo nivel listo para montar en un transporte
+    """
+    bridge = Server(name)
+
+    @bridge.list_tools()
+    async def list_tools() -> list[types.Tool]:
+        return await upstream.list_tools()
+
+    # El servidor real ya valida los argumentos
+    @bridge.call_tool(validate_input=False)
+    async def call_tool(tool_name: str, arguments: Dict[str, Any]) -> types.CallToolResult:
+        return await upstream.call_tool(tool_name, arguments)
+
+    @bridge.list_prompts()
+    async def list_prompts() -> list[types.Prompt]:
+        return (await upstream.list_prompts()).prompts
+
+    @bridge.get_prompt()
+    async def get_prompt(prompt_name: str, arguments: Optional[Dict[str, str]]) -> types.GetPromptResult:
+        return await upstream.get_prompt(prompt_name, arguments)
+
+    return bridge
+
+
+class _StreamableHTTPEndpoint:
+    """Adaptador ASGI para montar el session manager en una ruta exacta (/mcp)."""
+
+    def __init__(self, manager: StreamableHTTPSessionManager):
+        self.manager = manager
+
+    async def __call__(self, scope, receive, send):
+        await self.manager.handle_request(scope, receive, send)
+
+
+def build_app(bridge: Server, transport: str = "streamable_http") -> Starlette:
+    """
+    Construye la aplicación ASGI que expone el servidor.
+
+    - streamable_http: endpoint en ``/mcp``
+    - sse: stream en ``/sse`` y mensajes en ``/messages/``
+    """
+    if transport == "sse":
+        sse = SseServerTransport("/messages/")
+
+        async def handle_sse(request):
+            async with sse.connect_sse(request.scope, request.receive, request._send) as (read, write):
+                await bridge.run(read, write, bridge.create_initialization_options())
+            return Response()
+
+        return Starlette(routes=[
+            Route("/sse", endpoint=handle_sse, methods=["GET"]),
+            Mount("/messages/", app=sse.handle_post_message),
+        ])
+
+    manager = StreamableHTTPSessionManager(app=bridge)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        async with manager.run():
+            yield
+
+    return Starlette(routes=[Route("/mcp", endpoint=_StreamableHTTPEndpoint(manager))],
+                     lifespan=lifespan)
+
+
+def endpoint_url(host: str, port: int, transport: str) -> str:
+    """URL a la que deben conectarse los clientes."""
+    return f"http://{host}:{port}/{'sse' if transport == 'sse' else 'mcp'}"
+
+
+async def host_server(config: ServerConfig, host: str = "127.0.0.1", port: int = 8931,
+                      transport: str = "streamable_http"):
+    """
+    Lanza el servidor por stdio y lo sirve por red hasta que se cancele.
+
+    Args:
+        config: Configuración stdio del servidor a compartir
+        host: Interfaz en la que escuchar
+        port: Puerto local
+        transport: "streamable_http" o "sse"
+    """
+    handle = ServerHandle(config)
+    await handle.start()
+    print(f"✅ {config.name} conectado ({handle.startup_seconds:.2f}s)")
+    try:
+        app = build_app(build_bridge(handle.server, config.name), transport)
+        server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+        print(f"🌐 {config.name} disponible en {endpoint_url(host, port, transport)}")
+        await server.serve()
+    finally:
+        await handle.stop()
+
+
+async def main():
+    """Función principal del host."""
+    parser = argparse.ArgumentParser(description="Expone un servidor MCP por red")
+    parser.add_argument("server", choices=sorted(SERVER_CONFIGS))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="Puerto local (por defecto uno fijo por servidor)")
+    parser.add_argument("--transport", choices=["streamable_http", "sse"], default="streamable_http")
+    args = parser.parse_args()
+
+    # El host siempre lanza el proceso real, aunque MCP_<SERVER>_URL apunte a él mismo
+    ServerManager.use_remote_servers(False)
+    if args.server == "github":
+        ServerManager.require_github_token()
+    config = SERVER_CONFIGS[args.server]()
+    port = args.port or DEFAULT_PORTS[args.server]
+
+    print(f"💡 En los workers: MCP_{args.server.upper()}_URL={endpoint_url(args.host, port, args.transport)}")
+    await host_server(config, args.host, port, args.transport)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,274 @@
+"""
+Instalación local y fijado de versiones de los servidores MCP.
+Evita que npx/uvx resuelvan el registro en cada arranque: los paquetes se
+instalan una sola vez en .mcp_servers/ y las versiones quedan en un lockfile.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    from .server_manager import ServerConfig
+
+
+PROJECT_DIR = Path(__file__).parent.parent
+DEFAULT_INSTALL_DIR = PROJECT_DIR / ".mcp_servers"
+DEFAULT_LOCK_FILE = PROJECT_DIR / "mcp_servers.lock.json"
+
+
+class PackageSpec(NamedTuple):
+    """Paquete lanzado por una configuración npx/uvx."""
+
+    ecosystem: str          # "npm" o "pypi"
+    name: str
+    requested_version: Optional[str]
+    extra_args: List[str]
+
+
+def parse_package_spec(config: "ServerConfig") -> Optional[PackageSpec]:
+    """
+    Extrae el paquete, la versión pedida y los argumentos extra de una configuración.
+
+    Args:
+        config: Configuración basada en npx o uvx
+
+    Returns:
+        PackageSpec | None: None si la configuración no usa npx ni uvx
+    """
+    command = Path(config.command).name
+    if command not in ("npx", "uvx"):
+        return None
+
+    args = list(config.args)
+    index = next((i for i, arg in enumerate(args) if not arg.startswith("-")), None)
+    if index is None:
+        return None
+    spec, extra_args = args[index], args[index + 1:]
+
+    if command == "npx":
+        name, sep, version = spec.rpartition("@")
+        if not (sep and name):
+            name, version = spec, None
+        return PackageSpec("npm", name, None if version == "latest" else version, extra_args)
+
+    name, _, version = spec.partition("==")
+    return PackageSpec("pypi", name, version or None, extra_args)
+
+
+class ServerInstaller:
+    """
+    Instala paquetes de servidores MCP en un directorio local del proyecto.
+
+    - Paquetes npm: ``npm install --prefix .mcp_servers/node``
+    - Paquetes PyPI: entorno virtual en ``.mcp_servers/python``
+
+    Las versiones instaladas se guardan en ``mcp_servers.lock.json`` para que
+    todas las máquinas lancen exactamente lo mismo.
+    """
+
+    def __init__(self, install_dir: Optional[Path] = None, lock_file: Optional[Path] = None):
+        self.install_dir = Path(install_dir) if install_dir else DEFAULT_INSTALL_DIR
+        self.lock_file = Path(lock_file) if lock_file else DEFAULT_LOCK_FILE
+        self._lock: Optional[Dict[str, Dict[str, str]]] = None
+
+    @property
+    def node_dir(self) -> Path:
+        return self.install_dir / "node"
+
+    @property
+    def python_dir(self) -> Path:
+        return self.install_dir / "python"
+
+    def load_lock(self) -> Dict[str, Dict[str, str]]:
+        """Carga el lockfile de versiones ({"npm": {...}, "pypi": {...}})."""
+        if self._lock is None:
+            self._lock = {"npm": {}, "pypi": {}}
+            if self.lock_file.exists():
+                data = json.loads(self.lock_file.read_text(encoding="utf-8"))
+                self._lock.update({k: dict(v) for k, v in data.items()})
+        return self._lock
+
+    def _save_lock(self):
+        lock = self.load_lock()
+        self.lock_file.write_text(json.dumps(lock, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+    def locked_version(self, spec: PackageSpec) -> Optional[str]:
+        """Versión fijada en el lockfile para un paquete."""
+        return self.load_lock().get(spec.ecosystem, {}).get(spec.name)
+
+    def _npm_bin(self, package: str) -> Optional[Path]:
+        """Ruta del ejecutable declarado en package.json de un paquete instalado."""
+        package_json = self.node_dir / "node_modules" / package / "package.json"
+        if not package_json.exists():
+            return None
+        bin_field = json.loads(package_json.read_text(encoding="utf-8")).get("bin")
+        if isinstance(bin_field, str):
+            bin_name = package.split("/")[-1]
+        elif isinstance(bin_field, dict) and bin_field:
+            bin_name = next(iter(bin_field))
+        else:
+            return None
+        path = self.node_dir / "node_modules" / ".bin" / bin_name
+        return path if path.exists() else None
+
+    def _npm_installed_version(self, package: str) -> Optional[str]:
+        package_json = self.node_dir / "node_modules" / package / "package.json"
+        if not package_json.exists():
+            return None
+        return json.loads(package_json.read_text(encoding="utf-8")).get("version")
+
+    def _venv_bin(self, name: str) -> Path:
+        scripts = "Scripts" if os.name == "nt" else "bin"
+        suffix = ".exe" if os.name == "nt" else ""
+        return self.python_dir / scripts / f"{name}{suffix}"
+
+    def _pypi_installed_version(self, package: str) -> Optional[str]:
+        python = self._venv_bin("python")
+        if not python.exists():
+            return None
+        result = subprocess.run(
+            [str(python), "-c", f"import importlib.metadata as m; print(m.version({package!r}))"],
+            capture_output=True, text=True,
+        )
+        return result.stdout.strip() or None
+
+    def resolve(self, config: "ServerConfig") -> "ServerConfig":
+        """
+        Sustituye el lanzamiento vía npx/uvx por el binario instalado localmente.
+
+        Si el paquete no está instalado pero tiene versión fijada en el lockfile,
+        se sigue usando npx/uvx pero con esa versión exacta (sin ``@latest``).
+
+        Args:
+            config: Configuración original
+
+        Returns:
+            ServerConfig: Configuración resuelta (o la original si no aplica)
+        """
+        from .server_manager import ServerConfig
+
+        spec = parse_package_spec(config)
+        if spec is None:
+            return config
+        version = self.locked_version(spec)
+
+        if spec.ecosystem == "npm":
+            binary = self._npm_bin(spec.name)
+        else:
+            binary = self._venv_bin(spec.name)
+            binary = binary if binary.exists() else None
+
+        if binary is not None and version:
+            return ServerConfig(config.name, str(binary), spec.extra_args,
+                                env=config.env, version=version, timeout=config.timeout)
+        if version:
+            pinned = f"{spec.name}@{version}" if spec.ecosystem == "npm" else f"{spec.name}=={version}"
+            args = (["-y"] if spec.ecosystem == "npm" else []) + [pinned] + spec.extra_args
+            return ServerConfig(config.name, config.command, args,
+                                env=config.env, version=version, timeout=config.timeout)
+        return config
+
+    @staticmethod
+    def _npx_cached_version(package: str) -> Optional[str]:
+        """Versión de un paquete en la caché de npx (la más reciente que se ejecutó)."""
+        cache_dir = os.getenv("npm_config_cache")
+        if not cache_dir:
+            local_app_data = os.getenv("LOCALAPPDATA")
+            cache_dir = (Path(local_app_data) / "npm-cache" if os.name == "nt" and local_app_data
+                         else Path.home() / ".npm")
+        candidates = list(Path(cache_dir).glob(f"_npx/*/node_modules/{package}/package.json"))
+        if not candidates:
+            return None
+        newest = max(candidates, key=lambda path: path.stat().st_mtime)
+        try:
+            return json.loads(newest.read_text(encoding="utf-8")).get("version")
+        except (OSError, ValueError):
+            return None
+
+    def pin_version(self, config: "ServerConfig") -> Optional["ServerConfig"]:
+        """
+        Fija en el lockfile la versión que npx resolvió para un paquete sin versión (``@latest``).
+
+        Los siguientes procesos lanzan exactamente esa versión, así que su listado
+        de herramientas puede guardarse en disco. Solo aplica a paquetes npm que
+        aún no tienen versión fijada.
+
+        Args:
+            config: Configuración basada en npx que ya se ha lanzado
+
+        Returns:
+            ServerConfig | None: La configuración resuelta con la versión fijada, o
+                None si no aplica o npx no dejó el paquete en su caché
+        """
+        spec = parse_package_spec(config)
+        if spec is None or spec.ecosystem != "npm" or self.locked_version(spec):
+            return None
+        version = spec.requested_version or self._npx_cached_version(spec.name)
+        if not version:
+            return None
+        self.load_lock()["npm"][spec.name] = version
+        self._save_lock()
+        return self.resolve(config)
+
+    def install(self, configs: Iterable["ServerConfig"], upgrade: bool = False) -> Dict[str, str]:
+        """
+        Instala localmente los paquetes de las configuraciones y actualiza el lockfile.
+
+        Args:
+            configs: Configuraciones basadas en npx/uvx
+            upgrade: Si ignorar las versiones fijadas e instalar la última disponible
+
+        Returns:
+            dict: Paquete -> versión instalada
+        """
+        specs = [spec for spec in map(parse_package_spec, configs) if spec is not None]
+        npm_specs = {spec.name: spec for spec in specs if spec.ecosystem == "npm"}
+        pypi_specs = {spec.name: spec for spec in specs if spec.ecosystem == "pypi"}
+        lock = self.load_lock()
+        installed: Dict[str, str] = {}
+
+        def target(spec: PackageSpec) -> Optional[str]:
+            if upgrade:
+                return spec.requested_version
+            return self.locked_version(spec) or spec.requested_version
+
+        if npm_specs:
+            if not shutil.which("npm"):
+                raise RuntimeError("❌ ERROR: npm no está instalado. Se necesita Node.js y npm.")
+            self.node_dir.mkdir(parents=True, exist_ok=True)
+            packages = [f"{name}@{target(spec) or 'latest'}" for name, spec in npm_specs.items()]
+            print(f"📦 npm install {' '.join(packages)}")
+            subprocess.run(
+                ["npm", "install", "--prefix", str(self.node_dir), "--save-exact",
+                 "--no-audit", "--no-fund", *packages],
+                check=True,
+            )
+            for name in npm_specs:
+                version = self._npm_installed_version(name)
+                if version:
+                    lock["npm"][name] = installed[name] = version
+
+        if pypi_specs:
+            if not self._venv_bin("python").exists():
+                print(f"🐍 Creando entorno virtual en {self.python_dir}")
+                subprocess.run([sys.executable, "-m", "venv", str(self.python_dir)], check=True)
+            packages = [f"{name}=={v}" if (v := target(spec)) else name
+                        for name, spec in pypi_specs.items()]
+            print(f"📦 pip install {' '.join(packages)}")
+            subprocess.run(
+                [str(self._venv_bin("python")), "-m", "pip", "install", "--quiet",
+                 *(["--upgrade"] if upgrade else []), *packages],
+                check=True,
+            )
+            for name in pypi_specs:
+                version = self._pypi_installed_version(name)
+                if version:
+                    lock["pypi"][name] = installed[name] = version
+
+        self._save_lock()
+        return installed
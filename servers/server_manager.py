@@ -3,25 +3,178 @@ Server manager for MCP servers.
 Centraliza la configuración y creación de diferentes tipos de servidores MCP.
 """
 
+import asyncio
+import hashlib
+import json
 import os
 import shutil
+import time
 from typing import Dict, Any, Optional
-from agents.mcp import MCPServerStdio
+from pathlib import Path
+from agents.mcp import MCPServer, MCPServerSse, MCPServerStdio, MCPServerStreamableHttp
 from contextlib import asynccontextmanager
 
+from .lazy_server import LazyMCPServer
+from .multiplexer import ServerMultiplexer
+from .server_installer import ServerInstaller
+from .server_pool import ServerHandle, ServerPool, race_handles, start_handles
+from .supervisor import SupervisedServer
+from .tool_cache import CachedToolsServer, ToolListCache
+from utils.settings import get_settings
+
+
+SERVER_STATE_FILE = Path(__file__).parent.parent / ".cache" / "server_state.json"
+
+TRANSPORTS = ("stdio", "streamable_http", "sse")
+
 
 class ServerConfig:
-    """Configuración base para servidores MCP."""
+    """
+    Configuración base para servidores MCP.
+    
+    Por defecto describe un proceso que se lanza por stdio. Con
+    ``transport="streamable_http"`` o ``transport="sse"`` describe en cambio un
+    servidor que ya está en marcha y al que se conecta por ``url``.
+    """
     
-    def __init__(self, name: str, command: str, args: list[str]):
+    def __init__(self, name: str, command: str, args: list[str],
+                 env: Optional[Dict[str, str]] = None,
+                 version: Optional[str] = None,
+                 timeout: Optional[float] = None,
+                 transport: str = "stdio",
+                 url: Optional[str] = None,
+                 headers: Optional[Dict[str, str]] = None):
+        if transport not in TRANSPORTS:
+            raise ValueError(f"❌ ERROR: transporte MCP desconocido: {transport}")
+        if transport != "stdio" and not url:
+            raise ValueError(f"❌ ERROR: el transporte {transport} necesita una url")
         self.name = name
         self.command = command
         self.args = args
+        self.env = env
+        self.version = version
+        self.timeout = timeout
+        self.transport = transport
+        self.url = url
+        self.headers = headers
+    
+    @classmethod
+    def remote(cls, name: str, url: str, transport: Optional[str] = None,
+               headers: Optional[Dict[str, str]] = None,
+               timeout: Optional[float] = None) -> "ServerConfig":
+        """
+        Crea la configuración de un servidor ya en marcha accesible por red.
+        
+        Args:
+            name: Nombre del servidor
+            url: URL del endpoint MCP (p. ej. http://127.0.0.1:8931/mcp)
+            transport: "streamable_http" o "sse"; si es None se deduce de la URL
+                (las que terminan en /sse usan SSE)
+            headers: Cabeceras HTTP adicionales (p. ej. autenticación)
+            timeout: Timeout de las peticiones de la sesión MCP
+            
+        Returns:
+            ServerConfig: Configuración remota
+        """
+        if transport is None:
+            transport = "sse" if url.rstrip("/").endswith("/sse") else "streamable_http"
+        return cls(name, command="", args=[], timeout=timeout,
+                   transport=transport, url=url, headers=headers)
+    
+    @property
+    def is_remote(self) -> bool:
+        """Indica si el servidor se alcanza por red en lugar de lanzarse por stdio."""
+        return self.transport != "stdio"
+    
+    @property
+    def package_spec(self) -> Optional[str]:
+        """Paquete lanzado por npx/uvx (primer argumento que no es un flag)."""
+        return next((arg for arg in self.args if not arg.startswith("-")), None)
+    
+    @property
+    def package_version(self) -> Optional[str]:
+        """
+        Versión del paquete del servidor.
+        
+        Usa la versión explícita si existe; si no, la extrae del spec
+        (por ejemplo ``@playwright/mcp@0.0.37`` o ``mcp-server-fetch==2025.4.7``).
+        """
+        if self.version:
+            return self.version
+        spec = self.package_spec
+        if not spec:
+            return None
+        if "==" in spec:
+            return spec.split("==", 1)[1]
+        name, sep, version = spec.rpartition("@")
+        if sep and name and version != "latest":
+            return version
+        return None
+    
+    def to_params(self) -> Dict[str, Any]:
+        """Retorna los parámetros de lanzamiento para MCPServerStdio."""
+        params: Dict[str, Any] = {
+            "command": self.command,
+            "args": self.args,
+        }
+        if self.env:
+            params["env"] = self.env
+        return params
+    
+    def create_server(self) -> MCPServer:
+        """
+        Crea (sin conectar) el servidor MCP descrito por esta configuración.
+        
+        Si la caché de herramientas de ServerManager está activa, el servidor
+        se envuelve para resolver list_tools desde ella.
+        """
+        options: Dict[str, Any] = {}
+        if self.timeout is not None:
+            options["client_session_timeout_seconds"] = self.timeout
+        if self.transport == "stdio":
+            server = MCPServerStdio(name=self.name, params=self.to_params(), **options)
+        else:
+            params: Dict[str, Any] = {"url": self.url}
+            if self.headers:
+                params["headers"] = self.headers
+            server_class = MCPServerSse if self.transport == "sse" else MCPServerStreamableHttp
+            server = server_class(name=self.name, params=params, **options)
+        cache = ServerManager.get_tool_cache()
+        if cache is not None:
+            return CachedToolsServer(server, self, cache)
+        return server
+    
+    def fingerprint(self) -> str:
+        """
+        Hash estable de la configuración, usado como clave en pools y caches.
+        
+        Del entorno solo entran los nombres de las variables: sus valores suelen
+        ser secretos (GITHUB_TOKEN) y no deben acabar, ni siquiera hasheados, en
+        .cache/, ni invalidar las claves al rotarlos.
+        
+        Returns:
+            str: Hash SHA-256 (hex) de comando, argumentos, variables de entorno y endpoint
+        """
+        payload = json.dumps(
+            {"command": self.command, "args": self.args, "env": sorted(self.env or {}),
+             "transport": self.transport, "url": self.url},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
 
 class ServerManager:
     """Gestor centralizado para servidores MCP."""
     
+    _server_pool: Optional[ServerPool] = None
+    _tool_cache: Optional[ToolListCache] = None
+    _tool_cache_enabled: Optional[bool] = None
+    _installer: Optional[ServerInstaller] = None
+    _use_installed: Optional[bool] = None
+    _use_remote: bool = True
+    _remote_urls: Dict[str, str] = {}
+    last_startup_times: Dict[str, float] = {}
+    
     @staticmethod
     def _check_npx_available():
         """Verifica que npx esté disponible."""
@@ -29,6 +182,110 @@ class ServerManager:
             raise RuntimeError("❌ ERROR: npx no está instalado. Se necesita Node.js y npm.")
         print("✅ npx encontrado")
     
+    @staticmethod
+    def require_github_token() -> str:
+        """
+        Verifica que GITHUB_TOKEN esté configurado.
+        
+        Returns:
+            str: El token de GitHub
+        """
+        github_token = os.getenv("GITHUB_TOKEN")
+        if not github_token:
+            raise RuntimeError("❌ ERROR: GITHUB_TOKEN no está configurado en las variables de entorno.")
+        return github_token
+    
+    @staticmethod
+    def get_server_installer() -> ServerInstaller:
+        """Retorna el instalador local de paquetes de servidores MCP."""
+        if ServerManager._installer is None:
+            ServerManager._installer = ServerInstaller()
+        return ServerManager._installer
+    
+    @staticmethod
+    def use_installed_servers(enabled: bool = True):
+        """
+        Activa o desactiva el uso de los binarios instalados con prepare_servers().
+        
+        También se puede desactivar con la variable de entorno MCP_USE_INSTALLED=0.
+        """
+        ServerManager._use_installed = enabled
+    
+    @staticmethod
+    def _resolve_installed(config: ServerConfig) -> ServerConfig:
+        """Usa el binario instalado con prepare_servers() o la versión fijada, si existen."""
+        use_installed = ServerManager._use_installed
+        if use_installed is None:
+            use_installed = get_settings().mcp_use_installed
+        if not use_installed:
+            return config
+        return ServerManager.get_server_installer().resolve(config)
+    
+    @staticmethod
+    def use_remote_server(key: str, url: Optional[str]):
+        """
+        Conecta un servidor conocido a una instancia ya en marcha en lugar de lanzarlo.
+        
+        Equivale a definir la variable de entorno ``MCP_<KEY>_URL``
+        (p. ej. ``MCP_PLAYWRIGHT_URL=http://127.0.0.1:8931/mcp``).
+        
+        Args:
+            key: filesystem, playwright, github, thinking o fetch
+            url: URL del endpoint MCP, o None para volver a lanzarlo por stdio
+        """
+        if url:
+            ServerManager._remote_urls[key] = url
+        else:
+            ServerManager._remote_urls.pop(key, None)
+    
+    @staticmethod
+    def use_remote_servers(enabled: bool = True):
+        """Activa o desactiva globalmente las URLs remotas configuradas."""
+        ServerManager._use_remote = enabled
+    
+    @staticmethod
+    def _resolve_config(key: str, config: ServerConfig) -> ServerConfig:
+        """Usa la instancia remota configurada para `key` o, si no hay, el binario local."""
+        if ServerManager._use_remote:
+            url = ServerManager._remote_urls.get(key) or os.getenv(f"MCP_{key.upper()}_URL")
+            if url:
+                return ServerConfig.remote(config.name, url, timeout=config.timeout)
+        return ServerManager._resolve_installed(config)
+    
+    @staticmethod
+    def prepare_servers(upgrade: bool = False) -> Dict[str, str]:
+        """
+        Instala localmente todos los servidores MCP conocidos y fija sus versiones.
+        
+        Tras ejecutarlo, los métodos get_*_config lanzan el binario instalado en
+        .mcp_servers/ en lugar de `npx -y`/`uvx`, sin consultar el registro.
+        
+        Args:
+            upgrade: Si actualizar a la última versión en lugar de respetar el lockfile
+            
+        Returns:
+            dict: Paquete -> versión instalada
+        """
+        use_installed, ServerManager._use_installed = ServerManager._use_installed, False
+        use_remote, ServerManager._use_remote = ServerManager._use_remote, False
+        try:
+            configs = [
+                ServerManager.get_filesystem_server_config(),
+                ServerManager.get_playwright_server_config(),
+                ServerManager.get_playwright_alternative_config(),
+                ServerManager.get_github_server_config(),
+                ServerManager.get_sequential_thinking_server_config(),
+                ServerManager.get_fetch_server_config(),
+            ]
+        finally:
+            ServerManager._use_installed = use_installed
+            ServerManager._use_remote = use_remote
+        
+        installed = ServerManager.get_server_installer().install(configs, upgrade=upgrade)
+        for package, version in installed.items():
+            print(f"✅ {package} {version}")
+        return installed
+    
     @staticmethod
     def get_filesystem_server_config(samples_dir: Optional[str] = None) -> ServerConfig:
         """
@@ -44,11 +301,11 @@ class ServerManager:
             current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             samples_dir = os.path.join(current_dir, "sample_files")
         
-        return ServerConfig(
+        return ServerManager._resolve_config("filesystem", ServerConfig(
             name="Filesystem Server",
             command="npx",
             args=["-y", "@modelcontextprotocol/server-filesystem", samples_dir]
-        )
+        ))
     
     @staticmethod
     def get_playwright_server_config(headless: bool = True, browser: str = "chromium") -> ServerConfig:
@@ -67,11 +324,11 @@ class ServerManager:
             args.append("--headless")
         args.extend(["--browser", browser])
         
-        return ServerConfig(
+        return ServerManager._resolve_config("playwright", ServerConfig(
             name="Playwright Server",
             command="npx", 
             args=args
-        )
+        ))
     
     @staticmethod
     def get_github_server_config() -> ServerConfig:
@@ -84,11 +341,13 @@ class ServerManager:
         Note:
             Requiere GITHUB_TOKEN en las variables de entorno
         """
-        return ServerConfig(
+        github_token = os.getenv("GITHUB_TOKEN")
+        return ServerManager._resolve_config("github", ServerConfig(
             name="GitHub Server",
             command="npx",
-            args=["-y", "@skhatri/github-mcp"]
-        )
+            args=["-y", "@skhatri/github-mcp"],
+            env={"GITHUB_TOKEN": github_token} if github_token else None
+        ))
     
     @staticmethod
     def get_sequential_thinking_server_config() -> ServerConfig:
@@ -101,11 +360,11 @@ class ServerManager:
         Note:
             Servidor oficial de MCP para pensamiento estructurado paso a paso
         """
-        return ServerConfig(
+        return ServerManager._resolve_config("thinking", ServerConfig(
             name="Sequential Thinking Server",
             command="npx",
             args=["-y", "@modelcontextprotocol/server-sequential-thinking"]
-        )
+        ))
     
     @staticmethod
     def get_fetch_server_config() -> ServerConfig:
@@ -118,11 +377,11 @@ class ServerManager:
         Note:
             Servidor oficial de MCP para realizar llamadas HTTP/REST API
         """
-        return ServerConfig(
+        return ServerManager._resolve_config("fetch", ServerConfig(
             name="Fetch Server",
             command="uvx",
             args=["mcp-server-fetch"]
-        )
+        ))
     
     @staticmethod
     def get_playwright_alternative_config() -> ServerConfig:
@@ -132,11 +391,11 @@ class ServerManager:
         Returns:
             ServerConfig: Configuración alternativa del servidor Playwright
         """
-        return ServerConfig(
+        return ServerManager._resolve_installed(ServerConfig(
             name="Playwright Server Alt",
             command="npx",
             args=["-y", "@microsoft/playwright-mcp"]
-        )
+        ))
     
     @staticmethod
     @asynccontextmanager
@@ -150,65 +409,116 @@ class ServerManager:
         Yields:
             MCPServerStdio: Servidor filesystem configurado
         """
-        ServerManager._check_npx_available()
         config = ServerManager.get_filesystem_server_config(samples_dir)
+        if config.command == "npx":
+            ServerManager._check_npx_available()
         
-        async with MCPServerStdio(
-            name=config.name,
-            params={
-                "command": config.command,
-                "args": config.args,
-            },
-        ) as server:
+        async with config.create_server() as server:
             print(f"✅ {config.name} conectado exitosamente")
             yield server
     
     @staticmethod
     @asynccontextmanager
-    async def create_playwright_server(headless: bool = True, browser: str = "chromium"):
+    async def create_playwright_server(headless: bool = True, browser: str = "chromium",
+                                       race: bool = True):
         """
         Context manager para crear un servidor Playwright.
         
+        Con ``race=True`` la versión principal y la alternativa arrancan a la vez:
+        se queda la primera que completa el handshake y se cancela la otra. La
+        variante ganadora se recuerda en .cache/server_state.json, de modo que las
+        siguientes ejecuciones lanzan solo esa (y vuelven a competir si falla).
+        
         Args:
             headless: Si ejecutar en modo headless
             browser: Navegador a usar
+            race: Si lanzar ambas variantes en paralelo en lugar de secuencialmente
             
         Yields:
             MCPServerStdio: Servidor Playwright configurado
         """
-        ServerManager._check_npx_available()
         config = ServerManager.get_playwright_server_config(headless, browser)
+        if config.is_remote:
+            # Instancia compartida ya en marcha: no hay variantes que lanzar
+            async with config.create_server() as server:
+                print(f"✅ {config.name} conectado exitosamente ({config.url})")
+                yield server
+            return
         
-        try:
-            async with MCPServerStdio(
-                name=config.name,
-                params={
-                    "command": config.command,
-                    "args": config.args,
-                },
-            ) as server:
-                print(f"✅ {config.name} conectado exitosamente")
+        ServerManager._check_npx_available()
+        alt_config = ServerManager.get_playwright_alternative_config()
+        
+        if not race:
+            async with ServerManager._create_playwright_sequential(config, alt_config) as server:
                 yield server
-                
+            return
+        
+        variants = {"primary": config, "alternative": alt_config}
+        known_good = ServerManager._load_server_state().get("playwright")
+        handle = None
+        if known_good in variants:
+            try:
+                handle = ServerHandle(variants[known_good])
+                await handle.start()
+            except Exception as e:
+                print(f"⚠️  {variants[known_good].name} (última variante válida) falló: {e}")
+                print("🏁 Lanzando ambas variantes en paralelo...")
+                handle = None
+        
+        if handle is None:
+            handle = await race_handles([config, alt_config])
+            winner = next(key for key, value in variants.items() if value is handle.config)
+            ServerManager._save_server_state("playwright", winner)
+        
+        print(f"✅ {handle.config.name} conectado exitosamente ({handle.startup_seconds:.2f}s)")
+        try:
+            yield handle.server
+        finally:
+            await handle.stop()
+    
+    @staticmethod
+    @asynccontextmanager
+    async def _create_playwright_sequential(config: ServerConfig, alt_config: ServerConfig):
+        """Estrategia secuencial: intenta la versión principal y, si falla, la alternativa."""
+        try:
+            handle = ServerHandle(config)
+            await handle.start()
         except Exception as e:
             print(f"❌ ERROR al conectar con {config.name}: {e}")
             print("🔄 Intentando con versión alternativa...")
             
             # Intentar con versión alternativa
-            alt_config = ServerManager.get_playwright_alternative_config()
             try:
-                async with MCPServerStdio(
-                    name=alt_config.name,
-                    params={
-                        "command": alt_config.command,
-                        "args": alt_config.args,
-                    },
-                ) as alt_server:
-                    print(f"✅ {alt_config.name} conectado exitosamente")
-                    yield alt_server
+                handle = ServerHandle(alt_config)
+                await handle.start()
             except Exception as e2:
                 print(f"❌ ERROR también con versión alternativa: {e2}")
                 raise
+        
+        print(f"✅ {handle.config.name} conectado exitosamente")
+        try:
+            yield handle.server
+        finally:
+            await handle.stop()
+    
+    @staticmethod
+    def _load_server_state() -> Dict[str, str]:
+        """Carga las variantes de servidor que funcionaron en ejecuciones anteriores."""
+        try:
+            return json.loads(SERVER_STATE_FILE.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+    
+    @staticmethod
+    def _save_server_state(key: str, value: str):
+        """Guarda la variante de servidor ganadora para las próximas ejecuciones."""
+        state = ServerManager._load_server_state()
+        state[key] = value
+        try:
+            SERVER_STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            SERVER_STATE_FILE.write_text(json.dumps(state, indent=2), encoding="utf-8")
+        except OSError as e:
+            print(f"⚠️  No se pudo guardar el estado de servidores: {e}")
     
     @staticmethod
     @asynccontextmanager
@@ -222,25 +532,15 @@ class ServerManager:
         Note:
             Requiere GITHUB_TOKEN en las variables de entorno
         """
-        import os
-        github_token = os.getenv("GITHUB_TOKEN")
-        if not github_token:
-            raise RuntimeError("❌ ERROR: GITHUB_TOKEN no está configurado en las variables de entorno.")
-        
-        ServerManager._check_npx_available()
+        ServerManager.require_github_token()
         config = ServerManager.get_github_server_config()
+        if config.command == "npx":
+            ServerManager._check_npx_available()
         
         print("🔧 Conectando con GitHub MCP Server...")
         print("   Asegúrate de que el token tenga los permisos necesarios")
         
-        async with MCPServerStdio(
-            name=config.name,
-            params={
-                "command": config.command,
-                "args": config.args,
-                "env": {"GITHUB_TOKEN": github_token}
-            },
-        ) as server:
+        async with config.create_server() as server:
             print(f"✅ {config.name} conectado exitosamente")
             yield server
 
@@ -256,19 +556,14 @@ class ServerManager:
         Note:
             Servidor oficial de MCP para pensamiento estructurado paso a paso
         """
-        ServerManager._check_npx_available()
         config = ServerManager.get_sequential_thinking_server_config()
+        if config.command == "npx":
+            ServerManager._check_npx_available()
         
         print("🧠 Conectando con Sequential Thinking MCP Server...")
         print("   Iniciando pensamiento estructurado paso a paso")
         
-        async with MCPServerStdio(
-            name=config.name,
-            params={
-                "command": config.command,
-                "args": config.args,
-            },
-        ) as server:
+        async with config.create_server() as server:
             print(f"✅ {config.name} conectado exitosamente")
             yield server
 
@@ -290,13 +585,7 @@ class ServerManager:
         print("🌐 Conectando con Fetch MCP Server...")
         print("   Iniciando capacidades HTTP/REST API")
         
-        async with MCPServerStdio(
-            name=config.name,
-            params={
-                "command": config.command,
-                "args": config.args,
-            },
-        ) as server:
+        async with config.create_server() as server:
             print(f"✅ {config.name} conectado exitosamente")
             yield server
 
@@ -316,23 +605,231 @@ class ServerManager:
         Yields:
             tuple: (filesystem_server, playwright_server)
         """
-        ServerManager._check_npx_available()
-        
         fs_config = ServerManager.get_filesystem_server_config(samples_dir)
         pw_config = ServerManager.get_playwright_server_config(headless, browser)
         
-        async with MCPServerStdio(
-            name=fs_config.name,
-            params={
-                "command": fs_config.command,
-                "args": fs_config.args,
-            },
-        ) as filesystem_server, MCPServerStdio(
-            name=pw_config.name,
-            params={
-                "command": pw_config.command,
-                "args": pw_config.args,
-            },
-        ) as playwright_server:
+        async with ServerManager.create_servers(fs_config, pw_config) as servers:
             print(f"✅ {fs_config.name} y {pw_config.name} conectados exitosamente")
-            yield filesystem_server, playwright_server
\ No newline at end of file
+            yield servers
+
+    @staticmethod
+    @asynccontextmanager
+    async def create_servers(*configs: ServerConfig, supervised: bool = False):
+        """
+        Context manager que lanza varios servidores MCP en paralelo.
+        
+        Todos los servidores arrancan a la vez, por lo que el tiempo total es el
+        del más lento y no la suma de todos. Si alguno falla, se detienen los
+        demás y se propaga el error sin esperar al resto.
+        
+        Args:
+            *configs: Configuraciones de los servidores a lanzar
+            supervised: Si envolver cada servidor en un SupervisedServer que lo
+                reinicia automáticamente si el proceso muere
+            
+        Yields:
+            tuple: Servidores conectados, en el mismo orden que las configuraciones
+        """
+        if any(config.command == "npx" for config in configs):
+            ServerManager._check_npx_available()
+        
+        if supervised:
+            async with ServerManager._create_supervised_servers(configs) as servers:
+                yield servers
+            return
+        
+        started = time.perf_counter()
+        handles = await start_handles(configs)
+        ServerManager.last_startup_times = {
+            handle.config.name: handle.startup_seconds for handle in handles
+        }
+        for handle in handles:
+            print(f"⏱️  {handle.config.name}: {handle.startup_seconds:.2f}s")
+        print(f"✅ {len(handles)} servidores listos en {time.perf_counter() - started:.2f}s")
+        
+        try:
+            yield tuple(handle.server for handle in handles)
+        finally:
+            await asyncio.gather(*(handle.stop() for handle in handles))
+
+    @staticmethod
+    def create_lazy_server(config: ServerConfig) -> LazyMCPServer:
+        """
+        Crea un servidor MCP diferido: no lanza ningún proceso hasta que el
+        agente llama a una de sus herramientas.
+        
+        Mientras tanto, list_tools responde desde la caché de herramientas
+        (si no hay entrada, se lanza el servidor para obtenerla). Sin caché el
+        modo diferido no puede anunciar nada, así que se activa si no lo estaba.
+        Si el paquete no tiene versión (``@latest``) y se usan los servidores
+        instalados, tras el primer arranque se fija en el lockfile la versión que
+        resolvió npx, de modo que su listado se guarda en disco y los
+        siguientes procesos lo anuncian sin lanzarlo.
+        
+        Se usa como cualquier otro servidor:
+        ``async with ServerManager.create_lazy_server(cfg) as s``.
+        
+        Args:
+            config: Configuración del servidor
+            
+        Returns:
+            LazyMCPServer: Servidor que se lanza en el primer uso
+        """
+        if config.command == "npx":
+            ServerManager._check_npx_available()
+        if ServerManager.get_tool_cache() is None:
+            ServerManager.enable_tool_cache()
+            print("🗂️  Caché de herramientas MCP activada para el modo diferido")
+        use_installed = ServerManager._use_installed
+        if use_installed is None:
+            use_installed = get_settings().mcp_use_installed
+        pin_version = ServerManager.get_server_installer().pin_version if use_installed else None
+        print(f"💤 {config.name} en modo diferido (se lanzará al primer uso)")
+        return LazyMCPServer(config, ServerManager.get_tool_cache(), pin_version=pin_version)
+
+    @staticmethod
+    @asynccontextmanager
+    async def create_multiplexed_server(config: ServerConfig, max_in_flight: int = 8):
+        """
+        Context manager que lanza un servidor y lo comparte entre ejecuciones concurrentes.
+        
+        Cada ejecución pide su propia vista con ``mux.client(caller_id)``; todas
+        usan la misma sesión MCP, con como mucho ``max_in_flight`` peticiones a
+        la vez y cola justa entre llamantes. ``mux.stats()`` reporta la espera en
+        cola de cada llamante.
+        
+        Args:
+            config: Configuración del servidor
+            max_in_flight: Peticiones simultáneas máximas contra el servidor
+            
+        Yields:
+            ServerMultiplexer: Multiplexor sobre el servidor conectado
+        """
+        if config.command == "npx":
+            ServerManager._check_npx_available()
+        handle = ServerHandle(config)
+        await handle.start()
+        print(f"✅ {config.name} conectado exitosamente (multiplexado, "
+              f"máx. {max_in_flight} peticiones en vuelo)")
+        try:
+            yield ServerMultiplexer(handle.server, max_in_flight=max_in_flight)
+        finally:
+            await handle.stop()
+
+    @staticmethod
+    def get_server_pool(max_size: int = 2, idle_ttl: float = 300.0) -> ServerPool:
+        """
+        Obtiene el pool de servidores compartido por todo el proceso.
+        
+        Args:
+            max_size: Máximo de servidores vivos por configuración (solo al crearlo)
+            idle_ttl: Segundos de inactividad antes de cerrar un servidor (solo al crearlo)
+            
+        Returns:
+            ServerPool: Pool compartido
+        """
+        if ServerManager._server_pool is None:
+            ServerManager._server_pool = ServerPool(max_size=max_size, idle_ttl=idle_ttl)
+        return ServerManager._server_pool
+
+    @staticmethod
+    async def close_server_pool():
+        """Cierra el pool compartido y todos sus servidores."""
+        if ServerManager._server_pool is not None:
+            await ServerManager._server_pool.close()
+            ServerManager._server_pool = None
+
+    @staticmethod
+    @asynccontextmanager
+    async def lease_servers(*configs: ServerConfig, pool: Optional[ServerPool] = None):
+        """
+        Context manager que presta servidores ya inicializados desde el pool.
+        
+        A diferencia de los métodos create_*, al salir los servidores no se
+        cierran: vuelven al pool para la siguiente sesión.
+        
+        Args:
+            *configs: Configuraciones de los servidores a prestar
+            pool: Pool a usar (por defecto el compartido)
+            
+        Yields:
+            list[MCPServer]: Servidores conectados, en el orden de las configuraciones
+        """
+        if any(config.command == "npx" for config in configs):
+            ServerManager._check_npx_available()
+        pool = pool or ServerManager.get_server_pool()
+        async with pool.lease_many(*configs) as servers:
+            yield servers
+
+    @staticmethod
+    def enable_tool_cache(enabled: bool = True,
+                          cache_dir: Optional[str] = None,
+                          ttl: float = 24 * 3600):
+        """
+        Activa o desactiva la caché de listados de herramientas.
+        
+        Con la caché activa, list_tools se resuelve en memoria o desde disco
+        y solo se llama a tools/list cuando cambia el comando, los argumentos
+        o la versión del paquete. Está desactivada por defecto; también se
+        activa con MCP_TOOL_CACHE=1.
+        
+        Args:
+            enabled: Si usar la caché en los servidores creados a partir de ahora
+            cache_dir: Directorio de la caché en disco (por defecto .cache/mcp_tools)
+            ttl: Segundos de validez de cada entrada en disco
+        """
+        ServerManager._tool_cache_enabled = enabled
+        if enabled and (ServerManager._tool_cache is None or cache_dir is not None):
+            ServerManager._tool_cache = ToolListCache(
+                Path(cache_dir) if cache_dir else None, ttl=ttl
+            )
+
+    @staticmethod
+    def get_tool_cache() -> Optional[ToolListCache]:
+        """
+        Retorna la caché de herramientas activa.
+        
+        Returns:
+            ToolListCache | None: La caché, o None si está desactivada
+        """
+        enabled = ServerManager._tool_cache_enabled
+        if enabled is None:
+            enabled = get_settings().mcp_tool_cache
+        if not enabled:
+            return None
+        if ServerManager._tool_cache is None:
+            ServerManager._tool_cache = ToolListCache()
+        return ServerManager._tool_cache
+
+    @staticmethod
+    @asynccontextmanager
+    async def _create_supervised_servers(configs):
+        """
+        Lanza en paralelo servidores supervisados (ver create_servers).
+
+        Igual que start_handles(): si uno falla, cancela los que aún arrancan
+        y propaga el primer error sin esperar al resto.
+        """
+        servers = [SupervisedServer(config) for config in configs]
+        tasks = [asyncio.create_task(server.connect()) for server in servers]
+        try:
+            try:
+                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+                failed = next((t for t in done if not t.cancelled() and t.exception()), None)
+                if failed is not None:
+                    raise failed.exception()
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+            print(f"✅ {len(servers)} servidores supervisados listos")
+            yield tuple(servers)
+        finally:
+            await asyncio.gather(*(server.cleanup() for server in servers),
+                                 return_exceptions=True)
+            for server in servers:
+                stats = server.stats()
+                if stats["restarts"]:
+                    print(f"📊 {stats['name']}: {stats['restarts']} reinicios, "
+                          f"último error: {stats['last_error']}")
@@ -0,0 +1,402 @@
+"""
+Pool de servidores MCP reutilizables.
+Mantiene procesos MCP ya inicializados para evitar el arranque en frío de npx/uvx
+en cada sesión, demo o test.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional, Sequence
+
+from agents.mcp import MCPServer
+
+if TYPE_CHECKING:
+    from .server_manager import ServerConfig
+
+
+class ServerHandle:
+    """
+    Mantiene vivo un servidor MCP dentro de su propia tarea asyncio.
+
+    Los transportes stdio del SDK deben cerrarse en la misma tarea que los abrió,
+    por eso cada servidor vive en una tarea dedicada que espera la señal de parada.
+    """
+
+    def __init__(self, config: "ServerConfig"):
+        self.config = config
+        self.server: Optional[MCPServer] = None
+        self.startup_seconds: Optional[float] = None
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.error: Optional[BaseException] = None
+        self._stop = asyncio.Event()
+        self._ready: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        """
+        Indica si la tarea propietaria sigue en ejecución y la sesión MCP está abierta.
+
+        No detecta que el proceso hijo haya muerto: para eso el pool hace un ping.
+        """
+        if self._task is None or self._task.done() or self.server is None:
+            return False
+        return getattr(self.server, "session", None) is not None
+
+    async def start(self) -> MCPServer:
+        """
+        Lanza el servidor y espera a que complete el handshake MCP.
+
+        Returns:
+            MCPServer: Servidor conectado
+        """
+        loop = asyncio.get_running_loop()
+        self._ready = loop.create_future()
+        started = time.perf_counter()
+        self._task = asyncio.create_task(self._run(), name=f"mcp:{self.config.name}")
+        try:
+            self.server = await asyncio.shield(self._ready)
+        except asyncio.CancelledError:
+            await self.stop()
+            raise
+        self.startup_seconds = time.perf_counter() - started
+        return self.server
+
+    async def _run(self):
+        """Cuerpo de la tarea propietaria: conecta, espera y limpia."""
+        server: Optional[MCPServer] = None
+        try:
+            # Dentro del try: si el constructor falla (transporte o comando no
+            # válidos), start() recibe la excepción en lugar de esperar para siempre
+            server = self.config.create_server()
+            await server.connect()
+            if not self._ready.done():
+                self._ready.set_result(server)
+            await self._stop.wait()
+        except asyncio.CancelledError:
+            if not self._ready.done():
+                self._ready.cancel()
+            raise
+        except BaseException as e:
+            self.error = e
+            if not self._ready.done():
+                self._ready.set_exception(e)
+        finally:
+            # También si se cancela a mitad del handshake: el transporte debe
+            # cerrarse en esta misma tarea o el proceso hijo queda huérfano
+            if server is not None:
+                await server.cleanup()
+
+    async def stop(self):
+        """Detiene el servidor y espera a que su tarea termine."""
+        self._stop.set()
+        if self._task is not None and not self._task.done():
+            if self._ready is not None and not self._ready.done():
+                # Todavía arrancando: no hay handshake que esperar
+                self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+
+class ServerPool:
+    """
+    Pool de servidores MCP inicializados, agrupados por configuración.
+
+    Cada configuración (identificada por su fingerprint) mantiene hasta
+    ``max_size`` servidores vivos. Los servidores se prestan con ``lease()``,
+    se verifican con un ping al devolverse y antes de reutilizarse (el proceso
+    hijo puede morir mientras está ocioso) y se cierran tras ``idle_ttl``
+    segundos sin uso.
+    """
+
+    def __init__(self, max_size: int = 2, idle_ttl: float = 300.0,
+                 health_check_timeout: float = 5.0):
+        """
+        Args:
+            max_size: Máximo de servidores vivos por configuración
+            idle_ttl: Segundos que un servidor puede estar ocioso antes de cerrarse
+            health_check_timeout: Tiempo máximo para el ping de salud al devolverlo
+        """
+        if max_size < 1:
+            raise ValueError("max_size debe ser al menos 1")
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.health_check_timeout = health_check_timeout
+        self._idle: Dict[str, Deque[ServerHandle]] = {}
+        self._sizes: Dict[str, int] = {}
+        self._condition: Optional[asyncio.Condition] = None
+        self._reaper: Optional[asyncio.Task] = None
+        self._closed = False
+        self.stats: Dict[str, int] = {"created": 0, "reused": 0, "evicted": 0, "unhealthy": 0}
+
+    def _get_condition(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    def _ensure_reaper(self):
+        if self.idle_ttl and (self._reaper is None or self._reaper.done()):
+            self._reaper = asyncio.create_task(self._reap_idle(), name="mcp-pool-reaper")
+
+    async def _acquire(self, config: "ServerConfig") -> ServerHandle:
+        """Obtiene un servidor ocioso o lanza uno nuevo si hay capacidad."""
+        if self._closed:
+            raise RuntimeError("❌ ERROR: el pool de servidores está cerrado")
+
+        key = config.fingerprint()
+        condition = self._get_condition()
+        self._ensure_reaper()
+
+        while True:
+            reused: Optional[ServerHandle] = None
+            async with condition:
+                while True:
+                    idle = self._idle.setdefault(key, deque())
+                    if idle:
+                        reused = idle.pop()
+                        break
+                    if self._sizes.get(key, 0) < self.max_size:
+                        self._sizes[key] = self._sizes.get(key, 0) + 1
+                        break
+                    await condition.wait()
+            if reused is None:
+                break
+            # El ping se hace fuera del lock para no bloquear al resto de préstamos
+            if await self._is_healthy(reused):
+                self.stats["reused"] += 1
+                return reused
+            self.stats["unhealthy"] += 1
+            print(f"⚠️  {config.name} murió mientras estaba ocioso, se descarta")
+            await reused.stop()
+            await self._discard(key)
+
+        handle = ServerHandle(config)
+        try:
+            await handle.start()
+        except BaseException:
+            await self._discard(key)
+            raise
+        self.stats["created"] += 1
+        print(f"✅ {config.name} iniciado en el pool ({handle.startup_seconds:.2f}s)")
+        return handle
+
+    async def _release(self, handle: ServerHandle):
+        """Devuelve un servidor al pool si supera el health-check."""
+        key = handle.config.fingerprint()
+        if not self._closed and await self._is_healthy(handle):
+            handle.last_used = time.monotonic()
+            condition = self._get_condition()
+            async with condition:
+                self._idle.setdefault(key, deque()).append(handle)
+                condition.notify()
+            return
+
+        if not self._closed:
+            self.stats["unhealthy"] += 1
+            print(f"⚠️  {handle.config.name} no respondió al health-check, se descarta")
+        await handle.stop()
+        await self._discard(key)
+
+    async def _discard(self, key: str):
+        condition = self._get_condition()
+        async with condition:
+            self._sizes[key] = max(0, self._sizes.get(key, 0) - 1)
+            condition.notify()
+
+    async def _is_healthy(self, handle: ServerHandle) -> bool:
+        """
+        Comprueba que el proceso siga vivo y responda a un ping MCP.
+
+        Siempre se hace el ping por la sesión: list_tools() puede responderse desde
+        la caché de herramientas sin llegar al proceso.
+        """
+        if not handle.alive:
+            return False
+        try:
+            await asyncio.wait_for(handle.server.session.send_ping(), self.health_check_timeout)
+        except Exception:
+            return False
+        return True
+
+    async def _reap_idle(self):
+        """Cierra periódicamente los servidores ociosos que superan el TTL."""
+        interval = max(1.0, self.idle_ttl / 2)
+        while not self._closed:
+            await asyncio.sleep(interval)
+            await self.evict_idle()
+
+    async def evict_idle(self, max_idle: Optional[float] = None) -> int:
+        """
+        Cierra los servidores ociosos más antiguos que ``max_idle`` segundos.
+
+        Args:
+            max_idle: Umbral de inactividad. Si None, usa ``idle_ttl``.
+
+        Returns:
+            int: Número de servidores cerrados
+        """
+        threshold = self.idle_ttl if max_idle is None else max_idle
+        now = time.monotonic()
+        expired: List[ServerHandle] = []
+
+        condition = self._get_condition()
+        async with condition:
+            for key, idle in self._idle.items():
+                keep = deque(h for h in idle if h.alive and now - h.last_used < threshold)
+                for handle in idle:
+                    if handle not in keep:
+                        expired.append(handle)
+                        self._sizes[key] -= 1
+                self._idle[key] = keep
+            if expired:
+                condition.notify_all()
+
+        for handle in expired:
+            await handle.stop()
+        self.stats["evicted"] += len(expired)
+        return len(expired)
+
+    @asynccontextmanager
+    async def lease(self, config: "ServerConfig"):
+        """
+        Presta un servidor MCP inicializado para la configuración indicada.
+
+        Args:
+            config: Configuración del servidor
+
+        Yields:
+            MCPServer: Servidor conectado, listo para usarse en un agente
+        """
+        handle = await self._acquire(config)
+        try:
+            yield handle.server
+        finally:
+            await asyncio.shield(self._release(handle))
+
+    @asynccontextmanager
+    async def lease_many(self, *configs: "ServerConfig"):
+        """
+        Presta un servidor por cada configuración.
+
+        Yields:
+            list[MCPServer]: Servidores en el mismo orden que las configuraciones
+        """
+        handles: List[ServerHandle] = []
+        try:
+            for config in configs:
+                handles.append(await self._acquire(config))
+            yield [handle.server for handle in handles]
+        finally:
+            for handle in handles:
+                await asyncio.shield(self._release(handle))
+
+    async def warm(self, config: "ServerConfig", count: Optional[int] = None):
+        """
+        Pre-arranca servidores para que el primer ``lease()`` no espere.
+
+        Args:
+            config: Configuración del servidor
+            count: Número de servidores a dejar listos (por defecto ``max_size``)
+        """
+        count = min(count or self.max_size, self.max_size)
+        handles = [await self._acquire(config) for _ in range(count)]
+        for handle in handles:
+            await self._release(handle)
+
+    def describe(self) -> Dict[str, Any]:
+        """Retorna el estado del pool (servidores vivos y ociosos por configuración)."""
+        return {
+            "sizes": dict(self._sizes),
+            "idle": {key: len(idle) for key, idle in self._idle.items()},
+            **self.stats,
+        }
+
+    async def close(self):
+        """Cierra todos los servidores del pool."""
+        self._closed = True
+        if self._reaper is not None:
+            self._reaper.cancel()
+            try:
+                await self._reaper
+            except asyncio.CancelledError:
+                pass
+        handles = [h for idle in self._idle.values() for h in idle]
+        self._idle.clear()
+        self._sizes.clear()
+        for handle in handles:
+            await handle.stop()
+
+
+async def start_handles(configs: Sequence["ServerConfig"]) -> List[ServerHandle]:
+    """
+    Lanza varios servidores en paralelo y espera a que todos estén listos.
+
+    Si alguno falla, detiene inmediatamente los demás (incluidos los que aún
+    están arrancando) y propaga el primer error.
+
+    Args:
+        configs: Configuraciones de los servidores
+
+    Returns:
+        list[ServerHandle]: Handles ya conectados, en el orden de ``configs``
+    """
+    handles = [ServerHandle(config) for config in configs]
+    tasks = [asyncio.create_task(handle.start()) for handle in handles]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        failed = next((t for t in done if not t.cancelled() and t.exception()), None)
+        if failed is not None:
+            raise failed.exception()
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.gather(*(handle.stop() for handle in handles), return_exceptions=True)
+        raise
+    return handles
+
+
+async def race_handles(configs: Sequence["ServerConfig"]) -> ServerHandle:
+    """
+    Lanza varias variantes de un servidor y se queda con la primera que arranca.
+
+    Las demás se cancelan (o se detienen si también llegaron a conectarse).
+    Solo falla si fallan todas, propagando el último error.
+
+    Args:
+        configs: Configuraciones candidatas
+
+    Returns:
+        ServerHandle: Handle del servidor ganador
+    """
+    handles = {asyncio.create_task(handle.start()): handle
+               for handle in (ServerHandle(config) for config in configs)}
+    pending = set(handles)
+    winner: Optional[ServerHandle] = None
+    error: Optional[BaseException] = None
+    try:
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.cancelled():
+                    continue
+                if task.exception() is not None:
+                    error = task.exception()
+                    print(f"❌ {handles[task].config.name} falló: {error}")
+                elif winner is None:
+                    winner = handles[task]
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        losers = [handle for handle in handles.values() if handle is not winner]
+        await asyncio.gather(*(handle.stop() for handle in losers), return_exceptions=True)
+
+    if winner is None:
+        raise error or RuntimeError("❌ ERROR: ninguna variante del servidor arrancó")
+    return winner
@@ -0,0 +1,63 @@
+"""
+Proxy base para servidores MCP.
+Permite envolver un MCPServer para añadir comportamiento (caché, supervisión, etc.)
+sin que los agentes noten la diferencia.
+"""
+
+from typing import Any, Optional
+
+from agents.mcp import MCPServer
+
+
+class MCPServerProxy(MCPServer):
+    """
+    Servidor MCP que delega todas las operaciones en otro servidor.
+
+    Las subclases sobrescriben solo los métodos que necesitan interceptar.
+    """
+
+    def __init__(self, inner: Optional[MCPServer]):
+        super().__init__(
+            use_structured_content=inner.use_structured_content if inner is not None else False
+        )
+        self.inner = inner
+
+    @property
+    def name(self) -> str:
+        return self.inner.name
+
+    @property
+    def session(self) -> Optional[Any]:
+        """Sesión MCP del servidor envuelto (usada por los health-checks)."""
+        return getattr(self.inner, "session", None)
+
+    @property
+    def server_initialize_result(self) -> Optional[Any]:
+        """Resultado del handshake del servidor envuelto, si existe."""
+        return getattr(self.inner, "server_initialize_result", None)
+
+    async def connect(self):
+        await self.inner.connect()
+
+    async def cleanup(self):
+        await self.inner.cleanup()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.cleanup()
+
+    async def list_tools(self, run_context=None, agent=None):
+        return await self.inner.list_tools(run_context, agent)
+
+    async def call_tool(self, tool_name: str, arguments: Optional[dict[str, Any]],
+                        meta: Optional[dict[str, Any]] = None):
+        return await self.inner.call_tool(tool_name, arguments, meta)
+
+    async def list_prompts(self):
+        return await self.inner.list_prompts()
+
+    async def get_prompt(self, name: str, arguments: Optional[dict[str, Any]] = None):
+        return await self.inner.get_prompt(name, arguments)
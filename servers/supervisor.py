@@ -0,0 +1,218 @@
+"""
+Supervisión de servidores MCP.
+Detecta la caída del proceso hijo, lo reinicia con backoff exponencial y
+reintenta una vez las llamadas idempotentes que estaban en curso.
+"""
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional, Set
+
+from .server_pool import ServerHandle
+from .server_proxy import MCPServerProxy
+
+if TYPE_CHECKING:
+    from .server_manager import ServerConfig
+
+
+class SupervisedServer(MCPServerProxy):
+    """
+    Servidor MCP que se reinicia solo si su proceso muere.
+
+    Un watcher envía pings periódicos; si el servidor deja de responder (o una
+    llamada falla y el ping posterior también), se relanza el proceso, se repite
+    el handshake de inicialización y, si la herramienta es idempotente, se
+    reintenta la llamada una vez. El agente sigue usando el mismo objeto.
+    """
+
+    def __init__(self, config: "ServerConfig",
+                 max_restarts: int = 5,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 30.0,
+                 watch_interval: float = 5.0,
+                 ping_timeout: float = 3.0,
+                 idempotent_tools: Optional[Iterable[str]] = None):
+        """
+        Args:
+            config: Configuración del servidor a supervisar
+            max_restarts: Reinicios consecutivos permitidos antes de rendirse
+            backoff_base: Espera inicial entre reinicios (se duplica en cada intento)
+            backoff_max: Espera máxima entre reinicios
+            watch_interval: Segundos entre pings del watcher (0 para desactivarlo)
+            ping_timeout: Tiempo máximo de respuesta a un ping
+            idempotent_tools: Herramientas que se pueden reintentar sin efectos
+                secundarios, además de las marcadas como readOnly/idempotent
+                por el propio servidor
+        """
+        super().__init__(None)
+        self.config = config
+        self.max_restarts = max_restarts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.watch_interval = watch_interval
+        self.ping_timeout = ping_timeout
+        self.idempotent_tools: Set[str] = set(idempotent_tools or ())
+        self._annotations: Dict[str, Any] = {}
+
+        self.restart_count = 0
+        self.last_error: Optional[str] = None
+        self._consecutive_failures = 0
+        self._started_at: Optional[float] = None
+        self._handle: Optional[ServerHandle] = None
+        self._generation = 0
+        self._restart_lock = asyncio.Lock()
+        self._watcher: Optional[asyncio.Task] = None
+        self._closed = False
+
+    @property
+    def name(self) -> str:
+        return self.config.name
+
+    @property
+    def uptime(self) -> float:
+        """Segundos desde el último arranque correcto del proceso."""
+        return time.monotonic() - self._started_at if self._started_at else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna métricas de supervisión (reinicios, uptime, último error)."""
+        return {
+            "name": self.name,
+            "restarts": self.restart_count,
+            "uptime_seconds": round(self.uptime, 3),
+            "alive": self._handle is not None and self._handle.alive,
+            "last_error": self.last_error,
+        }
+
+    async def _start(self):
+        handle = ServerHandle(self.config)
+        await handle.start()
+        self._handle = handle
+        self.inner = handle.server
+        self._started_at = time.monotonic()
+        self._generation += 1
+
+    async def connect(self):
+        """Lanza el servidor y arranca el watcher."""
+        self._closed = False
+        await self._start()
+        if self.watch_interval and (self._watcher is None or self._watcher.done()):
+            self._watcher = asyncio.create_task(self._watch(), name=f"supervisor:{self.name}")
+
+    async def cleanup(self):
+        """Detiene el watcher y el proceso supervisado."""
+        self._closed = True
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+        if self._handle is not None:
+            await self._handle.stop()
+            self._handle = None
+
+    async def _is_healthy(self) -> bool:
+        handle = self._handle
+        if handle is None or not handle.alive:
+            return False
+        session = getattr(handle.server, "session", None)
+        if session is None:
+            return True
+        try:
+            await asyncio.wait_for(session.send_ping(), self.ping_timeout)
+        except Exception:
+            return False
+        return True
+
+    async def _watch(self):
+        """Ping periódico; reinicia el servidor si deja de responder."""
+        while not self._closed:
+            await asyncio.sleep(self.watch_interval)
+            if not await self._is_healthy():
+                try:
+                    await self.restart(reason="el servidor no responde al ping")
+                except Exception as e:
+                    print(f"❌ ERROR: no se pudo reiniciar {self.name}: {e}")
+                    return
+
+    async def restart(self, reason: str = "reinicio manual", generation: Optional[int] = None):
+        """
+        Reinicia el proceso con backoff exponencial.
+
+        Args:
+            reason: Motivo del reinicio (se guarda como último error)
+            generation: Generación que se detectó caída; si ya se reinició
+                desde entonces, no se hace nada
+        """
+        async with self._restart_lock:
+            if generation is not None and generation != self._generation:
+                return
+            self.last_error = reason
+            print(f"⚠️  {self.name} caído ({reason}), reiniciando...")
+
+            if self._handle is not None:
+                await self._handle.stop()
+                self._handle = None
+
+            while True:
+                if self._consecutive_failures >= self.max_restarts:
+                    raise RuntimeError(
+                        f"❌ ERROR: {self.name} superó {self.max_restarts} reinicios consecutivos"
+                    )
+                delay = min(self.backoff_max, self.backoff_base * (2 ** self._consecutive_failures))
+                self._consecutive_failures += 1
+                await asyncio.sleep(delay)
+                try:
+                    await self._start()
+                    break
+                except Exception as e:
+                    self.last_error = str(e)
+                    print(f"🔄 Reintento de arranque de {self.name} fallido: {e}")
+
+            self.restart_count += 1
+            self._consecutive_failures = 0
+            print(f"✅ {self.name} reiniciado (reinicios: {self.restart_count})")
+
+    def _is_idempotent(self, tool_name: str) -> bool:
+        if tool_name in self.idempotent_tools:
+            return True
+        annotations = self._annotations.get(tool_name)
+        if annotations is None:
+            return False
+        return bool(annotations.readOnlyHint or annotations.idempotentHint)
+
+    def _remember_annotations(self, tools):
+        self._annotations = {tool.name: tool.annotations for tool in tools}
+        return tools
+
+    async def _ensure_running(self):
+        if self._handle is None or not self._handle.alive:
+            await self.restart(reason="proceso detenido", generation=self._generation)
+
+    async def list_tools(self, run_context=None, agent=None):
+        await self._ensure_running()
+        generation = self._generation
+        try:
+            tools = await self.inner.list_tools(run_context, agent)
+        except Exception as e:
+            if await self._is_healthy():
+                raise
+            await self.restart(reason=str(e) or type(e).__name__, generation=generation)
+            tools = await self.inner.list_tools(run_context, agent)
+        return self._remember_annotations(tools)
+
+    async def call_tool(self, tool_name: str, arguments: Optional[dict[str, Any]],
+                        meta: Optional[dict[str, Any]] = None):
+        await self._ensure_running()
+        generation = self._generation
+        try:
+            return await self.inner.call_tool(tool_name, arguments, meta)
+        except Exception as e:
+            if await self._is_healthy():
+                raise
+            await self.restart(reason=str(e) or type(e).__name__, generation=generation)
+            if not self._is_idempotent(tool_name):
+                raise
+            print(f"🔁 Reintentando {tool_name} tras el reinicio de {self.name}")
+            return await self.inner.call_tool(tool_name, arguments, meta)
@@ -0,0 +1,193 @@
+"""
+Caché persistente de listados de herramientas MCP.
+Evita repetir la llamada tools/list en cada turno del agente y entre ejecuciones.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from mcp.types import Tool as MCPTool
+
+from .server_proxy import MCPServerProxy
+
+if TYPE_CHECKING:
+    from agents.mcp import MCPServer
+    from .server_manager import ServerConfig
+
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / ".cache" / "mcp_tools"
+
+
+class ToolListCache:
+    """
+    Caché en memoria y en disco de listados de herramientas MCP.
+
+    La clave es un hash del comando, los argumentos y la versión del paquete del
+    servidor, de modo que cualquier cambio en ellos invalida la entrada. Además,
+    si el servidor reporta una versión distinta en el handshake, la entrada se descarta.
+
+    Solo se guardan en disco los listados de configuraciones con versión conocida
+    (fijada en el spec o con prepare_servers()). Con ``npx -y paquete`` o ``@latest``
+    npm puede resolver otra versión en el siguiente arranque sin que cambie la
+    clave, así que esos listados solo viven en memoria durante el proceso.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, ttl: float = 24 * 3600):
+        """
+        Args:
+            cache_dir: Directorio para los ficheros de caché (por defecto .cache/mcp_tools)
+            ttl: Segundos de validez de una entrada en disco (0 para no expirar)
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.ttl = ttl
+        self._memory: Dict[str, Dict[str, Any]] = {}
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "writes": 0}
+
+    @staticmethod
+    def cache_key(config: "ServerConfig") -> str:
+        """
+        Calcula la clave de caché de una configuración.
+
+        Args:
+            config: Configuración del servidor
+
+        Returns:
+            str: Hash SHA-256 (hex) de comando, argumentos, versión del paquete y URL
+        """
+        data = {"command": config.command, "args": config.args, "version": config.package_version}
+        if config.url:
+            data["url"] = config.url
+        payload = json.dumps(data, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def is_persistent(config: "ServerConfig") -> bool:
+        """Indica si el listado de una configuración puede guardarse en disco (versión conocida)."""
+        return config.package_version is not None
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _load_entry(self, key: str, from_disk: bool = True) -> Optional[Dict[str, Any]]:
+        entry = self._memory.get(key)
+        if entry is None:
+            path = self._path(key)
+            if not from_disk or not path.exists():
+                return None
+            try:
+                entry = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                return None
+            self._memory[key] = entry
+        if self.ttl and time.time() - entry.get("created_at", 0) > self.ttl:
+            self._drop(key)
+            return None
+        return entry
+
+    def _drop(self, key: str):
+        self._memory.pop(key, None)
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def get(self, config: "ServerConfig",
+            server_version: Optional[str] = None) -> Optional[List[MCPTool]]:
+        """
+        Obtiene el listado cacheado de una configuración.
+
+        Args:
+            config: Configuración del servidor
+            server_version: Versión reportada por el servidor en el handshake, si se conoce
+
+        Returns:
+            list[MCPTool] | None: Herramientas cacheadas o None si no hay entrada válida
+        """
+        key = self.cache_key(config)
+        entry = self._load_entry(key, from_disk=self.is_persistent(config))
+        if entry is not None and server_version and entry.get("server_version") not in (None, server_version):
+            self._drop(key)
+            entry = None
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        tools = entry.get("_tools")
+        if tools is None:
+            tools = [MCPTool.model_validate(tool) for tool in entry["tools"]]
+            entry["_tools"] = tools
+        return tools
+
+    def put(self, config: "ServerConfig", tools: List[MCPTool],
+            server_version: Optional[str] = None):
+        """
+        Guarda el listado de herramientas de una configuración en memoria y, si
+        su versión es conocida, en disco.
+
+        Args:
+            config: Configuración del servidor
+            tools: Herramientas devueltas por tools/list
+            server_version: Versión reportada por el servidor en el handshake
+        """
+        key = self.cache_key(config)
+        entry = {
+            "name": config.name,
+            "command": config.command,
+            "args": config.args,
+            "version": config.package_version,
+            "server_version": server_version,
+            "created_at": time.time(),
+            "tools": [tool.model_dump(mode="json", exclude_none=True) for tool in tools],
+        }
+        if self.is_persistent(config):
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                tmp_path = self._path(key).with_suffix(".tmp")
+                tmp_path.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+                os.replace(tmp_path, self._path(key))
+            except OSError as e:
+                print(f"⚠️  No se pudo escribir la caché de herramientas: {e}")
+        entry["_tools"] = list(tools)
+        self._memory[key] = entry
+        self.stats["writes"] += 1
+
+    def invalidate(self, config: Optional["ServerConfig"] = None):
+        """
+        Invalida la entrada de una configuración, o toda la caché si config es None.
+        """
+        if config is not None:
+            self._drop(self.cache_key(config))
+            return
+        self._memory.clear()
+        if self.cache_dir.exists():
+            for path in self.cache_dir.glob("*.json"):
+                path.unlink(missing_ok=True)
+
+
+class CachedToolsServer(MCPServerProxy):
+    """Servidor MCP cuyo list_tools se resuelve desde un ToolListCache."""
+
+    def __init__(self, inner: "MCPServer", config: "ServerConfig", cache: ToolListCache):
+        super().__init__(inner)
+        self.config = config
+        self.cache = cache
+
+    def _server_version(self) -> Optional[str]:
+        result = self.server_initialize_result
+        if result is None:
+            return None
+        return getattr(result.serverInfo, "version", None)
+
+    async def list_tools(self, run_context=None, agent=None):
+        """Lista herramientas desde la caché; solo consulta al servidor si no hay entrada."""
+        server_version = self._server_version()
+        tools = self.cache.get(self.config, server_version)
+        if tools is None:
+            tools = await self.inner.list_tools(run_context, agent)
+            self.cache.put(self.config, tools, server_version)
+        return tools
@@ -0,0 +1,142 @@
+"""
+Filtros de herramientas MCP por agente.
+Cada agente ve solo las herramientas que describen sus instrucciones, de modo que
+cada petición al modelo lleva menos esquemas JSON (menos tokens, latencia y coste).
+"""
+
+import json
+from fnmatch import fnmatchcase
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from agents.mcp import MCPServer
+from mcp.types import Tool as MCPTool
+
+from .server_proxy import MCPServerProxy
+
+
+class ToolSelection(NamedTuple):
+    """
+    Herramientas visibles de un servidor.
+
+    Los patrones usan la sintaxis de fnmatch (``browser_*``, ``read_?ile``...). Si
+    ``include`` está vacío se parte de todas las herramientas; ``exclude`` se aplica
+    después y siempre gana.
+    """
+    include: Tuple[str, ...] = ()
+    exclude: Tuple[str, ...] = ()
+
+    def allows(self, tool_name: str) -> bool:
+        """Indica si una herramienta pasa el filtro."""
+        if self.include and not any(fnmatchcase(tool_name, p) for p in self.include):
+            return False
+        return not any(fnmatchcase(tool_name, p) for p in self.exclude)
+
+
+# Filtros por servidor: patrón del nombre del servidor (fnmatch, sin distinguir mayúsculas) -> selección
+ToolFilters = Dict[str, ToolSelection]
+
+# Tokens de esquema por (agente, servidor), acumulados entre ejecuciones
+_reports: Dict[Tuple[str, str], Dict[str, int]] = {}
+
+
+def estimate_schema_tokens(tool: MCPTool) -> int:
+    """Aproxima los tokens que ocupa la definición de una herramienta en la petición (~4 caracteres/token)."""
+    payload = {"name": tool.name, "description": tool.description or "", "parameters": tool.inputSchema}
+    return max(1, len(json.dumps(payload, ensure_ascii=False)) // 4)
+
+
+def selection_for(server_name: str, filters: Optional[ToolFilters]) -> Optional[ToolSelection]:
+    """
+    Busca la selección que corresponde a un servidor.
+
+    Returns:
+        ToolSelection | None: La primera selección cuyo patrón coincide con el nombre, o None
+    """
+    for pattern, selection in (filters or {}).items():
+        if fnmatchcase(server_name.lower(), pattern.lower()):
+            return selection
+    return None
+
+
+class FilteredServer(MCPServerProxy):
+    """Servidor MCP que solo expone las herramientas permitidas por una ToolSelection."""
+
+    def __init__(self, inner: MCPServer, selection: ToolSelection):
+        super().__init__(inner)
+        self.selection = selection
+        self._schema_tokens: Dict[str, int] = {}
+
+    def _tokens(self, tool: MCPTool) -> int:
+        tokens = self._schema_tokens.get(tool.name)
+        if tokens is None:
+            tokens = self._schema_tokens[tool.name] = estimate_schema_tokens(tool)
+        return tokens
+
+    async def allowed_tools(self, run_context=None, agent=None) -> List[MCPTool]:
+        """Herramientas permitidas, sin contar el listado en el resumen de tokens."""
+        tools = await self.inner.list_tools(run_context, agent)
+        return [tool for tool in tools if self.selection.allows(tool.name)]
+
+    def restricted_to(self, names: Sequence[str]) -> "FilteredServer":
+        """Copia del filtro que además solo deja pasar ``names`` (un único envoltorio sobre el servidor)."""
+        server = FilteredServer(self.inner, self.selection._replace(include=tuple(names)))
+        server._schema_tokens = self._schema_tokens
+        return server
+
+    async def list_tools(self, run_context=None, agent=None):
+        """Lista las herramientas del servidor envuelto y descarta las no permitidas."""
+        tools = await self.inner.list_tools(run_context, agent)
+        kept = [tool for tool in tools if self.selection.allows(tool.name)]
+
+        report = _reports.setdefault((agent.name if agent is not None else "?", self.name), {
+            "listings": 0, "tools": 0, "kept": 0, "schema_tokens": 0, "kept_tokens": 0, "saved_tokens": 0,
+            "removed": [],
+        })
+        total_tokens = sum(self._tokens(tool) for tool in tools)
+        kept_tokens = sum(self._tokens(tool) for tool in kept)
+        removed = sorted(tool.name for tool in tools if not self.selection.allows(tool.name))
+        report.update(tools=len(tools), kept=len(kept), schema_tokens=total_tokens, kept_tokens=kept_tokens,
+                      removed=removed)
+        report["listings"] += 1
+        report["saved_tokens"] += total_tokens - kept_tokens
+        return kept
+
+    async def call_tool(self, tool_name: str, arguments: Optional[dict[str, Any]],
+                        meta: Optional[dict[str, Any]] = None):
+        if not self.selection.allows(tool_name):
+            raise ValueError(f"La herramienta '{tool_name}' no está permitida para este agente en {self.name}")
+        return await self.inner.call_tool(tool_name, arguments, meta)
+
+
+def apply_tool_filters(servers: Sequence[MCPServer], filters: Optional[ToolFilters]) -> List[MCPServer]:
+    """
+    Envuelve en FilteredServer los servidores que tienen una selección en ``filters``.
+
+    Args:
+        servers: Servidores MCP del agente
+        filters: Filtros por patrón de nombre de servidor
+
+    Returns:
+        list[MCPServer]: Servidores listos para el agente (los que no tienen filtro, sin cambios)
+    """
+    result = []
+    for server in servers:
+        selection = selection_for(server.name, filters)
+        result.append(FilteredServer(server, selection) if selection is not None else server)
+    return result
+
+
+def get_tool_filter_report() -> List[Dict[str, Any]]:
+    """
+    Resumen de tokens de esquema ahorrados por agente y servidor.
+
+    ``schema_tokens``/``kept_tokens`` y ``removed`` (nombres de las herramientas
+    ocultadas) son los del último listado (por petición al modelo) y
+    ``saved_tokens`` el acumulado de todas las peticiones.
+    """
+    return [{"agent": agent, "server": server, **stats} for (agent, server), stats in _reports.items()]
+
+
+def reset_tool_filter_report():
+    """Vacía el resumen de tokens ahorrados."""
+    _reports.clear()
@@ -0,0 +1,122 @@
+"""
+Test del control adaptativo de concurrencia (AIMD).
+Levanta un servidor local compatible con OpenAI que se vuelve lento por encima
+de 8 peticiones simultáneas y devuelve 429 por encima de 12, y verifica que el
+límite crece desde el valor inicial y se ajusta a la capacidad del servidor.
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+# Añadir el directorio padre al path para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents import Runner
+from ai_agents.agent_factory import AgentFactory
+from utils import (
+    close_azure_openai_clients,
+    configure_adaptive_concurrency,
+    get_concurrency_limiter,
+    reload_settings,
+)
+
+
+def create_saturating_app(state: dict) -> Starlette:
+    """Servidor de chat completions con capacidad limitada."""
+    async def chat_completions(request):
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        try:
+            if state["in_flight"] > 12:
+                return JSONResponse({"error": {"message": "saturado"}}, status_code=429,
+                                    headers={"retry-after-ms": "100"})
+            await asyncio.sleep(0.05 * max(1.0, state["in_flight"] / 8))
+            return JSONResponse({
+                "id": "chatcmpl-aimd",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt",
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": "ok"},
+                }],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            })
+        finally:
+            state["in_flight"] -= 1
+
+    return Starlette(routes=[
+        Route("/openai/deployments/{deployment}/chat/completions", chat_completions, methods=["POST"]),
+    ])
+
+
+async def test_adaptive_concurrency():
+    """Lanza 300 ejecuciones con 40 en paralelo y revisa el límite."""
+    print("🎚️  Test de concurrencia adaptativa")
+    print("=" * 50)
+
+    state = {"in_flight": 0, "peak": 0}
+    server = uvicorn.Server(uvicorn.Config(create_saturating_app(state), port=18104, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    os.environ["AZURE_OPENAI_FAKE_SERVER"] = "http://127.0.0.1:18104"
+    reload_settings()
+    configure_adaptive_concurrency(initial_limit=2, max_limit=40)
+
+    try:
+        agent = AgentFactory.create_base_agent("AIMD Agent", "Answer briefly.")
+        callers = asyncio.Semaphore(40)
+
+        async def run_one():
+            async with callers:
+                await Runner.run(starting_agent=agent, input="Hola")
+
+        await asyncio.gather(*(run_one() for _ in range(300)))
+        limiter = get_concurrency_limiter()
+        stats = limiter.describe()
+        print(f"📊 Limitador: {stats}")
+        print(f"   Pico en el servidor: {state['peak']}")
+
+        if stats["increases"] < 3:
+            print("❌ El límite no creció desde el valor inicial")
+            return False
+        if stats["throttled"] and stats["decreases"] < 1:
+            print("❌ El límite no se redujo tras recibir 429")
+            return False
+        if stats["throttled"] > stats["requests"] * 0.1:
+            print("❌ Demasiadas peticiones rechazadas con 429")
+            return False
+    except Exception as e:
+        print(f"❌ Error durante el test: {e}")
+        return False
+    finally:
+        configure_adaptive_concurrency(False)
+        os.environ.pop("AZURE_OPENAI_FAKE_SERVER", None)
+        reload_settings()
+        await close_azure_openai_clients()
+        server.should_exit = True
+        await task
+
+    print("\n✅ La concurrencia se ajustó a la capacidad del servidor")
+    return True
+
+
+async def main():
+    """Función principal del test."""
+    success = await test_adaptive_concurrency()
+    if not success:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+"""
+Test del ejecutor por lotes.
+Lanza 40 prompts con 8 workers contra el servidor falso de chat completions
+y un servidor MCP falso multiplexado, y comprueba que todos terminan y que cada
+resultado se escribe en JSONL. El guion del servidor rechaza con 429 los dos
+primeros intentos de 4 prompts concretos y el cliente no reintenta por su cuenta,
+así que el número de reintentos del lote es exacto.
+También comprueba que los errores no transitorios no se reintentan.
+"""
+
+import asyncio
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# Añadir el directorio padre al path para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents import Agent, OpenAIProvider
+from ai_agents.agent_factory import AgentFactory
+from ai_agents.batch_runner import BatchItem, BatchOptions, run_batch
+from benchmarks.fake_mcp_server import fake_server_config
+from benchmarks.fake_openai_server import FakeModelOptions, run_fake_openai_server
+from openai import AsyncAzureOpenAI
+from servers.server_manager import ServerManager
+
+
+async def test_batch_runner():
+    """Ejecuta un lote y revisa resultados, reintentos y percentiles."""
+    print("📦 Test del ejecutor por lotes")
+    print("=" * 50)
+
+    items = [BatchItem(f"p{i}", f"Prompt número {i}") for i in range(40)]
+    throttled_ids = {"p3", "p11", "p22", "p37"}
+    throttles_per_prompt = 2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / "results.jsonl"
+        script = Path(tmp) / "script.json"
+        script.write_text(json.dumps([
+            {"match": "número (3|11|22|37)$", "throttle": throttles_per_prompt},
+        ]), encoding="utf-8")
+        options = FakeModelOptions(latency_ms=30, jitter_ms=20, retry_after_ms=10, script=str(script))
+        async with run_fake_openai_server(options) as url:
+            # Sin reintentos en el cliente: cada 429 inyectado llega a run_batch
+            client = AsyncAzureOpenAI(api_key="fake", api_version="2024-10-21",
+                                      azure_endpoint=url, max_retries=0)
+            AgentFactory.use_model_provider(OpenAIProvider(openai_client=client, use_responses=False))
+            try:
+                async with ServerManager.create_multiplexed_server(fake_server_config(tools=3)) as mux:
+                    report = await run_batch(
+                        lambda worker: AgentFactory.create_base_agent(
+                            "Batch Agent", "Answer briefly.", [mux.client(f"worker-{worker}")]
+                        ),
+                        items,
+                        output=output,
+                        options=BatchOptions(concurrency=8, retries=5, retry_backoff=0.01),
+                        verbose=False,
+                    )
+            except Exception as e:
+                print(f"❌ Error durante el test: {e}")
+                return False
+            finally:
+                AgentFactory.use_model_provider(None)
+                await client.close()
+
+        print(f"📊 {report}")
+        records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+
+    if report.succeeded != len(items) or report.failed:
+        print("❌ No todas las peticiones terminaron correctamente")
+        return False
+    if sorted(record["id"] for record in records) != sorted(item.id for item in items):
+        print("❌ El JSONL no contiene exactamente un resultado por prompt")
+        return False
+    expected_attempts = {record["id"]: 1 + throttles_per_prompt * (record["id"] in throttled_ids)
+                         for record in records}
+    if report.retries != len(throttled_ids) * throttles_per_prompt or any(
+            record["attempts"] != expected_attempts[record["id"]] for record in records):
+        print(f"❌ Reintentos inesperados: se esperaban {throttles_per_prompt} en {sorted(throttled_ids)}")
+        return False
+    if report.describe()["latency"]["count"] != len(items) or report.throughput <= 0:
+        print("❌ Faltan latencias o throughput en el resumen")
+        return False
+
+    print("\n✅ Lote completado con los reintentos esperados y resultados en JSONL")
+    return True
+
+
+async def test_no_retry_on_permanent_errors():
+    """Un error que no es transitorio (p. ej. herramienta no permitida) falla a la primera."""
+    print("\n🚫 Test de errores no reintentables")
+    print("=" * 50)
+
+    async def reject(agent, prompt):
+        raise ValueError("La herramienta 'write_file' no está permitida para este agente")
+
+    # prepare_agent falla antes de llamar al modelo: basta un agente sin configurar
+    report = await run_batch(Agent(name="Batch Agent", instructions="Answer briefly."), [BatchItem("p0", "Prompt")], prepare_agent=reject,
+                             options=BatchOptions(retries=3, retry_backoff=0.01), verbose=False)
+    if report.failed != 1 or report.retries:
+        print(f"❌ Se reintentó un error permanente: {report}")
+        return False
+
+    print("✅ Los errores permanentes no se reintentan")
+    return True
+
+
+async def main():
+    """Función principal del test."""
+    success = await test_batch_runner() and await test_no_retry_on_permanent_errors()
+    if not success:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
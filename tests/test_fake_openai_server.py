@@ -0,0 +1,99 @@
+"""
+Test de extremo a extremo sin red con el servidor falso de chat completions.
+Apunta el cliente de Azure OpenAI al servidor falso con AZURE_OPENAI_FAKE_SERVER y
+ejecuta un agente de AgentFactory contra el servidor MCP falso: llamadas a
+herramientas guionizadas, streaming y reintentos ante 429 inyectados.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import httpx
+
+# Añadir el directorio padre al path para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents import Runner
+from ai_agents.agent_factory import AgentFactory
+from ai_agents.streaming import run_streamed
+from benchmarks.fake_mcp_server import fake_server_config
+from benchmarks.fake_openai_server import FakeModelOptions, run_fake_openai_server
+from servers.server_manager import ServerManager
+from utils import close_azure_openai_clients, reload_settings
+
+
+SCRIPT = [
+    {"match": "herramienta", "tool_calls": [{"name": "tool_1", "arguments": {"text": "hola"}}],
+     "content": "La herramienta respondió hola."},
+    {"content": "Respuesta guionizada sin herramientas."},
+]
+
+
+async def test_fake_openai_server():
+    """Ejecuta un agente completo contra los servidores falsos."""
+    print("🤖 Test con el servidor falso de chat completions")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        script_path = Path(tmp) / "script.json"
+        script_path.write_text(json.dumps(SCRIPT), encoding="utf-8")
+        options = FakeModelOptions(latency_ms=20, chunk_ms=5, script=str(script_path),
+                                   error_rate=0.2, retry_after_ms=50, seed=1)
+
+        async with run_fake_openai_server(options) as url:
+            os.environ["AZURE_OPENAI_FAKE_SERVER"] = url
+            reload_settings()
+            try:
+                async with ServerManager.create_servers(fake_server_config(tools=3)) as (server,):
+                    agent = AgentFactory.create_base_agent(
+                        "Fake Agent", "Use your tools when asked.", [server]
+                    )
+
+                    result = await Runner.run(starting_agent=agent, input="Usa una herramienta")
+                    print(f"   Respuesta: {result.final_output}")
+                    tool_outputs = [item for item in result.new_items if item.type == "tool_call_output_item"]
+                    if result.final_output != "La herramienta respondió hola." or len(tool_outputs) != 1:
+                        print("❌ El agente no ejecutó la herramienta guionizada")
+                        return False
+
+                    result, timings = await run_streamed(agent, "Solo responde", on_text=None)
+                    print(f"   Streaming: {result.final_output} ({timings})")
+                    if result.final_output != "Respuesta guionizada sin herramientas." or timings.text_deltas < 2:
+                        print("❌ La respuesta en streaming no llegó por fragmentos")
+                        return False
+
+                async with httpx.AsyncClient() as client:
+                    stats = (await client.get(f"{url}/stats")).json()
+                print(f"📊 Servidor falso: {stats}")
+                if stats["streamed"] < 1 or stats["tool_call_replies"] < 1:
+                    print("❌ El servidor no registró streaming o llamadas a herramientas")
+                    return False
+                # Con la semilla fija la primera petición recibe un 429 que el cliente reintenta
+                if stats["throttled"] < 1:
+                    print("❌ No se inyectó ningún 429")
+                    return False
+            except Exception as e:
+                print(f"❌ Error durante el test: {e}")
+                return False
+            finally:
+                os.environ.pop("AZURE_OPENAI_FAKE_SERVER", None)
+                reload_settings()
+                await close_azure_openai_clients()
+
+    print("\n✅ Agente ejecutado de extremo a extremo sin deployment real")
+    return True
+
+
+async def main():
+    """Función principal del test."""
+    success = await test_fake_openai_server()
+    if not success:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
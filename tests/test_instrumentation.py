@@ -0,0 +1,72 @@
+"""
+Test de la atribución de herramientas a servidores MCP en la instrumentación.
+tool_server_name depende de cómo el SDK envuelve las herramientas MCP (un
+functools.partial con el servidor), que no es API pública. Este test lanza el
+servidor MCP falso, obtiene las herramientas del agente como lo hace Runner.run
+y comprueba que cada una se atribuye al servidor y no a "local".
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Añadir el directorio padre al path para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents import Agent, RunContextWrapper, function_tool
+from ai_agents.instrumentation import tool_server_name
+from benchmarks.fake_mcp_server import fake_server_config
+from servers.server_manager import ServerManager
+
+
+@function_tool
+def local_echo(text: str) -> str:
+    """Devuelve el texto recibido."""
+    return text
+
+
+async def test_tool_server_name():
+    """Verifica la atribución de herramientas MCP y locales."""
+    print("🏷️  Test de atribución de herramientas a servidores MCP")
+    print("=" * 50)
+
+    try:
+        import agents.version
+        print(f"   openai-agents {agents.version.__version__}")
+    except ImportError:
+        pass
+
+    config = fake_server_config(tools=3, name="Fake Attribution Server")
+    try:
+        async with ServerManager.create_servers(config) as (server,):
+            agent = Agent(name="Attribution Agent", mcp_servers=[server], tools=[local_echo])
+            tools = await agent.get_all_tools(RunContextWrapper(context=None))
+    except Exception as e:
+        print(f"❌ Error durante el test: {e}")
+        return False
+
+    names = {tool.name: tool_server_name(tool) for tool in tools}
+    print(f"📊 {names}")
+
+    if names.get("local_echo") != "local":
+        print("❌ La function tool propia no se atribuye a 'local'")
+        return False
+    mcp_names = {name: server_name for name, server_name in names.items() if name != "local_echo"}
+    if len(mcp_names) != 3 or set(mcp_names.values()) != {config.name}:
+        print("❌ Las herramientas MCP no se atribuyen a su servidor: "
+              "¿ha cambiado cómo el SDK envuelve on_invoke_tool?")
+        return False
+
+    print("\n✅ Herramientas MCP atribuidas a su servidor")
+    return True
+
+
+async def main():
+    """Función principal del test."""
+    success = await test_tool_server_name()
+    if not success:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+"""
+Test del servidor MCP diferido.
+Comprueba que create_lazy_server activa la caché de herramientas, que un
+segundo "proceso" (otra instancia de la caché sobre el mismo directorio) anuncia
+el listado desde disco sin lanzar el servidor, y que la versión que npx resolvió
+para un paquete ``@latest`` se fija en el lockfile con la misma clave de caché
+que calculará el siguiente proceso. También llama a una herramienta con los
+metadatos ``meta`` que pasa el SDK a través del proxy.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Añadir el directorio padre al path para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.fake_mcp_server import fake_server_config
+from servers.server_installer import ServerInstaller
+from servers.server_manager import ServerConfig, ServerManager
+from servers.tool_cache import ToolListCache
+
+
+async def test_lazy_server(cache_dir: Path):
+    """Lanza el servidor diferido una vez y lo anuncia desde disco en la siguiente."""
+    print("💤 Test del servidor MCP diferido")
+    print("=" * 50)
+
+    fake = fake_server_config(tools=4, name="Fake Lazy Server")
+    config = ServerConfig(fake.name, fake.command, fake.args, version="1.0.0")
+
+    try:
+        ServerManager.enable_tool_cache(False)
+        ServerManager.create_lazy_server(config)
+        if ServerManager.get_tool_cache() is None:
+            print("❌ create_lazy_server no activó la caché de herramientas")
+            return False
+
+        ServerManager.enable_tool_cache(cache_dir=str(cache_dir))
+        async with ServerManager.create_lazy_server(config) as server:
+            tools = await server.list_tools()
+            print(f"   Primer proceso: {len(tools)} herramientas (lanzado: {server.spawned})")
+            if not server.spawned:
+                print("❌ Sin entrada en caché el servidor debía lanzarse")
+                return False
+
+        # Nueva instancia de la caché sobre el mismo directorio: como otro proceso
+        ServerManager.enable_tool_cache(cache_dir=str(cache_dir))
+        async with ServerManager.create_lazy_server(config) as server:
+            tools = await server.list_tools()
+            print(f"   Segundo proceso: {len(tools)} herramientas (lanzado: {server.spawned})")
+            if server.spawned or len(tools) != 4:
+                print("❌ El listado no se anunció desde disco")
+                return False
+
+            # El SDK pasa meta= a call_tool cuando el agente lo define
+            result = await server.call_tool("tool_1", {"text": "hola"}, meta={"origen": "test"})
+            print(f"   Llamada con meta: {result.content[0].text[:40]!r} (lanzado: {server.spawned})")
+            if result.isError or not server.spawned:
+                print("❌ La llamada con meta no llegó al servidor")
+                return False
+    except Exception as e:
+        print(f"❌ Error durante el test: {e}")
+        return False
+    finally:
+        ServerManager.enable_tool_cache(False)
+
+    print("\n✅ El servidor diferido anuncia sus herramientas sin lanzarse")
+    return True
+
+
+def test_pin_version(tmp: Path):
+    """Fija la versión de la caché de npx y comprueba la clave de caché resultante."""
+    print("\n📌 Test del fijado de versión de paquetes @latest")
+    print("=" * 50)
+
+    package_json = tmp / "npm" / "_npx" / "0123abcd" / "node_modules" / "@playwright" / "mcp" / "package.json"
+    package_json.parent.mkdir(parents=True)
+    package_json.write_text(json.dumps({"name": "@playwright/mcp", "version": "0.0.41"}), encoding="utf-8")
+    os.environ["npm_config_cache"] = str(tmp / "npm")
+
+    lock_file = tmp / "mcp_servers.lock.json"
+    config = ServerConfig("Playwright Server", "npx", ["-y", "@playwright/mcp@latest", "--headless"])
+    try:
+        pinned = ServerInstaller(install_dir=tmp / "install", lock_file=lock_file).pin_version(config)
+        # El siguiente proceso parte de la misma configuración y la resuelve con el lockfile
+        next_process = ServerInstaller(install_dir=tmp / "install", lock_file=lock_file).resolve(config)
+    finally:
+        os.environ.pop("npm_config_cache", None)
+
+    print(f"   Configuración fijada: {pinned.args if pinned else None}")
+    print(f"   Lockfile: {lock_file.read_text(encoding='utf-8').strip()}")
+    if pinned is None or pinned.package_version != "0.0.41" or not ToolListCache.is_persistent(pinned):
+        print("❌ No se fijó la versión resuelta por npx")
+        return False
+    if ToolListCache.cache_key(pinned) != ToolListCache.cache_key(next_process):
+        print("❌ El siguiente proceso no usaría la misma clave de caché")
+        return False
+
+    print("\n✅ La versión resuelta por npx queda fijada en el lockfile")
+    return True
+
+
+async def main():
+    """Función principal del test."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        success = await test_lazy_server(tmp / "mcp_tools") and test_pin_version(tmp)
+    if not success:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
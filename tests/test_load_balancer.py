@@ -0,0 +1,217 @@
+"""
+Test del balanceo entre deployments de Azure OpenAI.
+Levanta dos servidores locales compatibles con OpenAI (uno sano y otro que
+devuelve 500) y verifica que el tráfico se desvía al sano y que el backend
+con errores queda fuera de la rotación tras ``failure_threshold`` fallos seguidos.
+También comprueba que un backend readmitido tras el cool-down necesita otros
+``failure_threshold`` fallos para volver a salir, y que el proveedor de
+AZURE_OPENAI_BACKENDS se reconstruye al cerrar los clientes o recargar la configuración.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import openai
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+# Añadir el directorio padre al path para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents import Runner
+from ai_agents.agent_factory import AgentFactory
+from utils import close_azure_openai_clients, reload_settings
+from utils.load_balancer import LoadBalancedProvider, LoadBalancer, get_load_balanced_provider
+from utils.settings import BackendConfig
+
+
+def create_fake_openai_app(name: str, fail: bool = False) -> Starlette:
+    """Servidor mínimo de chat completions que responde con su propio nombre."""
+    async def chat_completions(request):
+        if fail:
+            return JSONResponse({"error": {"message": f"{name} caído"}}, status_code=500)
+        return JSONResponse({
+            "id": f"chatcmpl-{name}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": name,
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": f"respuesta de {name}"},
+            }],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 3, "total_tokens": 13},
+        })
+
+    return Starlette(routes=[
+        Route("/openai/deployments/{deployment}/chat/completions", chat_completions, methods=["POST"]),
+    ])
+
+
+async def test_load_balancer():
+    """Envía varias peticiones y comprueba el failover."""
+    print("⚖️  Test de balanceo entre deployments")
+    print("=" * 50)
+
+    servers = [
+        uvicorn.Server(uvicorn.Config(create_fake_openai_app("sano"), port=18101, log_level="warning")),
+        uvicorn.Server(uvicorn.Config(create_fake_openai_app("roto", fail=True), port=18102, log_level="warning")),
+    ]
+    tasks = [asyncio.create_task(server.serve()) for server in servers]
+    while not all(server.started for server in servers):
+        await asyncio.sleep(0.05)
+
+    balancer = LoadBalancer([
+        BackendConfig("http://127.0.0.1:18101", "gpt", api_key="k", api_version="2024-10-21", name="sano"),
+        BackendConfig("http://127.0.0.1:18102", "gpt", api_key="k", api_version="2024-10-21", name="roto"),
+    ], cooldown=60)
+    AgentFactory.use_model_provider(LoadBalancedProvider(balancer))
+
+    try:
+        agent = AgentFactory.create_base_agent("Balanced Agent", "Answer briefly.")
+        for attempt in range(10):
+            result = await Runner.run(starting_agent=agent, input="Hola")
+            print(f"   Petición {attempt + 1}: {result.final_output}")
+            if result.final_output != "respuesta de sano":
+                print("❌ La respuesta no vino del backend sano")
+                return False
+
+        status = {backend["name"]: backend for backend in balancer.describe()}
+        print(f"📊 Estado: {status}")
+        # La elección es aleatoria: puede que "roto" no se elija las suficientes veces,
+        # pero al llegar al umbral de fallos debe quedar apartado y no recibir más peticiones
+        roto, threshold = status["roto"], balancer.failure_threshold
+        if roto["requests"] > threshold or (roto["requests"] == threshold and roto["available"]):
+            print("❌ El backend con errores no se apartó de la rotación")
+            return False
+    except Exception as e:
+        print(f"❌ Error durante el test: {e}")
+        return False
+    finally:
+        AgentFactory.use_model_provider(None)
+        await balancer.close()
+        for server in servers:
+            server.should_exit = True
+        await asyncio.gather(*tasks)
+
+    print("\n✅ El balanceador desvió el tráfico al backend sano")
+    return True
+
+
+async def test_readmission():
+    """Aparta un backend, espera al fin del cool-down y cuenta los fallos de nuevo."""
+    print("\n🔄 Test de readmisión tras el cool-down")
+    print("=" * 50)
+
+    balancer = LoadBalancer([
+        BackendConfig("http://127.0.0.1:18101", "gpt", api_key="k", api_version="2024-10-21", name="a"),
+        BackendConfig("http://127.0.0.1:18102", "gpt", api_key="k", api_version="2024-10-21", name="b"),
+    ], cooldown=0.2, failure_threshold=3)
+    backend = balancer.backends[0]
+    request = httpx.Request("POST", "http://127.0.0.1:18101/openai/deployments/gpt/chat/completions")
+    connection_error = openai.APIConnectionError(request=request)
+    throttled = openai.RateLimitError(
+        "429", response=httpx.Response(429, headers={"retry-after": "0.2"}, request=request), body=None
+    )
+
+    try:
+        for _ in range(balancer.failure_threshold):
+            balancer.record_failure(backend, connection_error)
+        if backend.available or backend.stats["ejections"] != 1:
+            print("❌ El backend no se apartó al llegar al umbral")
+            return False
+
+        await asyncio.sleep(0.3)
+        balancer.record_failure(backend, connection_error)
+        print(f"📊 Tras readmitirlo y un fallo: {backend.describe()}")
+        if not backend.available:
+            print("❌ El primer error tras el cool-down volvió a apartarlo")
+            return False
+
+        balancer.record_failure(backend, throttled)
+        print(f"📊 Tras un 429: {backend.describe()}")
+        if backend.available or backend.stats["ejections"] != 2 or backend.failures != 2:
+            print("❌ El 429 no apartó el backend durante su retry-after o no se contó")
+            return False
+        if backend.ejected_until - time.monotonic() > 0.3:
+            print("❌ Un 429 aislado aplicó el cool-down completo")
+            return False
+    finally:
+        await balancer.close()
+
+    print("\n✅ Los fallos se cuentan de nuevo tras el cool-down")
+    return True
+
+
+def set_backends(*names: str):
+    """Define AZURE_OPENAI_BACKENDS con backends sanos de nombre ``names`` y recarga la configuración."""
+    os.environ["AZURE_OPENAI_BACKENDS"] = json.dumps([
+        {"endpoint": "http://127.0.0.1:18105", "deployment": "gpt", "api_key": "k",
+         "api_version": "2024-10-21", "name": name}
+        for name in names
+    ])
+    reload_settings()
+
+
+async def test_provider_lifecycle():
+    """Cierra los clientes y cambia AZURE_OPENAI_BACKENDS entre ejecuciones."""
+    print("\n♻️  Test del ciclo de vida del proveedor balanceado")
+    print("=" * 50)
+
+    server = uvicorn.Server(uvicorn.Config(create_fake_openai_app("sano"), port=18105, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    try:
+        set_backends("a")
+        first = get_load_balanced_provider()
+        agent = AgentFactory.create_base_agent("Balanced Agent", "Answer briefly.")
+        result = await Runner.run(starting_agent=agent, input="Hola")
+        print(f"   Antes de cerrar: {result.final_output}")
+
+        await close_azure_openai_clients()
+        agent = AgentFactory.create_base_agent("Balanced Agent", "Answer briefly.")
+        result = await Runner.run(starting_agent=agent, input="Hola")
+        print(f"   Tras cerrar los clientes: {result.final_output}")
+        if get_load_balanced_provider() is first:
+            print("❌ El proveedor sigue usando los clientes cerrados")
+            return False
+
+        set_backends("a", "b")
+        names = [backend.name for backend in get_load_balanced_provider().balancer.backends]
+        print(f"   Tras recargar la configuración: {names}")
+        if names != ["a", "b"]:
+            print("❌ El proveedor no se reconstruyó al cambiar AZURE_OPENAI_BACKENDS")
+            return False
+    except Exception as e:
+        print(f"❌ Error durante el test: {e}")
+        return False
+    finally:
+        os.environ.pop("AZURE_OPENAI_BACKENDS", None)
+        reload_settings()
+        await close_azure_openai_clients()
+        server.should_exit = True
+        await task
+
+    print("\n✅ El proveedor se reconstruye tras cerrar los clientes y al recargar")
+    return True
+
+
+async def main():
+    """Función principal del test."""
+    success = (await test_load_balancer() and await test_readmission()
+               and await test_provider_lifecycle())
+    if not success:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,160 @@
+"""
+Test del limitador RPM/TPM contra el servidor falso de chat completions.
+Comprueba que el bucket solo acumula la ráfaga de ``DEFAULT_BURST_SECONDS`` y
+espacia el resto al ritmo del cupo, que cada deployment tiene su propio
+limitador, que el cupo se ajusta a x-ratelimit-remaining-requests y que un 429
+pausa las peticiones siguientes durante su retry-after.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import openai
+
+# Añadir el directorio padre al path para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.fake_openai_server import FakeModelOptions, run_fake_openai_server
+from utils import close_azure_openai_clients, configure_rate_limit, get_rate_limiter
+from utils.azure_client import get_shared_client
+from utils.rate_limiter import DEFAULT_BURST_SECONDS
+
+
+API_VERSION = "2024-10-21"
+
+
+def client_for(url: str, deployment: str):
+    """Cliente compartido del deployment, sin reintentos del SDK para ver cada 429."""
+    return get_shared_client("k", API_VERSION, url, deployment=deployment).with_options(max_retries=0)
+
+
+async def send(client, deployment: str) -> float:
+    """Envía una petición y retorna el instante en que terminó."""
+    await client.chat.completions.create(model=deployment, messages=[{"role": "user", "content": "Hola"}])
+    return time.monotonic()
+
+
+async def test_burst_and_spacing():
+    """Envía más peticiones que la ráfaga permitida y mide su espaciado."""
+    print("🚦 Test de ráfaga y espaciado del limitador")
+    print("=" * 50)
+
+    rpm = 60
+    burst = int(rpm / 60 * DEFAULT_BURST_SECONDS)
+    configure_rate_limit(requests_per_minute=rpm)
+
+    async with run_fake_openai_server(FakeModelOptions(requests_per_minute=rpm)) as url:
+        try:
+            client = client_for(url, "a")
+            started = time.monotonic()
+            finished = sorted(await asyncio.gather(*(send(client, "a") for _ in range(burst + 3))))
+            offsets = [round(t - started, 2) for t in finished]
+            print(f"   Fin de cada petición (s): {offsets}")
+            if offsets[burst - 1] > 0.5:
+                print("❌ La ráfaga inicial no salió de golpe")
+                return False
+            gaps = [b - a for a, b in zip(finished[burst - 1:], finished[burst:])]
+            if any(gap < 0.8 for gap in gaps):
+                print(f"❌ Las peticiones tras la ráfaga no se espaciaron a {rpm} RPM: {gaps}")
+                return False
+
+            # Otro deployment del mismo endpoint tiene su propio cupo
+            other_started = time.monotonic()
+            await send(client_for(url, "b"), "b")
+            other_elapsed = time.monotonic() - other_started
+            limiter_a, limiter_b = get_rate_limiter(url, "a"), get_rate_limiter(url, "b")
+            print(f"   Deployment b: {other_elapsed:.2f}s; a: {limiter_a.describe()}")
+            if limiter_a is limiter_b or other_elapsed > 0.5:
+                print("❌ Los deployments comparten el limitador")
+                return False
+            if limiter_a.stats["requests"] != burst + 3 or limiter_b.stats["requests"] != 1:
+                print("❌ El limitador no contó las peticiones de su deployment")
+                return False
+        except Exception as e:
+            print(f"❌ Error durante el test: {e}")
+            return False
+        finally:
+            await close_azure_openai_clients()
+
+    print("\n✅ El limitador respeta la ráfaga y espacia el resto por deployment")
+    return True
+
+
+async def test_remaining_drain():
+    """El servidor anuncia menos cupo del que cree el cliente."""
+    print("\n📉 Test de ajuste a x-ratelimit-remaining")
+    print("=" * 50)
+
+    configure_rate_limit(requests_per_minute=60)
+
+    async with run_fake_openai_server(FakeModelOptions(requests_per_minute=3)) as url:
+        try:
+            client = client_for(url, "a")
+            for _ in range(3):
+                await send(client, "a")
+            limiter = get_rate_limiter(url, "a")
+            print(f"   Restante según el servidor: {limiter.remaining}; {limiter.describe()}")
+            if limiter.remaining.get("requests") != 0 or limiter.requests.available >= 1:
+                print("❌ El bucket no se vació al agotar el servidor su cupo")
+                return False
+        except Exception as e:
+            print(f"❌ Error durante el test: {e}")
+            return False
+        finally:
+            await close_azure_openai_clients()
+
+    print("\n✅ El cupo local se ajusta al que anuncia el servidor")
+    return True
+
+
+async def test_retry_after_pause():
+    """Tras un 429 la siguiente petición espera el retry-after."""
+    print("\n⏳ Test de pausa tras un 429")
+    print("=" * 50)
+
+    retry_after = 0.8
+    configure_rate_limit(requests_per_minute=600)
+
+    options = FakeModelOptions(error_rate=1.0, retry_after_ms=retry_after * 1000)
+    async with run_fake_openai_server(options) as url:
+        try:
+            client = client_for(url, "a")
+            finished = []
+            for _ in range(2):
+                try:
+                    await send(client, "a")
+                    print("❌ El servidor falso no devolvió 429")
+                    return False
+                except openai.RateLimitError:
+                    finished.append(time.monotonic())
+            limiter = get_rate_limiter(url, "a")
+            pause = finished[1] - finished[0]
+            print(f"   Entre los dos 429: {pause:.2f}s; {limiter.describe()}")
+            if pause < retry_after - 0.05:
+                print(f"❌ La segunda petición no esperó el retry-after de {retry_after}s")
+                return False
+            if limiter.stats["throttled"] != 2:
+                print("❌ El limitador no contó los 429")
+                return False
+        except Exception as e:
+            print(f"❌ Error durante el test: {e}")
+            return False
+        finally:
+            await close_azure_openai_clients()
+
+    print("\n✅ El limitador se pausa durante el retry-after de un 429")
+    return True
+
+
+async def main():
+    """Función principal del test."""
+    success = (await test_burst_and_spacing() and await test_remaining_drain()
+               and await test_retry_after_pause())
+    if not success:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
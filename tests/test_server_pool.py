@@ -0,0 +1,165 @@
+"""
+Test del pool de servidores MCP.
+Verifica que préstamos consecutivos reutilicen el mismo proceso ya inicializado
+y que un servidor cuyo proceso muere (ocioso o prestado) se descarte. También
+comprueba que un error al construir el servidor llega a quien lo arranca y que
+create_servers() falla sin esperar a los servidores lentos, con y sin
+supervisión. Usa el servidor MCP falso, así que no necesita npx ni red.
+"""
+
+import asyncio
+import os
+import signal
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Añadir el directorio padre al path para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.fake_mcp_server import fake_server_config
+from servers.server_manager import ServerConfig, ServerManager
+from servers.server_pool import ServerHandle
+
+
+def kill_server(pid_file: Path):
+    """Mata el proceso del servidor falso sin pasar por el cierre MCP."""
+    os.kill(int(pid_file.read_text(encoding="utf-8")), signal.SIGKILL)
+
+
+async def test_server_pool(pid_file: Path):
+    """Presta el servidor varias veces y mide el tiempo de cada préstamo."""
+    print("♻️  Test del pool de servidores MCP")
+    print("=" * 50)
+
+    config = fake_server_config(tools=3, name="Fake Pool Server", pid_file=pid_file)
+    pool = ServerManager.get_server_pool(max_size=1, idle_ttl=60)
+
+    try:
+        server_ids = []
+        for attempt in range(3):
+            started = time.perf_counter()
+            async with ServerManager.lease_servers(config) as [server]:
+                tools = await server.list_tools()
+                server_ids.append(id(server))
+            elapsed = time.perf_counter() - started
+            print(f"   Préstamo {attempt + 1}: {len(tools)} herramientas en {elapsed:.2f}s")
+
+        print(f"📊 Estado del pool: {pool.describe()}")
+        if len(set(server_ids)) != 1 or pool.stats["created"] != 1:
+            print("❌ El pool lanzó más de un proceso para la misma configuración")
+            return False
+    except Exception as e:
+        print(f"❌ Error durante el test: {e}")
+        return False
+    finally:
+        await ServerManager.close_server_pool()
+
+    print("\n✅ El pool reutilizó el servidor en todos los préstamos")
+    return True
+
+
+async def test_dead_servers(pid_file: Path):
+    """Mata el proceso mientras está ocioso y mientras está prestado."""
+    print("\n💀 Test de servidores caídos")
+    print("=" * 50)
+
+    config = fake_server_config(tools=3, name="Fake Pool Server", pid_file=pid_file)
+    pool = ServerManager.get_server_pool(max_size=1, idle_ttl=60)
+
+    try:
+        await pool.warm(config)
+        kill_server(pid_file)
+        await asyncio.sleep(0.2)
+
+        # Ocioso: el ping previo a reutilizarlo lo descarta y se lanza otro proceso
+        async with ServerManager.lease_servers(config) as [server]:
+            tools = await server.list_tools()
+            print(f"   Tras la caída en reposo: {len(tools)} herramientas")
+            # Prestado: el health-check de la devolución lo descarta
+            kill_server(pid_file)
+            await asyncio.sleep(0.2)
+
+        print(f"📊 Estado del pool: {pool.describe()}")
+        if pool.stats["created"] != 2 or pool.stats["unhealthy"] != 2 or pool.stats["reused"] != 0:
+            print("❌ El pool reutilizó un servidor cuyo proceso había muerto")
+            return False
+        if sum(pool.describe()["idle"].values()) != 0:
+            print("❌ El servidor caído volvió al pool")
+            return False
+    except Exception as e:
+        print(f"❌ Error durante el test: {e}")
+        return False
+    finally:
+        await ServerManager.close_server_pool()
+
+    print("\n✅ Los servidores caídos se descartan al prestarse y al devolverse")
+    return True
+
+
+async def test_broken_config():
+    """Un constructor que falla debe propagar su error en lugar de colgar start()."""
+    print("\n🧱 Test de configuración que no se puede construir")
+    print("=" * 50)
+
+    config = fake_server_config(tools=3, name="Fake Broken Server")
+
+    def broken_server():
+        raise ValueError("❌ ERROR: transporte MCP desconocido: fake")
+
+    config.create_server = broken_server
+    handle = ServerHandle(config)
+    try:
+        await asyncio.wait_for(handle.start(), timeout=5)
+        print("❌ start() no propagó el error del constructor")
+        return False
+    except asyncio.TimeoutError:
+        print("❌ start() se quedó esperando un servidor que nunca se creó")
+        return False
+    except ValueError as e:
+        print(f"   start() falló con: {e}")
+    finally:
+        await handle.stop()
+
+    print("\n✅ El error de construcción llega a start()")
+    return True
+
+
+async def test_fail_fast():
+    """Un servidor que no arranca cancela a los que aún arrancan."""
+    print("\n⚡ Test de fallo rápido al lanzar varios servidores")
+    print("=" * 50)
+
+    slow = fake_server_config(tools=3, startup_ms=10000, name="Fake Slow Server")
+    missing = ServerConfig(name="Missing Server", command="comando-mcp-que-no-existe", args=[])
+
+    for supervised in (False, True):
+        started = time.perf_counter()
+        try:
+            async with ServerManager.create_servers(slow, missing, supervised=supervised):
+                print("❌ create_servers() arrancó un servidor inexistente")
+                return False
+        except Exception as e:
+            elapsed = time.perf_counter() - started
+            print(f"   supervised={supervised}: falló en {elapsed:.2f}s ({type(e).__name__})")
+        if elapsed > 5:
+            print("❌ create_servers() esperó al servidor lento antes de fallar")
+            return False
+
+    print("\n✅ El primer error detiene el arranque de los demás servidores")
+    return True
+
+
+async def main():
+    """Función principal del test."""
+    with tempfile.TemporaryDirectory() as tmp:
+        pid_file = Path(tmp) / "fake_server.pid"
+        success = (await test_server_pool(pid_file) and await test_dead_servers(pid_file)
+                   and await test_broken_config() and await test_fail_fast())
+    if not success:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,135 @@
+"""
+Test de la memoria de conversación acotada.
+Mantiene una conversación de 30 turnos contra el servidor falso de chat
+completions y comprueba que los turnos antiguos se resumen, que el historial
+enviado no supera el presupuesto de tokens y que la sesión persiste en SQLite.
+También comprueba que '/reset' y el cierre durante un plegado no rompen la sesión.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Añadir el directorio padre al path para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from agents import Runner
+from ai_agents.agent_factory import AgentFactory
+from ai_agents.session_memory import SummarizingSession, estimate_item_tokens
+from benchmarks.fake_openai_server import FakeModelOptions, run_fake_openai_server
+from utils import close_azure_openai_clients, reload_settings
+
+TURNS = 30
+BUDGET = 1200
+
+
+async def test_session_memory():
+    """Conversación larga con ventana de 3 turnos y presupuesto fijo."""
+    print("🧠 Test de memoria de conversación acotada")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "sessions.sqlite"
+        async with run_fake_openai_server(FakeModelOptions(latency_ms=5, words=40)) as url:
+            os.environ["AZURE_OPENAI_FAKE_SERVER"] = url
+            reload_settings()
+            try:
+                agent = AgentFactory.create_base_agent("Memory Agent", "Answer briefly.")
+                session = SummarizingSession("chat", path=path, keep_turns=3,
+                                             max_context_tokens=BUDGET, summary_tokens=200)
+                prompt_tokens = []
+                for turn in range(TURNS):
+                    history = await session.get_items()
+                    if sum(estimate_item_tokens(item) for item in history) > BUDGET:
+                        print(f"❌ El historial del turno {turn} supera el presupuesto")
+                        return False
+                    result = await Runner.run(agent, f"Pregunta {turn}: ¿qué dijimos antes?", session=session)
+                    prompt_tokens.append(result.context_wrapper.usage.input_tokens)
+
+                await session.get_items()  # espera al último plegado
+                memory = session.describe()
+                await session.close()
+                print(f"📊 Memoria: {memory}")
+                print(f"   Tokens de prompt: turno 5 = {prompt_tokens[5]}, último = {prompt_tokens[-1]}, "
+                      f"máximo = {max(prompt_tokens)}")
+
+                if memory["summarized_turns"] < TURNS - 3 - 1 or memory["folds"] < 1:
+                    print("❌ Los turnos antiguos no se resumieron")
+                    return False
+                if max(prompt_tokens[10:]) > 2 * max(prompt_tokens[:10]):
+                    print("❌ El coste por turno sigue creciendo con la conversación")
+                    return False
+
+                reopened = SummarizingSession("chat", path=path, keep_turns=3, max_context_tokens=BUDGET)
+                items = await reopened.get_items()
+                await reopened.close()
+                if not items or items[0]["role"] != "system" or "Pregunta 29" not in str(items):
+                    print("❌ La sesión no se recuperó desde SQLite")
+                    return False
+            except Exception as e:
+                print(f"❌ Error durante el test: {e}")
+                return False
+            finally:
+                os.environ.pop("AZURE_OPENAI_FAKE_SERVER", None)
+                reload_settings()
+                await close_azure_openai_clients()
+
+    print("\n✅ Historial acotado, resumido y persistente")
+    return True
+
+
+def _turn(number: int):
+    return [{"role": "user", "content": f"Pregunta {number}"},
+            {"role": "assistant", "content": f"Respuesta {number}"}]
+
+
+async def test_reset_during_fold():
+    """Borrar o cerrar la sesión con un plegado en curso no deja una tarea cancelada pendiente."""
+    print("\n🧹 Test de '/reset' durante un plegado")
+    print("=" * 50)
+
+    async def slow_summarizer(summary: str, transcript: str, max_tokens: int) -> str:
+        await asyncio.sleep(10)
+        return summary
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "sessions.sqlite"
+        session = SummarizingSession("reset", path=path, keep_turns=1, summarizer=slow_summarizer)
+        try:
+            for number in range(3):
+                await session.add_items(_turn(number))
+            await asyncio.sleep(0)  # deja arrancar el plegado
+            await session.clear_session()
+            if await session.get_items():
+                print("❌ La sesión conserva items tras '/reset'")
+                return False
+            await session.add_items(_turn(3))
+            items = await session.get_items()
+            if "Pregunta 3" not in str(items):
+                print("❌ La sesión no admite turnos nuevos tras '/reset'")
+                return False
+
+            for number in range(4, 7):
+                await session.add_items(_turn(number))
+            await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            print("❌ get_items propagó la cancelación del plegado")
+            return False
+        finally:
+            await session.close()
+
+    print("✅ '/reset' y cierre con un plegado en curso")
+    return True
+
+
+async def main():
+    """Función principal del test."""
+    success = await test_session_memory() and await test_reset_during_fold()
+    if not success:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
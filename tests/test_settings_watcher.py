@@ -0,0 +1,77 @@
+"""
+Test del watcher de configuración.
+Edita un .env temporal con un valor no válido y después con uno válido, y
+comprueba que el watcher conserva el snapshot anterior, sigue vivo y aplica
+la edición válida.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Añadir el directorio padre al path para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.settings import get_settings, reload_settings, watch_settings
+
+
+def write_env(path: Path, rpm: str, mtime: float):
+    """Escribe el .env con una fecha de modificación explícita (sin depender de la resolución del reloj)."""
+    path.write_text(f"AZURE_OPENAI_RPM={rpm}\n", encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+def wait_for(condition, timeout: float = 3.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return condition()
+
+
+def test_settings_watcher():
+    """Un .env no válido no detiene el watcher."""
+    print("🔄 Test del watcher de configuración")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env_file = Path(tmp) / ".env"
+        now = time.time()
+        write_env(env_file, "60", now - 30)
+        os.environ["DOTENV_PATH"] = str(env_file)
+        os.environ.pop("AZURE_OPENAI_RPM", None)
+        reload_settings()
+        watcher = watch_settings(interval=0.1)
+        try:
+            write_env(env_file, "sesenta", now - 20)
+            time.sleep(0.5)
+            print(f"   Tras el valor no válido: RPM={get_settings().requests_per_minute}")
+            if get_settings().requests_per_minute != 60 or not watcher._thread.is_alive():
+                print("❌ El valor no válido sustituyó el snapshot o detuvo el watcher")
+                return False
+
+            write_env(env_file, "120", now - 10)
+            if not wait_for(lambda: get_settings().requests_per_minute == 120):
+                print("❌ El watcher no aplicó la edición válida posterior")
+                return False
+            print(f"   Tras el valor válido: RPM={get_settings().requests_per_minute}")
+        finally:
+            watcher.stop()
+            os.environ.pop("DOTENV_PATH", None)
+            os.environ.pop("AZURE_OPENAI_RPM", None)
+
+    print("\n✅ El watcher sobrevive a un .env no válido")
+    return True
+
+
+def main():
+    """Función principal del test."""
+    if not test_settings_watcher():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
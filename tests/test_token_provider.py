@@ -0,0 +1,182 @@
+"""
+Test de la autenticación con Entra ID.
+Usa un credential simulado (lento y con tokens de vida corta) y un servidor local
+compatible con OpenAI para verificar que el token se cachea, se renueva en
+segundo plano y que ninguna petición espera a que se obtenga uno nuevo. También
+comprueba que una renovación fallida se reintenta cada retry_interval.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import List, NamedTuple
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+# Añadir el directorio padre al path para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.azure_client import AzureOpenAIConfig, close_azure_openai_clients
+from utils.settings import Settings
+from utils.token_provider import TokenProvider
+
+
+class AccessToken(NamedTuple):
+    token: str
+    expires_on: int
+
+
+class StubCredential:
+    """Credential síncrono que tarda `delay` segundos y emite tokens de `lifetime` segundos."""
+
+    def __init__(self, lifetime: float = 3.0, delay: float = 0.5):
+        self.lifetime = lifetime
+        self.delay = delay
+        self.issued = 0
+
+    def get_token(self, *scopes):
+        time.sleep(self.delay)
+        self.issued += 1
+        return AccessToken(f"token-{self.issued}", int(time.time() + self.lifetime))
+
+
+class FlakyCredential(StubCredential):
+    """Credential cuyas llamadas 2..failures+1 fallan; anota cuándo se le pide cada token."""
+
+    def __init__(self, lifetime: float, failures: int):
+        super().__init__(lifetime=lifetime, delay=0.0)
+        self.failures = failures
+        self.calls: List[float] = []
+
+    def get_token(self, *scopes):
+        self.calls.append(time.monotonic())
+        if 1 < len(self.calls) <= self.failures + 1:
+            raise RuntimeError("Entra ID no disponible")
+        return super().get_token(*scopes)
+
+
+def create_fake_openai_app(seen_tokens: List[str]) -> Starlette:
+    """Servidor mínimo de chat completions que anota el token bearer recibido."""
+    async def chat_completions(request):
+        seen_tokens.append(request.headers.get("authorization", ""))
+        return JSONResponse({
+            "id": "chatcmpl-entra",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": "ok"},
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        })
+
+    return Starlette(routes=[
+        Route("/openai/deployments/{deployment}/chat/completions", chat_completions, methods=["POST"]),
+    ])
+
+
+async def test_token_provider():
+    """Envía peticiones durante varias renovaciones y mide la espera por token."""
+    print("🔐 Test de autenticación con Entra ID")
+    print("=" * 50)
+
+    seen_tokens: List[str] = []
+    server = uvicorn.Server(uvicorn.Config(create_fake_openai_app(seen_tokens), port=18103, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    credential = StubCredential(lifetime=3.0, delay=0.5)
+    provider = TokenProvider(credential, refresh_margin=1.5, expiry_skew=0.2)
+    config = AzureOpenAIConfig(
+        Settings(api_version="2024-10-21", azure_endpoint="http://127.0.0.1:18103",
+                 chat_deployment_name="gpt"),
+        token_provider=provider,
+    )
+
+    try:
+        client = config.get_client()
+        slowest = 0.0
+        for attempt in range(12):
+            started = time.perf_counter()
+            token = await provider()
+            elapsed = time.perf_counter() - started
+            if attempt > 0:
+                slowest = max(slowest, elapsed)
+            await client.chat.completions.create(
+                model="gpt", messages=[{"role": "user", "content": "hola"}]
+            )
+            await asyncio.sleep(0.4)
+        print(f"📊 Proveedor: {provider.describe()}")
+        print(f"   Tokens vistos por el servidor: {sorted(set(seen_tokens))}")
+        print(f"   Espera máxima por token tras el primero: {slowest * 1000:.1f} ms")
+
+        if provider.stats["blocking_fetches"] != 1:
+            print("❌ Alguna petición tuvo que esperar a un token nuevo")
+            return False
+        if provider.stats["fetches"] < 2 or len(set(seen_tokens)) < 2:
+            print("❌ El token no se renovó en segundo plano")
+            return False
+        if not all(value.startswith("Bearer token-") for value in seen_tokens):
+            print("❌ Las peticiones no llevaban el token bearer")
+            return False
+        if slowest > credential.delay / 2:
+            print("❌ Obtener el token bloqueó una petición")
+            return False
+    except Exception as e:
+        print(f"❌ Error durante el test: {e}")
+        return False
+    finally:
+        provider.stop()
+        await close_azure_openai_clients()
+        server.should_exit = True
+        await task
+
+    print("\n✅ El token se cachea y se renueva sin bloquear peticiones")
+    return True
+
+
+async def test_refresh_retries():
+    """Hace fallar las primeras renovaciones y comprueba el intervalo entre reintentos."""
+    print("\n🔁 Test de reintentos de renovación")
+    print("=" * 50)
+
+    credential = FlakyCredential(lifetime=4.0, failures=3)
+    provider = TokenProvider(credential, refresh_margin=3.0, retry_interval=0.3, expiry_skew=0.2)
+    try:
+        await provider()
+        # Renovación a los ~2 s; tres fallos con reintentos cada 0.3 s y luego éxito
+        await asyncio.sleep(3.5)
+    finally:
+        provider.stop()
+
+    gaps = [later - earlier for earlier, later in zip(credential.calls[1:], credential.calls[2:])]
+    print(f"📊 Proveedor: {provider.describe()}")
+    print(f"   Intervalos entre reintentos: {[round(gap, 2) for gap in gaps]}")
+
+    if provider.stats["refresh_errors"] != 3 or provider.stats["fetches"] != 2:
+        print("❌ La renovación no se completó tras los fallos")
+        return False
+    if not gaps or max(gaps) > 0.6:
+        print("❌ Los reintentos no respetan retry_interval")
+        return False
+
+    print("\n✅ Las renovaciones fallidas se reintentan cada retry_interval")
+    return True
+
+
+async def main():
+    """Función principal del test."""
+    success = await test_token_provider() and await test_refresh_retries()
+    if not success:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
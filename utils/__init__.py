@@ -1,8 +1,35 @@
 """Utils package for shared utilities."""
-from .azure_client import get_azure_openai_client, get_chat_deployment_name, AzureOpenAIConfig
+from .azure_client import (
+    get_azure_openai_client,
+    get_chat_deployment_name,
+    AzureOpenAIConfig,
+    HttpClientSettings,
+    configure_http_client,
+    close_azure_openai_clients,
+    on_clients_reset,
+    configure_rate_limit,
+    get_rate_limiter,
+    configure_adaptive_concurrency,
+    get_concurrency_limiter,
+    get_concurrency_limiters,
+)
+from .settings import Settings, get_settings, reload_settings, watch_settings
 
 __all__ = [
     "get_azure_openai_client",
     "get_chat_deployment_name", 
     "AzureOpenAIConfig",
+    "HttpClientSettings",
+    "configure_http_client",
+    "close_azure_openai_clients",
+    "on_clients_reset",
+    "configure_rate_limit",
+    "get_rate_limiter",
+    "configure_adaptive_concurrency",
+    "get_concurrency_limiter",
+    "get_concurrency_limiters",
+    "Settings",
+    "get_settings",
+    "reload_settings",
+    "watch_settings",
 ]
\ No newline at end of file
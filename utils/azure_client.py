@@ -3,17 +3,261 @@ Módulo para inicializar y gestionar el cliente de Azure OpenAI.
 Centraliza la configuración para poder reutilizar en todos los scripts.
 """
 
-import os
-from dotenv import load_dotenv
+import hashlib
+import importlib.util
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
 from openai import AsyncAzureOpenAI
 
+from .concurrency import AdaptiveConcurrencyLimiter, AdaptiveConcurrencyTransport
+from .rate_limiter import RateLimitedTransport, RateLimiter
+from .settings import HttpClientSettings, Settings, get_settings
+from .token_provider import TokenProvider, close_token_providers, get_token_provider
+
+
+# Registro de clientes compartidos por todo el proceso: (endpoint, versión, hash de la key
+# o id del proveedor de tokens, deployment) -> cliente
+_shared_clients: Dict[Tuple[str, str, str, Optional[str]], AsyncAzureOpenAI] = {}
+# Clientes creados fuera del registro (p. ej. por el balanceador) que también hay que cerrar
+_tracked_clients: List[AsyncAzureOpenAI] = []
+# El cupo RPM/TPM de Azure es por deployment: (endpoint, deployment) -> limitador
+_rate_limiters: Dict[Tuple[str, Optional[str]], RateLimiter] = {}
+_http_settings: Optional[HttpClientSettings] = None
+_rate_limit: Optional[Tuple[Optional[int], Optional[int]]] = None
+_concurrency_limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+_adaptive_concurrency: Optional[Tuple[bool, Dict[str, Any]]] = None
+# Funciones a las que avisar cuando los clientes compartidos se sustituyen o se cierran
+_reset_callbacks: List[Callable[[], None]] = []
+
+
+def on_clients_reset(callback: Callable[[], None]):
+    """
+    Registra una función que se llama cuando los clientes compartidos se
+    sustituyen (al reconfigurarlos) o se cierran, p. ej. para descartar
+    objetos que guardan una referencia al cliente anterior.
+    """
+    _reset_callbacks.append(callback)
+
+
+def _reset_shared_clients():
+    """Retira los clientes compartidos (se cierran con close_azure_openai_clients()) y avisa del cambio."""
+    _tracked_clients.extend(_shared_clients.values())
+    _shared_clients.clear()
+    for callback in _reset_callbacks:
+        callback()
+
+
+def configure_http_client(settings: Optional[HttpClientSettings] = None, **overrides):
+    """
+    Cambia los ajustes del pool HTTP de los clientes compartidos que se creen a partir de ahora.
+    
+    Args:
+        settings: Ajustes completos; si es None se parte de los actuales
+        **overrides: Campos concretos a cambiar (p. ej. ``http2=True``)
+    """
+    global _http_settings
+    base = settings or _http_settings or get_settings().http
+    _http_settings = base._replace(**overrides)
+
+
+def configure_rate_limit(requests_per_minute: Optional[int] = None,
+                         tokens_per_minute: Optional[int] = None):
+    """
+    Fija el cupo RPM/TPM de cada deployment.
+    
+    Sin llamar a esta función se usan AZURE_OPENAI_RPM y AZURE_OPENAI_TPM; si
+    ninguno está definido, las peticiones no se limitan. Igual que con
+    configure_adaptive_concurrency(), los clientes compartidos existentes se
+    sustituyen por otros nuevos con el límite aplicado.
+    """
+    global _rate_limit
+    _rate_limit = (requests_per_minute, tokens_per_minute)
+    _rate_limiters.clear()
+    _reset_shared_clients()
+
+
+def get_rate_limiter(azure_endpoint: Optional[str] = None,
+                     deployment: Optional[str] = None) -> Optional[RateLimiter]:
+    """
+    Retorna el limitador de un deployment (por defecto el endpoint y deployment configurados).
+    
+    Returns:
+        RateLimiter | None: None si ese deployment no tiene límite configurado
+    """
+    settings = get_settings()
+    return _rate_limiters.get((azure_endpoint or settings.azure_endpoint,
+                               deployment or settings.chat_deployment_name))
+
+
+def _rate_limiter_for(azure_endpoint: str, deployment: Optional[str]) -> Optional[RateLimiter]:
+    """Limitador compartido por todos los clientes de un mismo deployment."""
+    rpm, tpm = _rate_limit or (get_settings().requests_per_minute, get_settings().tokens_per_minute)
+    if not (rpm or tpm):
+        return None
+    key = (azure_endpoint, deployment)
+    limiter = _rate_limiters.get(key)
+    if limiter is None:
+        limiter = _rate_limiters[key] = RateLimiter(rpm, tpm)
+    return limiter
 
-def get_azure_openai_client():
+
+def configure_adaptive_concurrency(enabled: bool = True, **options):
+    """
+    Activa o desactiva el control adaptativo (AIMD) de peticiones en vuelo.
+    
+    Cada endpoint tiene un límite que sube mientras la latencia se mantiene
+    estable y se reduce a la mitad ante latencias altas, 429 o errores 5xx.
+    Sin llamar a esta función se usa AZURE_OPENAI_ADAPTIVE_CONCURRENCY. Los
+    clientes compartidos existentes se sustituyen por otros nuevos (los
+    anteriores se siguen cerrando con close_azure_openai_clients()).
+    
+    Args:
+        enabled: Si limitar la concurrencia
+        **options: Parámetros de AdaptiveConcurrencyLimiter (initial_limit, max_limit...)
+    """
+    global _adaptive_concurrency
+    _adaptive_concurrency = (enabled, options)
+    _concurrency_limiters.clear()
+    _reset_shared_clients()
+
+
+def get_concurrency_limiter(azure_endpoint: Optional[str] = None) -> Optional[AdaptiveConcurrencyLimiter]:
+    """
+    Retorna el limitador adaptativo de un endpoint (o el del endpoint configurado si es None).
+    
+    Returns:
+        AdaptiveConcurrencyLimiter | None: None si el control adaptativo está desactivado
+            o ese endpoint aún no tiene cliente
+    """
+    return _concurrency_limiters.get(azure_endpoint or get_settings().azure_endpoint)
+
+
+def get_concurrency_limiters() -> Dict[str, AdaptiveConcurrencyLimiter]:
+    """
+    Retorna todos los limitadores adaptativos creados hasta ahora.
+    
+    Returns:
+        dict: Limitador por endpoint o, con balanceo, por etiqueta de backend
+    """
+    return dict(_concurrency_limiters)
+
+
+def concurrency_limiter_for(key: str) -> Optional[AdaptiveConcurrencyLimiter]:
+    """Limitador adaptativo compartido por los clientes de un endpoint o backend."""
+    enabled, options = _adaptive_concurrency or (get_settings().adaptive_concurrency, {})
+    if not enabled:
+        return None
+    limiter = _concurrency_limiters.get(key)
+    if limiter is None:
+        limiter = _concurrency_limiters[key] = AdaptiveConcurrencyLimiter(**options)
+    return limiter
+
+
+def build_http_client(settings: Optional[HttpClientSettings] = None,
+                      rate_limiter: Optional[RateLimiter] = None,
+                      concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None) -> httpx.AsyncClient:
+    """
+    Crea el cliente httpx con keep-alive, límites de conexiones y timeouts ajustados.
+    
+    HTTP/2 requiere el paquete opcional ``h2`` (``uv add 'httpx[http2]'``); si no
+    está instalado se usa HTTP/1.1.
+    
+    Args:
+        settings: Ajustes del pool (por defecto los configurados o los del snapshot)
+        rate_limiter: Limitador RPM/TPM por el que pasar cada petición
+        concurrency_limiter: Limitador adaptativo de peticiones en vuelo
+    """
+    settings = settings or _http_settings or get_settings().http
+    http2 = settings.http2
+    if http2 and importlib.util.find_spec("h2") is None:
+        print("⚠️  HTTP/2 solicitado pero el paquete 'h2' no está instalado; se usa HTTP/1.1")
+        http2 = False
+    transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.max_connections,
+            max_keepalive_connections=settings.max_keepalive_connections,
+            keepalive_expiry=settings.keepalive_expiry,
+        ),
+    )
+    # El límite de concurrencia va por dentro: la espera por cupo RPM/TPM no cuenta como latencia
+    if concurrency_limiter is not None:
+        transport = AdaptiveConcurrencyTransport(transport, concurrency_limiter)
+    if rate_limiter is not None:
+        transport = RateLimitedTransport(transport, rate_limiter)
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(settings.timeout, connect=settings.connect_timeout),
+        follow_redirects=True,
+    )
+
+
+def get_shared_client(api_key: Optional[str], api_version: str, azure_endpoint: str,
+                      token_provider: Optional[TokenProvider] = None,
+                      deployment: Optional[str] = None) -> AsyncAzureOpenAI:
+    """
+    Retorna el cliente compartido para un endpoint/versión/key/deployment, creándolo la primera vez.
+    
+    Todos los agentes del proceso que usan la misma configuración reutilizan el
+    mismo pool de conexiones (y sus conexiones TLS ya abiertas). Si hay cupo
+    RPM/TPM configurado, las peticiones pasan por el limitador del deployment.
+    
+    Args:
+        api_key: API key (None si se autentica con token_provider)
+        token_provider: Proveedor de tokens de Entra ID en lugar de API key
+        deployment: Deployment al que irán las peticiones (determina el cupo RPM/TPM)
+    """
+    if token_provider is not None:
+        credential_id = f"entra:{id(token_provider)}"
+    else:
+        credential_id = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+    key = (azure_endpoint, api_version, credential_id, deployment)
+    client = _shared_clients.get(key)
+    if client is None or client.is_closed():
+        client = AsyncAzureOpenAI(
+            api_key=None if token_provider is not None else api_key,
+            azure_ad_token_provider=token_provider,
+            api_version=api_version,
+            azure_endpoint=azure_endpoint,
+            http_client=build_http_client(
+                rate_limiter=_rate_limiter_for(azure_endpoint, deployment),
+                concurrency_limiter=concurrency_limiter_for(azure_endpoint),
+            ),
+        )
+        _shared_clients[key] = client
+    return client
+
+
+def track_client(client: AsyncAzureOpenAI) -> AsyncAzureOpenAI:
+    """Registra un cliente creado aparte para que close_azure_openai_clients() lo cierre."""
+    _tracked_clients.append(client)
+    return client
+
+
+async def close_azure_openai_clients():
+    """Cierra todos los clientes compartidos y sus conexiones (llamar al terminar el proceso)."""
+    clients = list(_shared_clients.values()) + _tracked_clients
+    _shared_clients.clear()
+    _tracked_clients.clear()
+    for client in clients:
+        await client.close()
+    close_token_providers()
+    for callback in _reset_callbacks:
+        callback()
+
+
+def get_azure_openai_client(shared: bool = True):
     """
     Inicializa y retorna un cliente de Azure OpenAI configurado.
     
-    Carga las variables de entorno necesarias desde un archivo .env
-    y crea una instancia de AsyncAzureOpenAI configurada.
+    Usa el snapshot de configuración (el .env se lee una sola vez). Por defecto
+    retorna el cliente compartido por todo el proceso para ese endpoint, versión
+    y key, de modo que las conexiones HTTP se reutilizan entre agentes. Con
+    AZURE_OPENAI_AUTH=entra se autentica con un token de Entra ID en lugar de la key.
+    
+    Args:
+        shared: Si False, crea un cliente nuevo con su propio pool de conexiones
     
     Returns:
         AsyncAzureOpenAI: Cliente configurado de Azure OpenAI
@@ -21,24 +265,30 @@ def get_azure_openai_client():
     Raises:
         ValueError: Si falta alguna variable de entorno requerida
     """
-    load_dotenv()
+    settings = get_settings()
     
     # Verificar que las variables de entorno estén presentes
-    api_key = os.getenv("AZURE_OPENAI_API_KEY")
-    api_version = os.getenv("AZURE_OPENAI_API_VERSION")
-    azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
+    api_key = settings.api_key
+    api_version = settings.api_version
+    azure_endpoint = settings.azure_endpoint
+    token_provider = get_token_provider() if settings.use_entra_id else None
     
-    if not api_key:
+    if not api_key and token_provider is None:
         raise ValueError("AZURE_OPENAI_API_KEY no está definida en las variables de entorno")
     if not api_version:
         raise ValueError("AZURE_OPENAI_API_VERSION no está definida en las variables de entorno")
     if not azure_endpoint:
         raise ValueError("AZURE_OPENAI_ENDPOINT no está definida en las variables de entorno")
     
+    if shared:
+        return get_shared_client(api_key, api_version, azure_endpoint, token_provider,
+                                 deployment=settings.chat_deployment_name)
     return AsyncAzureOpenAI(
-        api_key=api_key,
+        api_key=None if token_provider is not None else api_key,
+        azure_ad_token_provider=token_provider,
         api_version=api_version,
         azure_endpoint=azure_endpoint,
+        http_client=build_http_client(),
     )
 
 
@@ -52,9 +302,7 @@ def get_chat_deployment_name():
     Raises:
         ValueError: Si la variable de entorno no está definida
     """
-    load_dotenv()
-    
-    deployment_name = os.getenv("AZURE_OPENAI_CHAT_DEPLOYMENT_NAME")
+    deployment_name = get_settings().chat_deployment_name
     if not deployment_name:
         raise ValueError("AZURE_OPENAI_CHAT_DEPLOYMENT_NAME no está definida en las variables de entorno")
     
@@ -67,57 +315,61 @@ class AzureOpenAIConfig:
     Útil para casos donde necesites más control sobre la configuración.
     """
     
-    def __init__(self):
-        """Inicializa la configuración cargando las variables de entorno."""
-        load_dotenv()
+    def __init__(self, settings: Optional[Settings] = None,
+                 token_provider: Optional[TokenProvider] = None):
+        """
+        Inicializa la configuración a partir del snapshot (cargado una sola vez).
+        
+        Args:
+            settings: Snapshot a usar; por defecto el actual de get_settings()
+            token_provider: Autenticar con este proveedor de tokens de Entra ID en
+                lugar de la API key. Con AZURE_OPENAI_AUTH=entra se usa el compartido.
+        """
+        self.settings = settings or get_settings()
+        if token_provider is None and self.settings.use_entra_id:
+            token_provider = get_token_provider()
+        self.token_provider = token_provider
         self._validate_environment()
     
     def _validate_environment(self):
         """Valida que todas las variables de entorno necesarias estén presentes."""
-        required_vars = [
-            "AZURE_OPENAI_API_KEY",
-            "AZURE_OPENAI_API_VERSION", 
-            "AZURE_OPENAI_ENDPOINT",
-            "AZURE_OPENAI_CHAT_DEPLOYMENT_NAME"
-        ]
-        
-        missing_vars = []
-        for var in required_vars:
-            if not os.getenv(var):
-                missing_vars.append(var)
-        
+        missing_vars = self.settings.missing_vars
+        if self.token_provider is not None:
+            missing_vars = [var for var in missing_vars if var != "AZURE_OPENAI_API_KEY"]
         if missing_vars:
             raise ValueError(f"Variables de entorno faltantes: {', '.join(missing_vars)}")
     
     @property
     def api_key(self):
         """Retorna la API key de Azure OpenAI."""
-        return os.getenv("AZURE_OPENAI_API_KEY")
+        return self.settings.api_key
     
     @property
     def api_version(self):
         """Retorna la versión de la API de Azure OpenAI."""
-        return os.getenv("AZURE_OPENAI_API_VERSION")
+        return self.settings.api_version
     
     @property
     def azure_endpoint(self):
         """Retorna el endpoint de Azure OpenAI."""
-        return os.getenv("AZURE_OPENAI_ENDPOINT")
+        return self.settings.azure_endpoint
+    
+    @property
+    def use_entra_id(self) -> bool:
+        """Si la autenticación es con token de Entra ID en lugar de API key."""
+        return self.token_provider is not None
     
     @property
     def chat_deployment_name(self):
         """Retorna el nombre del deployment del modelo de chat."""
-        return os.getenv("AZURE_OPENAI_CHAT_DEPLOYMENT_NAME")
+        return self.settings.chat_deployment_name
     
     def get_client(self):
         """
-        Crea y retorna un cliente de Azure OpenAI configurado.
+        Retorna el cliente compartido de Azure OpenAI para esta configuración.
         
         Returns:
             AsyncAzureOpenAI: Cliente configurado de Azure OpenAI
         """
-        return AsyncAzureOpenAI(
-            api_key=self.api_key,
-            api_version=self.api_version,
-            azure_endpoint=self.azure_endpoint,
-        )
\ No newline at end of file
+        return get_shared_client(self.api_key, self.api_version, self.azure_endpoint,
+                                 self.token_provider, deployment=self.chat_deployment_name)
\ No newline at end of file
@@ -0,0 +1,259 @@
+"""
+Control adaptativo de concurrencia (AIMD) para las llamadas al modelo.
+El número de completions en vuelo sube de uno en uno mientras la latencia se
+mantiene cerca de la mínima observada y se reduce a la mitad ante latencias
+altas, 429 o errores 5xx, como el control de congestión de TCP.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional
+
+import httpx
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Semáforo cuyo límite se ajusta con AIMD.
+
+    - Aumento aditivo: cada respuesta rápida suma ``increase / limit``, es decir,
+      ~``increase`` por cada ronda completa de peticiones.
+    - Disminución multiplicativa: un 429, un 5xx o una latencia mayor que
+      ``latency_tolerance`` veces la de referencia multiplican el límite por
+      ``decrease_factor``, como mucho una vez por ventana de latencia para que
+      una ráfaga de errores simultáneos no lo hunda hasta el mínimo.
+    """
+
+    def __init__(self, initial_limit: int = 4, min_limit: int = 1, max_limit: int = 64,
+                 increase: float = 1.0, decrease_factor: float = 0.5,
+                 latency_tolerance: float = 2.0, latency_alpha: float = 0.2):
+        """
+        Args:
+            initial_limit: Completions en vuelo al empezar
+            min_limit: Límite mínimo
+            max_limit: Límite máximo
+            increase: Incremento por ronda de respuestas rápidas
+            decrease_factor: Factor aplicado al límite ante congestión
+            latency_tolerance: Latencia (relativa a la de referencia) a partir de la cual se reduce
+            latency_alpha: Peso de la última muestra en la media móvil de latencia
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.latency_alpha = latency_alpha
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.latency: Optional[float] = None
+        self.baseline: Optional[float] = None
+        self._last_decrease = 0.0
+        self.stats: Dict[str, int] = {"requests": 0, "throttled": 0, "errors": 0,
+                                      "increases": 0, "decreases": 0}
+
+    @property
+    def limit(self) -> int:
+        """Completions en vuelo permitidas ahora mismo."""
+        return int(self._limit)
+
+    @property
+    def queue_depth(self) -> int:
+        """Llamadas esperando un hueco."""
+        return len(self._waiters)
+
+    async def acquire(self):
+        """Espera (en orden de llegada) hasta que haya un hueco bajo el límite."""
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # El hueco ya se había concedido: devolverlo
+                self.in_flight -= 1
+                self._wake()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def _wake(self):
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _decrease(self, reason: str):
+        now = time.monotonic()
+        window = self.latency if self.latency is not None else 1.0
+        if now - self._last_decrease < window:
+            return
+        self._last_decrease = now
+        self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+        self.stats["decreases"] += 1
+        print(f"🎚️  Concurrencia reducida a {self.limit} ({reason})")
+
+    def release(self, latency: Optional[float] = None, outcome: str = "ok"):
+        """
+        Libera el hueco y ajusta el límite.
+
+        Args:
+            latency: Segundos que tardó la llamada (None si falló antes de responder)
+            outcome: "ok", "throttled" (429), "error" (5xx o conexión) o "ignored"
+        """
+        self.in_flight -= 1
+        self.stats["requests"] += 1
+        if outcome == "throttled":
+            self.stats["throttled"] += 1
+            self._decrease("429")
+        elif outcome == "error":
+            self.stats["errors"] += 1
+            self._decrease("error del servicio")
+        elif outcome == "ok" and latency is not None:
+            self._observe_latency(latency)
+        self._wake()
+
+    def _observe_latency(self, latency: float):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.latency_alpha * (latency - self.latency)
+        # La referencia sigue a la mínima y sube despacio si el servicio se vuelve más lento
+        if self.baseline is None or self.latency < self.baseline:
+            self.baseline = self.latency
+        else:
+            self.baseline += 0.01 * (self.latency - self.baseline)
+
+        if self.latency > self.baseline * self.latency_tolerance:
+            self._decrease(f"latencia {self.latency * 1000:.0f} ms")
+        elif self.in_flight + 1 >= self.limit and self._limit < self.max_limit:
+            # Solo crece si el límite actual se está usando
+            before = self.limit
+            self._limit = min(float(self.max_limit), self._limit + self.increase / self._limit)
+            if self.limit > before:
+                self.stats["increases"] += 1
+
+    def describe(self) -> Dict[str, Any]:
+        """Límite, peticiones en vuelo, cola, latencias y contadores."""
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "baseline_ms": round(self.baseline * 1000, 1) if self.baseline is not None else None,
+            **self.stats,
+        }
+
+    def prometheus(self) -> str:
+        """Gauges y contadores en formato de texto de Prometheus."""
+        return limiters_prometheus({"": self})
+
+
+# Métricas exportadas por cada limitador: (nombre, tipo, ayuda, valor)
+_METRICS = (
+    ("model_concurrency_limit", "gauge", "Completions en vuelo permitidas",
+     lambda limiter: limiter.limit),
+    ("model_concurrency_in_flight", "gauge", "Completions en vuelo",
+     lambda limiter: limiter.in_flight),
+    ("model_concurrency_queue_depth", "gauge", "Llamadas esperando hueco",
+     lambda limiter: limiter.queue_depth),
+    ("model_concurrency_throttled_total", "counter", "Respuestas 429",
+     lambda limiter: limiter.stats["throttled"]),
+    ("model_concurrency_errors_total", "counter", "Errores 5xx o de conexión",
+     lambda limiter: limiter.stats["errors"]),
+)
+
+
+def limiters_prometheus(limiters: Dict[str, AdaptiveConcurrencyLimiter]) -> str:
+    """
+    Métricas de varios limitadores en formato de texto de Prometheus.
+
+    Cada limitador es una serie con la etiqueta ``backend`` (el endpoint o el
+    backend del balanceador); una clave vacía genera la serie sin etiquetas.
+    """
+    if not limiters:
+        return ""
+    lines = []
+    for name, kind, help_text, value in _METRICS:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for key, limiter in limiters.items():
+            label = key.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'{name}{{backend="{label}"}} {value(limiter)}' if key else f"{name} {value(limiter)}")
+    return "\n".join(lines) + "\n"
+
+
+def _outcome(status_code: int) -> str:
+    if status_code == 429:
+        return "throttled"
+    if status_code >= 500:
+        return "error"
+    return "ok"
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Cuerpo de la respuesta que devuelve el hueco al cerrarse."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class AdaptiveConcurrencyTransport(httpx.AsyncBaseTransport):
+    """
+    Transporte httpx que pasa cada petición por un AdaptiveConcurrencyLimiter.
+
+    Cada intento HTTP (también los reintentos internos del SDK de OpenAI) ocupa
+    un hueco hasta que se cierra la respuesta, así que en streaming el hueco dura
+    todo el stream. La latencia medida es la de las cabeceras: en streaming es el
+    tiempo hasta el primer token y no depende de la longitud de la respuesta.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: AdaptiveConcurrencyLimiter):
+        self.transport = transport
+        self.limiter = limiter
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await self.limiter.acquire()
+        started = time.perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except asyncio.CancelledError:
+            self.limiter.release(outcome="ignored")
+            raise
+        except httpx.TransportError:
+            self.limiter.release(outcome="error")
+            raise
+        except Exception:
+            self.limiter.release(outcome="ignored")
+            raise
+
+        latency = time.perf_counter() - started
+        outcome = _outcome(response.status_code)
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self.limiter.release(latency, outcome)
+
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
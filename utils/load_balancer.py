@@ -0,0 +1,264 @@
+"""
+Balanceo de carga y failover entre varios deployments de Azure OpenAI.
+Cada petición se envía al backend con mejor latencia observada y más cupo
+disponible; los backends que fallan se apartan durante un cool-down.
+"""
+
+import random
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+import openai
+from agents import OpenAIChatCompletionsModel
+from agents.models.interface import Model, ModelProvider
+from openai import AsyncAzureOpenAI
+
+from .azure_client import build_http_client, concurrency_limiter_for, on_clients_reset, track_client
+from .rate_limiter import RateLimiter, parse_retry_after
+from .settings import BackendConfig, get_settings
+from .token_provider import get_token_provider
+
+
+class Backend:
+    """Estado en tiempo de ejecución de un deployment del grupo."""
+
+    def __init__(self, config: BackendConfig):
+        self.config = config
+        self.limiter = RateLimiter(config.requests_per_minute, config.tokens_per_minute)
+        self.concurrency = concurrency_limiter_for(config.label)
+        # Sin key propia se autentica con el token compartido de Entra ID
+        token_provider = get_token_provider() if not config.api_key else None
+        self.client = track_client(AsyncAzureOpenAI(
+            api_key=config.api_key,
+            azure_ad_token_provider=token_provider,
+            api_version=config.api_version,
+            azure_endpoint=config.endpoint,
+            http_client=build_http_client(rate_limiter=self.limiter, concurrency_limiter=self.concurrency),
+            # El balanceador hace el failover: no reintentar contra el mismo backend
+            max_retries=0,
+        ))
+        self.model = OpenAIChatCompletionsModel(model=config.deployment, openai_client=self.client)
+        self.latency: Optional[float] = None
+        self.in_flight = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.stats: Dict[str, int] = {"requests": 0, "errors": 0, "ejections": 0}
+
+    @property
+    def name(self) -> str:
+        return self.config.label
+
+    @property
+    def available(self) -> bool:
+        """Si el backend no está apartado por errores recientes."""
+        return time.monotonic() >= self.ejected_until
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "weight": self.config.weight,
+            "available": self.available,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "in_flight": self.in_flight,
+            "headroom": round(self.limiter.headroom(), 3),
+            "ejected_for": round(max(0.0, self.ejected_until - time.monotonic()), 1),
+            "concurrency_limit": self.concurrency.limit if self.concurrency is not None else None,
+            **self.stats,
+        }
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Errores del backend (no de la petición) que justifican probar otro deployment."""
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+class LoadBalancer:
+    """
+    Elige backend por peso, latencia observada (EWMA), peticiones en vuelo y cupo restante.
+
+    La elección es aleatoria ponderada para no concentrar todo el tráfico en un
+    único backend. Un backend que devuelve 429, 5xx o errores de conexión
+    ``failure_threshold`` veces seguidas se aparta durante ``cooldown`` segundos
+    (o el retry-after, si es mayor) y la petición se reintenta en otro. Un fallo
+    aislado no lo aparta: un 429 solo lo saca de la rotación durante su retry-after
+    (también cuenta como expulsión en las estadísticas). Al volver del cool-down el
+    contador de fallos empieza de cero, así que hacen falta otros
+    ``failure_threshold`` errores seguidos para apartarlo de nuevo.
+    """
+
+    def __init__(self, backends: Sequence[BackendConfig],
+                 cooldown: float = 30.0,
+                 failure_threshold: int = 3,
+                 latency_alpha: float = 0.3):
+        """
+        Args:
+            backends: Deployments del grupo
+            cooldown: Segundos que un backend con errores queda fuera de la rotación
+            failure_threshold: Errores consecutivos que provocan la expulsión
+            latency_alpha: Peso de la última muestra en la media móvil de latencia
+        """
+        if not backends:
+            raise ValueError("❌ ERROR: el balanceador necesita al menos un backend")
+        self.backends = [Backend(config) for config in backends]
+        self.cooldown = cooldown
+        self.failure_threshold = failure_threshold
+        self.latency_alpha = latency_alpha
+
+    def _score(self, backend: Backend, default_latency: float) -> float:
+        latency = backend.latency if backend.latency is not None else default_latency
+        headroom = max(backend.limiter.headroom(), 0.01)
+        return backend.config.weight * headroom / (max(latency, 0.001) * (1 + backend.in_flight))
+
+    def choose(self, exclude: Sequence[Backend] = ()) -> Backend:
+        """
+        Selecciona el backend para la siguiente petición.
+
+        Si todos están apartados, usa el que antes vuelve a estar disponible.
+        """
+        candidates = [b for b in self.backends if b not in exclude and b.available]
+        if not candidates:
+            remaining = [b for b in self.backends if b not in exclude] or self.backends
+            return min(remaining, key=lambda b: b.ejected_until)
+        known = [b.latency for b in candidates if b.latency is not None]
+        default_latency = sum(known) / len(known) if known else 1.0
+        weights = [self._score(b, default_latency) for b in candidates]
+        return random.choices(candidates, weights=weights)[0]
+
+    def record_success(self, backend: Backend, latency: float):
+        backend.failures = 0
+        if backend.latency is None:
+            backend.latency = latency
+        else:
+            backend.latency += self.latency_alpha * (latency - backend.latency)
+
+    def record_failure(self, backend: Backend, error: Exception):
+        backend.failures += 1
+        backend.stats["errors"] += 1
+        response = getattr(error, "response", None)
+        retry_after = parse_retry_after(response.headers) if response is not None else None
+        if backend.failures < self.failure_threshold:
+            # Con pocos backends, apartar uno por un error puntual quita mucha capacidad
+            if retry_after:
+                backend.ejected_until = max(backend.ejected_until, time.monotonic() + retry_after)
+                backend.stats["ejections"] += 1
+            return
+        pause = max(self.cooldown, retry_after or 0.0)
+        backend.ejected_until = time.monotonic() + pause
+        # Vuelve a la rotación con el contador a cero tras el cool-down
+        backend.failures = 0
+        backend.stats["ejections"] += 1
+        print(f"🚫 {backend.name} fuera de la rotación {pause:.0f}s ({type(error).__name__})")
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """Estado de cada backend (latencia, cupo, errores, expulsiones)."""
+        return [backend.describe() for backend in self.backends]
+
+    async def close(self):
+        for backend in self.backends:
+            await backend.client.close()
+
+
+class LoadBalancedModel(Model):
+    """Modelo que reparte cada llamada entre los backends de un LoadBalancer."""
+
+    def __init__(self, balancer: LoadBalancer):
+        self.balancer = balancer
+
+    async def get_response(self, *args, **kwargs):
+        tried: List[Backend] = []
+        while True:
+            backend = self.balancer.choose(exclude=tried)
+            tried.append(backend)
+            backend.in_flight += 1
+            backend.stats["requests"] += 1
+            started = time.perf_counter()
+            try:
+                response = await backend.model.get_response(*args, **kwargs)
+            except Exception as e:
+                if not _is_retryable(e):
+                    raise
+                self.balancer.record_failure(backend, e)
+                if len(tried) >= len(self.balancer.backends):
+                    raise
+                print(f"🔀 Reintentando en otro backend tras error en {backend.name}")
+                continue
+            finally:
+                backend.in_flight -= 1
+            self.balancer.record_success(backend, time.perf_counter() - started)
+            return response
+
+    async def stream_response(self, *args, **kwargs) -> AsyncIterator[Any]:
+        # Solo se puede cambiar de backend antes de emitir el primer evento
+        tried: List[Backend] = []
+        while True:
+            backend = self.balancer.choose(exclude=tried)
+            tried.append(backend)
+            backend.in_flight += 1
+            backend.stats["requests"] += 1
+            started = time.perf_counter()
+            emitted = False
+            try:
+                async for event in backend.model.stream_response(*args, **kwargs):
+                    if not emitted:
+                        emitted = True
+                        self.balancer.record_success(backend, time.perf_counter() - started)
+                    yield event
+                return
+            except Exception as e:
+                if emitted or not _is_retryable(e):
+                    raise
+                self.balancer.record_failure(backend, e)
+                if len(tried) >= len(self.balancer.backends):
+                    raise
+                print(f"🔀 Reintentando en otro backend tras error en {backend.name}")
+            finally:
+                backend.in_flight -= 1
+
+
+class LoadBalancedProvider(ModelProvider):
+    """ModelProvider que devuelve siempre el modelo balanceado del grupo."""
+
+    def __init__(self, balancer: LoadBalancer):
+        self.balancer = balancer
+        self._model = LoadBalancedModel(balancer)
+
+    def get_model(self, model_name: Optional[str]) -> Model:
+        return self._model
+
+
+_provider: Optional[LoadBalancedProvider] = None
+# Backends con los que se construyó _provider: si AZURE_OPENAI_BACKENDS cambia
+# al recargar la configuración, el proveedor se vuelve a construir
+_provider_backends: Tuple[BackendConfig, ...] = ()
+
+
+def get_load_balanced_provider() -> Optional[LoadBalancedProvider]:
+    """
+    Retorna el proveedor balanceado configurado con AZURE_OPENAI_BACKENDS.
+
+    Returns:
+        LoadBalancedProvider | None: None si no hay backends configurados
+    """
+    global _provider, _provider_backends
+    backends = get_settings().backends
+    if _provider is not None and backends == _provider_backends:
+        return _provider
+    # Los clientes del proveedor anterior siguen registrados y se cierran con
+    # close_azure_openai_clients()
+    _provider, _provider_backends = None, backends
+    if not backends:
+        return None
+    _provider = LoadBalancedProvider(LoadBalancer(backends))
+    print(f"⚖️  Balanceando entre {len(backends)} deployments de Azure OpenAI")
+    return _provider
+
+
+def _drop_provider():
+    """Descarta el proveedor: sus clientes se han cerrado o se han reconfigurado."""
+    global _provider
+    _provider = None
+
+
+on_clients_reset(_drop_provider)
@@ -0,0 +1,234 @@
+"""
+Limitador de peticiones a Azure OpenAI con token buckets.
+Reparte el cupo RPM/TPM del deployment en el cliente, antes de enviar, y se
+detiene cuando el servicio responde 429 con retry-after.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+# Ráfaga máxima en segundos de cupo: Azure aplica el límite también en ventanas
+# inferiores al minuto, así que un bucket con el minuto entero provoca 429 tras
+# un arranque en frío o una pausa
+DEFAULT_BURST_SECONDS = 10.0
+
+
+def estimate_tokens(body: bytes) -> int:
+    """
+    Estima los tokens que una petición consumirá del cupo TPM.
+
+    Usa la heurística de ~4 caracteres por token sobre mensajes y herramientas
+    y suma max_tokens/max_completion_tokens, que Azure también descuenta del cupo.
+
+    Args:
+        body: Cuerpo JSON de la petición
+
+    Returns:
+        int: Tokens estimados (al menos 1)
+    """
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        return max(1, len(body) // 4)
+    if not isinstance(payload, dict):
+        return max(1, len(body) // 4)
+    prompt = json.dumps(
+        [payload.get("messages") or payload.get("input") or "", payload.get("tools") or []],
+        ensure_ascii=False,
+    )
+    completion = payload.get("max_completion_tokens") or payload.get("max_tokens") or 0
+    return max(1, len(prompt) // 4 + int(completion))
+
+
+def parse_retry_after(headers: httpx.Headers) -> Optional[float]:
+    """Segundos de espera indicados por retry-after-ms o retry-after."""
+    for name, scale in (("retry-after-ms", 1000.0), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value:
+            try:
+                return float(value) / scale
+            except ValueError:
+                continue
+    return None
+
+
+class TokenBucket:
+    """
+    Token bucket asíncrono con reparto FIFO.
+
+    Se rellena de forma continua a ``rate`` unidades por segundo hasta ``capacity``.
+    Una petición mayor que la capacidad espera al bucket lleno y lo deja en
+    negativo, de modo que el ritmo medio se respeta igualmente.
+    """
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def available(self) -> float:
+        """Unidades disponibles ahora mismo."""
+        self._refill()
+        return max(0.0, self._tokens)
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """
+        Espera hasta poder consumir `amount` unidades (o hasta el bucket lleno si
+        `amount` supera la capacidad).
+
+        Returns:
+            float: Segundos esperados
+        """
+        needed = min(amount, self.capacity)
+        started = time.monotonic()
+        async with self._lock:
+            self._refill()
+            while self._tokens < needed:
+                await asyncio.sleep((needed - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= amount
+        return time.monotonic() - started
+
+    def drain_to(self, remaining: float):
+        """Ajusta el bucket a lo que el servidor dice que queda (nunca lo aumenta)."""
+        self._refill()
+        self._tokens = min(self._tokens, max(0.0, remaining))
+
+
+class RateLimiter:
+    """
+    Limita peticiones por minuto y tokens por minuto contra un deployment.
+
+    Las peticiones esperan en cola hasta que ambos buckets tengan cupo. Si el
+    servicio devuelve 429, todas las peticiones se pausan durante el retry-after.
+    Los buckets solo acumulan ``burst_seconds`` de cupo, así que tras una pausa
+    no se envía el minuto entero de golpe.
+    """
+
+    def __init__(self, requests_per_minute: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None,
+                 burst_seconds: float = DEFAULT_BURST_SECONDS):
+        """
+        Args:
+            requests_per_minute: Cupo RPM del deployment (None para no limitar)
+            tokens_per_minute: Cupo TPM del deployment (None para no limitar)
+            burst_seconds: Segundos de cupo que se pueden enviar de golpe
+        """
+        self.requests = self._bucket(requests_per_minute, burst_seconds, minimum=1)
+        self.tokens = self._bucket(tokens_per_minute, burst_seconds)
+        self._paused_until = 0.0
+        self._waiting = 0
+        # Último cupo restante reportado por el servicio (cabeceras x-ratelimit-remaining-*)
+        self.remaining: Dict[str, float] = {}
+        self._max_remaining: Dict[str, float] = {}
+        self.stats: Dict[str, float] = {"requests": 0, "throttled": 0, "wait_seconds": 0.0}
+
+    @staticmethod
+    def _bucket(per_minute: Optional[int], burst_seconds: float, minimum: float = 0) -> Optional[TokenBucket]:
+        if not per_minute:
+            return None
+        rate = per_minute / 60
+        return TokenBucket(min(per_minute, max(minimum, rate * burst_seconds)), rate)
+
+    @property
+    def queue_depth(self) -> int:
+        """Peticiones esperando cupo."""
+        return self._waiting
+
+    @property
+    def paused_seconds(self) -> float:
+        """Segundos que quedan de la pausa impuesta por el último 429."""
+        return max(0.0, self._paused_until - time.monotonic())
+
+    def headroom(self) -> float:
+        """
+        Fracción de cupo disponible (0 a 1), según los buckets o, si no hay
+        buckets, según el último x-ratelimit-remaining-tokens reportado.
+        """
+        if self.paused_seconds > 0:
+            return 0.0
+        if self.tokens is not None:
+            return self.tokens.available / self.tokens.capacity
+        if self.requests is not None:
+            return self.requests.available / self.requests.capacity
+        for kind in ("tokens", "requests"):
+            if self._max_remaining.get(kind):
+                return self.remaining[kind] / self._max_remaining[kind]
+        return 1.0
+
+    async def acquire(self, estimated_tokens: int = 1):
+        """Espera a que haya cupo para una petición de `estimated_tokens` tokens."""
+        started = time.monotonic()
+        self._waiting += 1
+        try:
+            while (delay := self._paused_until - time.monotonic()) > 0:
+                await asyncio.sleep(delay)
+            if self.requests is not None:
+                await self.requests.acquire(1)
+            if self.tokens is not None:
+                await self.tokens.acquire(estimated_tokens)
+        finally:
+            self._waiting -= 1
+        self.stats["requests"] += 1
+        self.stats["wait_seconds"] += time.monotonic() - started
+
+    def observe(self, response: httpx.Response):
+        """Actualiza el estado a partir de la respuesta (429, retry-after y cabeceras x-ratelimit)."""
+        if response.status_code == 429:
+            self.stats["throttled"] += 1
+            retry_after = parse_retry_after(response.headers)
+            pause = retry_after if retry_after is not None else 1.0
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            print(f"⏳ Azure OpenAI devolvió 429: pausa de {pause:.1f}s")
+        for kind, bucket in (("tokens", self.tokens), ("requests", self.requests)):
+            value = response.headers.get(f"x-ratelimit-remaining-{kind}")
+            if not value:
+                continue
+            try:
+                remaining = float(value)
+            except ValueError:
+                continue
+            self.remaining[kind] = remaining
+            self._max_remaining[kind] = max(self._max_remaining.get(kind, 0.0), remaining)
+            if bucket is not None:
+                bucket.drain_to(remaining)
+
+    def describe(self) -> Dict[str, Any]:
+        """Estado del limitador: cola, cupo disponible y contadores."""
+        return {
+            "queue_depth": self.queue_depth,
+            "requests_available": self.requests.available if self.requests else None,
+            "tokens_available": self.tokens.available if self.tokens else None,
+            "paused_seconds": self.paused_seconds,
+            **self.stats,
+        }
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """Transporte httpx que pasa cada petición por un RateLimiter."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: RateLimiter):
+        self.transport = transport
+        self.limiter = limiter
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = request.content if request.method == "POST" else b""
+        await self.limiter.acquire(estimate_tokens(body) if body else 1)
+        response = await self.transport.handle_async_request(request)
+        self.limiter.observe(response)
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
@@ -0,0 +1,225 @@
+"""
+Caché en disco de respuestas del modelo.
+Guarda en SQLite las respuestas a turnos idénticos (mismo deployment, mensajes,
+herramientas y parámetros de muestreo) para no repetir llamadas a Azure en
+ejecuciones de regresión o preguntas frecuentes.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from agents.items import ModelResponse
+from agents.models.interface import Model
+from agents.tool import FunctionTool
+from agents.usage import Usage
+from pydantic import TypeAdapter
+
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / ".cache" / "responses.sqlite"
+
+_response_adapter = TypeAdapter(ModelResponse)
+
+
+def _normalize_input(value: Any) -> Any:
+    """
+    Normaliza los mensajes para que conversaciones equivalentes den la misma clave.
+
+    Elimina los ids y los campos nulos de los items y renumera los call_id de las
+    llamadas a herramientas por orden de aparición (el servicio los genera aleatorios).
+    """
+    if isinstance(value, str):
+        return value
+    call_ids: Dict[str, str] = {}
+
+    def normalize(item: Any) -> Any:
+        if isinstance(item, dict):
+            result = {}
+            for key, val in item.items():
+                if key == "id" or val is None:
+                    continue
+                if key == "call_id" and isinstance(val, str):
+                    val = call_ids.setdefault(val, f"call_{len(call_ids)}")
+                result[key] = normalize(val)
+            return result
+        if isinstance(item, list):
+            return [normalize(element) for element in item]
+        if hasattr(item, "model_dump"):
+            return normalize(item.model_dump(exclude_unset=True))
+        return item
+
+    return normalize(value)
+
+
+def _describe_tool(tool: Any) -> Any:
+    if isinstance(tool, FunctionTool):
+        return {"name": tool.name, "description": tool.description,
+                "parameters": tool.params_json_schema, "strict": tool.strict_json_schema}
+    return {"name": getattr(tool, "name", type(tool).__name__)}
+
+
+def cache_key(model_name: str, system_instructions: Optional[str], input: Any,
+              model_settings: Any, tools: List[Any], output_schema: Any,
+              handoffs: List[Any]) -> str:
+    """
+    Calcula la clave de caché de un turno del modelo.
+
+    Returns:
+        str: Hash SHA-256 (hex) de deployment, mensajes normalizados, esquemas de
+        herramientas, handoffs, esquema de salida y parámetros de muestreo
+    """
+    payload = {
+        "model": model_name,
+        "instructions": system_instructions,
+        "input": _normalize_input(input),
+        "tools": [_describe_tool(tool) for tool in tools],
+        "handoffs": [getattr(handoff, "tool_name", str(handoff)) for handoff in handoffs],
+        "output_schema": output_schema.json_schema() if output_schema is not None and not output_schema.is_plain_text() else None,
+        "settings": model_settings.to_json_dict() if model_settings is not None else None,
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Almacén SQLite de respuestas con expiración (TTL) y desalojo LRU.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = 1000,
+                 ttl: float = 7 * 24 * 3600):
+        """
+        Args:
+            path: Fichero SQLite (por defecto .cache/responses.sqlite)
+            max_entries: Entradas máximas; al superarlas se borran las menos usadas
+            ttl: Segundos de validez de una entrada (0 para no expirar)
+        """
+        self.path = Path(path) if path else DEFAULT_CACHE_PATH
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, model TEXT, value TEXT NOT NULL,"
+            " created_at REAL NOT NULL, last_used REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[ModelResponse]:
+        """Retorna la respuesta cacheada, o None si no existe o expiró."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl and now - row[1] > self.ttl:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                row = None
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._db.execute(
+                "UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key)
+            )
+            self._db.commit()
+            self.stats["hits"] += 1
+        return _response_adapter.validate_json(row[0])
+
+    def put(self, key: str, response: ModelResponse, model_name: Optional[str] = None):
+        """Guarda una respuesta y desaloja las entradas menos usadas si se supera el máximo."""
+        now = time.time()
+        value = _response_adapter.dump_json(response).decode("utf-8")
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, model, value, created_at, last_used, hits)"
+                " VALUES (?, ?, ?, ?, ?, 0)",
+                (key, model_name, value, now, now),
+            )
+            self.stats["writes"] += 1
+            excess = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN"
+                    " (SELECT key FROM responses ORDER BY last_used ASC LIMIT ?)",
+                    (excess,),
+                )
+                self.stats["evictions"] += excess
+            self._db.commit()
+
+    def clear(self):
+        """Borra todas las entradas."""
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def describe(self) -> Dict[str, Any]:
+        """Contadores de la sesión, tasa de aciertos y entradas almacenadas."""
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {**self.stats, "hit_rate": round(self.hit_rate, 3), "entries": entries}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class CachedModel(Model):
+    """
+    Modelo que responde desde un ResponseCache los turnos ya vistos.
+
+    Las respuestas en streaming no se cachean: se delegan siempre en el modelo real.
+    """
+
+    def __init__(self, inner: Model, cache: ResponseCache, model_name: Optional[str] = None):
+        """
+        Args:
+            inner: Modelo real
+            cache: Almacén de respuestas
+            model_name: Deployment que forma parte de la clave (por defecto inner.model)
+        """
+        self.inner = inner
+        self.cache = cache
+        self.model_name = model_name or str(getattr(inner, "model", type(inner).__name__))
+
+    async def get_response(self, system_instructions, input, model_settings, tools,
+                           output_schema, handoffs, tracing, *, previous_response_id=None,
+                           conversation_id=None, prompt=None) -> ModelResponse:
+        if previous_response_id or conversation_id or prompt:
+            # El estado vive en el servidor: la clave no describiría el turno completo
+            return await self.inner.get_response(
+                system_instructions, input, model_settings, tools, output_schema, handoffs,
+                tracing, previous_response_id=previous_response_id,
+                conversation_id=conversation_id, prompt=prompt,
+            )
+
+        key = cache_key(self.model_name, system_instructions, input, model_settings,
+                        tools, output_schema, handoffs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            # Un acierto no consume tokens
+            return ModelResponse(output=cached.output, usage=Usage(), response_id=None)
+
+        response = await self.inner.get_response(
+            system_instructions, input, model_settings, tools, output_schema, handoffs,
+            tracing, previous_response_id=previous_response_id,
+            conversation_id=conversation_id, prompt=prompt,
+        )
+        self.cache.put(key, response, self.model_name)
+        return response
+
+    def stream_response(self, *args, **kwargs) -> AsyncIterator[Any]:
+        return self.inner.stream_response(*args, **kwargs)
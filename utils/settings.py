@@ -0,0 +1,343 @@
+"""
+Configuración del proyecto como snapshot inmutable.
+El fichero .env se lee y valida una sola vez; las lecturas posteriores no tocan
+el disco ni el entorno. Los cambios se aplican con reload_settings() o con el
+watcher opcional.
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from dotenv import dotenv_values, find_dotenv
+
+
+class HttpClientSettings(NamedTuple):
+    """Ajustes del pool de conexiones HTTP compartido por los clientes de Azure OpenAI."""
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 60.0
+    http2: bool = False
+    timeout: float = 600.0
+    connect_timeout: float = 10.0
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> "HttpClientSettings":
+        """
+        Lee los ajustes de las variables de entorno (con los valores por defecto si no existen):
+        AZURE_OPENAI_MAX_CONNECTIONS, AZURE_OPENAI_MAX_KEEPALIVE, AZURE_OPENAI_KEEPALIVE_EXPIRY,
+        AZURE_OPENAI_HTTP2, AZURE_OPENAI_TIMEOUT y AZURE_OPENAI_CONNECT_TIMEOUT.
+        """
+        env = os.environ if environ is None else environ
+        defaults = cls()
+        return cls(
+            max_connections=_number(env, "AZURE_OPENAI_MAX_CONNECTIONS", int, defaults.max_connections),
+            max_keepalive_connections=_number(env, "AZURE_OPENAI_MAX_KEEPALIVE", int,
+                                              defaults.max_keepalive_connections),
+            keepalive_expiry=_number(env, "AZURE_OPENAI_KEEPALIVE_EXPIRY", float, defaults.keepalive_expiry),
+            http2=_flag(env, "AZURE_OPENAI_HTTP2"),
+            timeout=_number(env, "AZURE_OPENAI_TIMEOUT", float, defaults.timeout),
+            connect_timeout=_number(env, "AZURE_OPENAI_CONNECT_TIMEOUT", float, defaults.connect_timeout),
+        )
+
+
+class BackendConfig(NamedTuple):
+    """Un endpoint/deployment de Azure OpenAI dentro de un grupo balanceado."""
+
+    endpoint: str
+    deployment: str
+    api_key: Optional[str] = None
+    api_version: Optional[str] = None
+    weight: float = 1.0
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+    name: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        """Nombre legible del backend."""
+        return self.name or f"{self.endpoint.rstrip('/')}/{self.deployment}"
+
+
+def parse_backends(value: Optional[str], api_key: Optional[str] = None,
+                   api_version: Optional[str] = None) -> Tuple[BackendConfig, ...]:
+    """
+    Interpreta AZURE_OPENAI_BACKENDS: una lista JSON o la ruta de un fichero JSON.
+
+    Cada elemento admite endpoint, deployment, api_key, api_version, weight, rpm,
+    tpm y name. La key y la versión por defecto son las de AZURE_OPENAI_*.
+
+    Raises:
+        ValueError: Si el fichero no existe, el JSON no es válido o falta endpoint/deployment
+    """
+    if not value:
+        return ()
+    text = value.strip()
+    if not text.startswith("["):
+        try:
+            text = Path(text).read_text(encoding="utf-8")
+        except OSError as e:
+            raise ValueError(f"❌ ERROR: AZURE_OPENAI_BACKENDS: no se pudo leer {text}: {e}") from e
+    try:
+        items = json.loads(text)
+    except ValueError as e:
+        raise ValueError(f"❌ ERROR: AZURE_OPENAI_BACKENDS no es un JSON válido: {e}") from e
+    if not isinstance(items, list):
+        raise ValueError("❌ ERROR: AZURE_OPENAI_BACKENDS debe ser una lista JSON de backends")
+    backends = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get("endpoint") or not item.get("deployment"):
+            raise ValueError(f"❌ ERROR: AZURE_OPENAI_BACKENDS[{index}] necesita 'endpoint' y 'deployment'")
+        try:
+            backends.append(BackendConfig(
+                endpoint=item["endpoint"],
+                deployment=item["deployment"],
+                api_key=item.get("api_key", api_key),
+                api_version=item.get("api_version", api_version),
+                weight=float(item.get("weight", 1.0)),
+                requests_per_minute=int(item["rpm"]) if item.get("rpm") is not None else None,
+                tokens_per_minute=int(item["tpm"]) if item.get("tpm") is not None else None,
+                name=item.get("name"),
+            ))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"❌ ERROR: AZURE_OPENAI_BACKENDS[{index}]: weight, rpm y tpm deben ser "
+                             f"numéricos ({e})") from e
+    return tuple(backends)
+
+
+def _flag(env: Mapping[str, str], name: str) -> bool:
+    return env.get(name, "0").lower() in ("1", "true", "yes")
+
+
+def _number(env: Mapping[str, str], name: str, kind: Callable[[str], float], default=None):
+    """Lee una variable numérica; un valor no numérico da un error que nombra la variable."""
+    value = env.get(name)
+    if not value:
+        return default
+    try:
+        return kind(value)
+    except ValueError:
+        expected = "un entero" if kind is int else "un número"
+        raise ValueError(f"❌ ERROR: {name} debe ser {expected} (valor actual: {value!r})") from None
+
+
+AZURE_REQUIRED_VARS = (
+    "AZURE_OPENAI_API_KEY",
+    "AZURE_OPENAI_API_VERSION",
+    "AZURE_OPENAI_ENDPOINT",
+    "AZURE_OPENAI_CHAT_DEPLOYMENT_NAME",
+)
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Snapshot inmutable de la configuración de Azure OpenAI y de los servidores MCP."""
+
+    api_key: Optional[str] = None
+    api_version: Optional[str] = None
+    azure_endpoint: Optional[str] = None
+    chat_deployment_name: Optional[str] = None
+    http: HttpClientSettings = field(default_factory=HttpClientSettings)
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+    backends: Tuple[BackendConfig, ...] = ()
+    response_cache: bool = False
+    adaptive_concurrency: bool = False
+    use_entra_id: bool = False
+    mcp_tool_cache: bool = False
+    mcp_use_installed: bool = True
+    source: Optional[str] = None
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None,
+                 source: Optional[str] = None) -> "Settings":
+        """
+        Construye el snapshot a partir de un mapeo de variables de entorno.
+
+        Raises:
+            ValueError: Si una variable numérica o AZURE_OPENAI_BACKENDS no es válida
+        """
+        env = os.environ if environ is None else environ
+        settings = cls(
+            api_key=env.get("AZURE_OPENAI_API_KEY") or None,
+            api_version=env.get("AZURE_OPENAI_API_VERSION") or None,
+            azure_endpoint=env.get("AZURE_OPENAI_ENDPOINT") or None,
+            chat_deployment_name=env.get("AZURE_OPENAI_CHAT_DEPLOYMENT_NAME") or None,
+            http=HttpClientSettings.from_env(env),
+            requests_per_minute=_number(env, "AZURE_OPENAI_RPM", int),
+            tokens_per_minute=_number(env, "AZURE_OPENAI_TPM", int),
+            backends=parse_backends(env.get("AZURE_OPENAI_BACKENDS"),
+                                    env.get("AZURE_OPENAI_API_KEY") or None,
+                                    env.get("AZURE_OPENAI_API_VERSION") or None),
+            response_cache=_flag(env, "AZURE_OPENAI_RESPONSE_CACHE"),
+            adaptive_concurrency=_flag(env, "AZURE_OPENAI_ADAPTIVE_CONCURRENCY"),
+            use_entra_id=env.get("AZURE_OPENAI_AUTH", "key").lower() in ("entra", "entra_id", "aad"),
+            mcp_tool_cache=_flag(env, "MCP_TOOL_CACHE"),
+            mcp_use_installed=env.get("MCP_USE_INSTALLED", "1").lower() not in ("0", "false", "no"),
+            source=source,
+        )
+        fake_server = env.get("AZURE_OPENAI_FAKE_SERVER") or None
+        if fake_server:
+            # Servidor falso local (benchmarks/fake_openai_server.py): no hacen falta
+            # credenciales reales, pero se respetan las definidas
+            settings = replace(
+                settings,
+                api_key=settings.api_key or "fake",
+                api_version=settings.api_version or "2024-10-21",
+                azure_endpoint=fake_server,
+                chat_deployment_name=settings.chat_deployment_name or "fake-gpt",
+                backends=(),
+                use_entra_id=False,
+            )
+        return settings
+
+    @property
+    def missing_vars(self) -> List[str]:
+        """
+        Variables obligatorias de Azure OpenAI que no están definidas.
+        
+        Con AZURE_OPENAI_AUTH=entra la API key no es obligatoria.
+        """
+        values = {
+            "AZURE_OPENAI_API_KEY": self.api_key,
+            "AZURE_OPENAI_API_VERSION": self.api_version,
+            "AZURE_OPENAI_ENDPOINT": self.azure_endpoint,
+            "AZURE_OPENAI_CHAT_DEPLOYMENT_NAME": self.chat_deployment_name,
+        }
+        if self.use_entra_id:
+            values["AZURE_OPENAI_API_KEY"] = "entra"
+        return [var for var in AZURE_REQUIRED_VARS if not values[var]]
+
+
+PROJECT_DOTENV = Path(__file__).parent.parent / ".env"
+
+_settings: Optional[Settings] = None
+_dotenv_keys: Dict[str, str] = {}
+_lock = threading.Lock()
+
+
+def _dotenv_path() -> Optional[str]:
+    """Ruta del .env: DOTENV_PATH, el más cercano al directorio actual o el del proyecto."""
+    path = os.getenv("DOTENV_PATH") or find_dotenv(usecwd=True)
+    if not path and PROJECT_DOTENV.exists():
+        path = str(PROJECT_DOTENV)
+    return path or None
+
+
+def _apply_dotenv(path: Optional[str]):
+    """
+    Vuelca el .env en os.environ sin pisar las variables reales del proceso.
+
+    Las claves que vinieron de un .env anterior sí se actualizan, de modo que una
+    recarga refleja los cambios del fichero.
+    """
+    values = {k: v for k, v in (dotenv_values(path) if path else {}).items() if v is not None}
+    for key, value in values.items():
+        if key not in os.environ or key in _dotenv_keys:
+            os.environ[key] = value
+            _dotenv_keys[key] = value
+    for key in list(_dotenv_keys):
+        if key not in values:
+            # Eliminada del .env: deja de estar definida
+            if os.environ.get(key) == _dotenv_keys[key]:
+                del os.environ[key]
+            del _dotenv_keys[key]
+
+
+def get_settings() -> Settings:
+    """
+    Retorna el snapshot de configuración, cargándolo la primera vez.
+
+    Returns:
+        Settings: Configuración inmutable compartida por todo el proceso
+    """
+    settings = _settings
+    if settings is None:
+        settings = reload_settings()
+    return settings
+
+
+def reload_settings() -> Settings:
+    """
+    Vuelve a leer el .env y el entorno y sustituye el snapshot actual.
+
+    Returns:
+        Settings: El nuevo snapshot
+    """
+    global _settings
+    with _lock:
+        path = _dotenv_path()
+        _apply_dotenv(path)
+        _settings = Settings.from_env(source=path)
+        return _settings
+
+
+class SettingsWatcher:
+    """
+    Hilo que recarga la configuración cuando cambia la fecha de modificación del .env.
+
+    Si el fichero editado no es válido, se avisa y se mantiene el snapshot anterior.
+    """
+
+    def __init__(self, interval: float = 2.0,
+                 on_change: Optional[Callable[[Settings], None]] = None,
+                 path: Optional[str] = None):
+        self.interval = interval
+        self.on_change = on_change
+        self.path = Path(path or _dotenv_path() or ".env")
+        # Fecha de referencia al crearlo, no al arrancar el hilo: así no se pierde
+        # una edición hecha entre start() y la primera vuelta del hilo
+        self._last_mtime = self._mtime()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="settings-watcher", daemon=True)
+
+    def _mtime(self) -> Optional[float]:
+        try:
+            return self.path.stat().st_mtime
+        except OSError:
+            return None
+
+    def _run(self):
+        last = self._last_mtime
+        while not self._stop.wait(self.interval):
+            current = self._mtime()
+            if current == last:
+                continue
+            last = current
+            try:
+                settings = reload_settings()
+            except ValueError as e:
+                # Se mantiene el snapshot anterior hasta la siguiente edición válida
+                print(f"{e}\n⚠️  Se mantiene la configuración anterior de {self.path}")
+                continue
+            print(f"🔄 Configuración recargada desde {self.path}")
+            if self.on_change is not None:
+                self.on_change(settings)
+
+    def start(self) -> "SettingsWatcher":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=self.interval + 1)
+
+
+def watch_settings(interval: float = 2.0,
+                   on_change: Optional[Callable[[Settings], None]] = None) -> SettingsWatcher:
+    """
+    Arranca un watcher que recarga la configuración al modificar el .env.
+
+    Args:
+        interval: Segundos entre comprobaciones
+        on_change: Callback opcional con el nuevo snapshot
+
+    Returns:
+        SettingsWatcher: Llamar a stop() para detenerlo
+    """
+    get_settings()
+    return SettingsWatcher(interval=interval, on_change=on_change).start()
@@ -0,0 +1,47 @@
+"""
+Utilidades estadísticas para benchmarks y métricas de latencia.
+"""
+
+import math
+from typing import Dict, Sequence
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """
+    Calcula un percentil por interpolación lineal.
+    
+    Args:
+        values: Muestras (no necesitan estar ordenadas)
+        pct: Percentil entre 0 y 100
+        
+    Returns:
+        float: Valor del percentil (0.0 si no hay muestras)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower, upper = math.floor(rank), math.ceil(rank)
+    if lower == upper:
+        return ordered[int(rank)]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize(values: Sequence[float]) -> Dict[str, float]:
+    """
+    Resume una serie de latencias (en segundos).
+    
+    Returns:
+        dict: count, mean, min, max, p50, p95 y p99
+    """
+    if not values:
+        return {"count": 0, "mean": 0.0, "min": 0.0, "max": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "min": min(values),
+        "max": max(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+    }
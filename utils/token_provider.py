@@ -0,0 +1,166 @@
+"""
+Autenticación con Microsoft Entra ID para Azure OpenAI.
+Un único credential por proceso y un token bearer en caché que se renueva en
+segundo plano antes de caducar, de modo que ninguna petición espera a Entra ID.
+"""
+
+import asyncio
+import inspect
+import time
+from typing import Any, Dict, Optional
+
+COGNITIVE_SERVICES_SCOPE = "https://cognitiveservices.azure.com/.default"
+
+_credential: Any = None
+_providers: Dict[str, "TokenProvider"] = {}
+
+
+def get_credential() -> Any:
+    """
+    Retorna el credential compartido por todos los clientes del proceso.
+
+    Por defecto es DefaultAzureCredential (az login, identidad administrada,
+    variables AZURE_CLIENT_ID/AZURE_TENANT_ID/AZURE_CLIENT_SECRET...).
+    """
+    global _credential
+    if _credential is None:
+        from azure.identity import DefaultAzureCredential
+
+        _credential = DefaultAzureCredential()
+    return _credential
+
+
+def use_credential(credential: Any):
+    """
+    Sustituye el credential compartido (p. ej. por uno de pruebas).
+
+    Los proveedores de token existentes se descartan para que el siguiente
+    cliente use el nuevo credential.
+
+    Args:
+        credential: Objeto con get_token(*scopes) síncrono o asíncrono, o None
+            para volver a DefaultAzureCredential
+    """
+    global _credential
+    _credential = credential
+    for provider in _providers.values():
+        provider.stop()
+    _providers.clear()
+
+
+class TokenProvider:
+    """
+    Proveedor de tokens para ``azure_ad_token_provider`` de AsyncAzureOpenAI.
+
+    La primera llamada obtiene el token; a partir de ahí se devuelve el token en
+    caché y una tarea en segundo plano lo renueva ``refresh_margin`` segundos antes
+    de que caduque. Si la renovación falla se reintenta cada ``retry_interval``
+    segundos mientras el token actual siga siendo válido. Un token al que le quedan
+    menos de ``expiry_skew`` segundos se da por caducado, para que ninguna petición
+    salga con un token que caduque por el camino.
+    """
+
+    def __init__(self, credential: Any = None, scope: str = COGNITIVE_SERVICES_SCOPE,
+                 refresh_margin: float = 300.0, retry_interval: float = 30.0,
+                 expiry_skew: float = 10.0):
+        """
+        Args:
+            credential: Credential de azure-identity (por defecto el compartido)
+            scope: Scope del token
+            refresh_margin: Segundos antes de la caducidad en que se renueva
+            retry_interval: Segundos entre reintentos si la renovación falla
+            expiry_skew: Segundos antes de la caducidad a partir de los que el token
+                ya no se usa y la petición espera uno nuevo
+        """
+        self.credential = credential if credential is not None else get_credential()
+        self.scope = scope
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self.expiry_skew = expiry_skew
+        self._token: Optional[str] = None
+        self._expires_on = 0.0
+        self._lock = asyncio.Lock()
+        self._refresher: Optional[asyncio.Task] = None
+        self.stats: Dict[str, int] = {"fetches": 0, "refresh_errors": 0, "blocking_fetches": 0}
+
+    @property
+    def expires_in(self) -> float:
+        """Segundos de validez que le quedan al token en caché."""
+        return self._expires_on - time.time()
+
+    @property
+    def _usable(self) -> bool:
+        return self._token is not None and self.expires_in > self.expiry_skew
+
+    async def _fetch(self):
+        # Los credentials síncronos hacen E/S bloqueante: fuera del event loop
+        get_token = self.credential.get_token
+        if inspect.iscoroutinefunction(get_token):
+            result = await get_token(self.scope)
+        else:
+            result = await asyncio.to_thread(get_token, self.scope)
+        self._token = result.token
+        self._expires_on = float(result.expires_on)
+        self.stats["fetches"] += 1
+
+    def _refresh_delay(self) -> float:
+        # Tokens de vida más corta que el margen: renovar a mitad de su vida
+        return max(self.expires_in - self.refresh_margin, self.expires_in / 2, 1.0)
+
+    async def _refresh_loop(self):
+        delay = self._refresh_delay()
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                async with self._lock:
+                    await self._fetch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["refresh_errors"] += 1
+                print(f"⚠️  No se pudo renovar el token de Entra ID: {e}")
+                delay = min(self.retry_interval, max(self.expires_in, 1.0))
+                continue
+            delay = self._refresh_delay()
+
+    def _ensure_refresher(self):
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def __call__(self) -> str:
+        """Retorna un token válido; solo espera si no hay ninguno en caché o está a punto de caducar."""
+        if not self._usable:
+            async with self._lock:
+                if not self._usable:
+                    self.stats["blocking_fetches"] += 1
+                    await self._fetch()
+        self._ensure_refresher()
+        return self._token
+
+    def stop(self):
+        """Detiene la renovación en segundo plano."""
+        if self._refresher is not None and not self._refresher.done():
+            self._refresher.cancel()
+        self._refresher = None
+
+    def describe(self) -> Dict[str, Any]:
+        return {"scope": self.scope, "expires_in": round(self.expires_in, 1), **self.stats}
+
+
+def get_token_provider(scope: str = COGNITIVE_SERVICES_SCOPE) -> TokenProvider:
+    """
+    Retorna el proveedor de tokens compartido para un scope.
+
+    Todos los clientes de Azure OpenAI del proceso comparten credential, token
+    en caché y tarea de renovación.
+    """
+    provider = _providers.get(scope)
+    if provider is None:
+        provider = _providers[scope] = TokenProvider(scope=scope)
+    return provider
+
+
+def close_token_providers():
+    """Detiene la renovación de todos los proveedores compartidos."""
+    for provider in _providers.values():
+        provider.stop()